@@ -24,7 +24,7 @@ from ..core.config import settings
 from ..core.logging import logger
 from ..schemas import ProjectManifest, create_default_manifest, validate_manifest, AppType
 from ..services.ast_patcher import generate_patch, apply_patch
-from ..services.validation import get_validation_service
+from ..services.validation import ValidationSeverity, get_validation_service
 from ..services.memory import get_project_memory
 from .providers.base import AIProvider
 from pydantic import ValidationError
@@ -332,7 +332,7 @@ CRITICAL RULES:
         if context.project_id:
             try:
                 memory = get_project_memory(context.project_id)
-                mem_data = memory.get_context_for_generation(raw_desc, max_results=5)
+                mem_data = await memory.get_context_for_generation_async(raw_desc, max_results=5)
                 
                 # Build context string
                 if mem_data.get("preferences"):
@@ -1173,7 +1173,7 @@ Be strict but practical."""
                 )
                 
                 for issue in result.issues:
-                    if issue.severity.value == "error":
+                    if issue.severity == ValidationSeverity.ERROR:
                         critical_issues.append(
                             f"{issue.file}:{issue.line} - {issue.message} ({issue.rule})"
                         )
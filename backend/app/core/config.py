@@ -58,6 +58,37 @@ class Settings(BaseSettings):
     MAX_PROJECT_NAME_LENGTH: int = 100
     WORK_DIR: str = "./work"
     
+    # Project memory (embeddings)
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = "onnx"  # "onnx" or "torch"
+    EMBEDDING_ONNX_FILE: str = "onnx/model_qint8_avx512_vnni.onnx"
+    ORT_PROVIDERS: str = "CPUExecutionProvider"
+    ORT_INTRA_OP_THREADS: int = 0  # 0 = onnxruntime default (physical cores)
+    # Optional model2vec embedder for short preference/constraint texts.
+    # Must output the same dimension as EMBEDDING_MODEL (e.g. a 384-d distill
+    # of all-MiniLM-L6-v2); empty disables it.
+    STATIC_EMBEDDING_MODEL: str = ""
+    EMBEDDING_WORKERS: int = 0  # >0 encodes in a process pool; 0 = in-process
+    
+    # Preview sandboxes
+    PREVIEW_PARALLELISM: int = 8  # Threads for blocking Docker calls
+    PREVIEW_LOG_MAX: int = 2000  # Log lines kept per preview
+    # Restore static previews from a CRIU checkpoint (experimental daemon + CRIU)
+    PREVIEW_CHECKPOINTS: bool = False
+    
+    # Test execution
+    # Scratch root for materialized test projects; empty picks /dev/shm when
+    # available so file setup stays in RAM. Projects that do not fit in its
+    # free space go to the system temp dir
+    TEST_RUNNER_TMPDIR: str = ""
+    # Shard pytest runs with more than 4 test files across pytest-xdist workers
+    TEST_RUNNER_XDIST: bool = False
+    
+    # Virtual file system
+    # Hash for commit ids and blobs: "blake3" (falls back to sha1 when the
+    # package is not installed) or "sha1"
+    VFS_HASH: str = "blake3"
+    
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
     def parse_cors_origins(cls, v: str) -> str:
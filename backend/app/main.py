@@ -33,6 +33,11 @@ async def lifespan(_: FastAPI):
     
     yield
     logger.info("Shutting down")
+    
+    from .services.validation import shutdown_validation_service
+    shutdown_validation_service()
+    from .services.test_runner import shutdown_test_service
+    shutdown_test_service()
 
 
 app = FastAPI(
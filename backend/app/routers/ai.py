@@ -76,13 +76,16 @@ async def edit_project(request: Request, payload: EditPayload):
         if payload.project_id:
             project_dir = Path(settings.WORK_DIR) / str(payload.project_id)
             if project_dir.exists():
+                seen_dirs = {project_dir}
                 for rel_path, content in files.items():
                     # Security check
                     if ".." in rel_path or rel_path.startswith("/"):
                         continue
                         
                     file_path = project_dir / rel_path
-                    file_path.parent.mkdir(parents=True, exist_ok=True)
+                    if file_path.parent not in seen_dirs:
+                        file_path.parent.mkdir(parents=True, exist_ok=True)
+                        seen_dirs.add(file_path.parent)
                     file_path.write_text(content, encoding="utf-8")
         
         provider = engine.providers[0].name if engine.providers else "fallback"
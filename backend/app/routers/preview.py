@@ -65,7 +65,7 @@ async def create_preview(request: CreatePreviewRequest):
         )
         
         # Start VFS watcher for live reload
-        start_vfs_watcher(request.project_id, poll_interval=2.0)
+        start_vfs_watcher(request.project_id)
         
         return PreviewResponse(
             project_id=preview.project_id,
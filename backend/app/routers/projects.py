@@ -195,6 +195,7 @@ def update_project_files(
     
     project_dir = Path(settings.WORK_DIR) / str(project_id)
     project_dir.mkdir(parents=True, exist_ok=True)
+    seen_dirs = {project_dir}
     
     for rel_path, content in payload.files.items():
         # Security check: prevent directory traversal
@@ -202,7 +203,9 @@ def update_project_files(
             continue
             
         file_path = project_dir / rel_path
-        file_path.parent.mkdir(parents=True, exist_ok=True)
+        if file_path.parent not in seen_dirs:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            seen_dirs.add(file_path.parent)
         file_path.write_text(content, encoding="utf-8")
         
     # Update timestamp
@@ -2,13 +2,16 @@
 import ast
 import json
 import difflib
+import hashlib
+from itertools import chain, islice
 from typing import Dict, Optional, Tuple, List
 from dataclasses import dataclass
 
 from ..core.logging import logger
+from ..validators.ast_validator import parse_python
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CodePatch:
     """Represents a code patch."""
     file_path: str
@@ -39,14 +42,14 @@ class PythonASTPatcher:
             (can_patch, reason, changes_list)
         """
         try:
-            old_ast = ast.parse(old_code)
-            new_ast = ast.parse(new_code)
+            old_ast = parse_python(old_code)
+            new_ast = parse_python(new_code)
         except SyntaxError as e:
             return False, f"Syntax error: {e}", []
         
         # Get all top-level definitions
-        old_defs = PythonASTPatcher._get_definitions(old_ast)
-        new_defs = PythonASTPatcher._get_definitions(new_ast)
+        old_defs = PythonASTPatcher._get_definitions(old_ast, old_code)
+        new_defs = PythonASTPatcher._get_definitions(new_ast, new_code)
         
         changes = []
         
@@ -60,9 +63,7 @@ class PythonASTPatcher:
         
         # Check for modifications
         for name in old_defs.keys() & new_defs.keys():
-            old_src = ast.get_source_segment(old_code, old_defs[name]['node'])
-            new_src = ast.get_source_segment(new_code, new_defs[name]['node'])
-            if old_src != new_src:
+            if old_defs[name]['digest'] != new_defs[name]['digest']:
                 changes.append(f"Modified {old_defs[name]['type']} '{name}'")
         
         can_patch = len(changes) <= 5  # Reasonable threshold
@@ -71,17 +72,18 @@ class PythonASTPatcher:
         return can_patch, reason, changes
     
     @staticmethod
-    def _get_definitions(tree: ast.AST) -> Dict:
-        """Extract all top-level function and class definitions."""
+    def _get_definitions(tree: ast.AST, source: str) -> Dict:
+        """Extract top-level function and class definitions with a digest of their source."""
+        lines = source.splitlines(keepends=True)
         defs = {}
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
-                # Only get top-level definitions
-                if isinstance(node, ast.FunctionDef):
-                    defs[node.name] = {'type': 'function', 'node': node}
-                else:
-                    defs[node.name] = {'type': 'class', 'node': node}
-                break  # Don't recurse into nested functions/classes
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                segment = ''.join(lines[node.lineno - 1:node.end_lineno])
+                defs[node.name] = {
+                    'type': 'class' if isinstance(node, ast.ClassDef) else 'function',
+                    'node': node,
+                    'digest': hashlib.blake2b(segment.encode("utf-8", "surrogatepass"), digest_size=16).digest(),
+                }
         return defs
     
     @staticmethod
@@ -99,11 +101,11 @@ class PythonASTPatcher:
             )
         
         try:
-            old_ast = ast.parse(old_code)
-            new_ast = ast.parse(new_code)
+            old_ast = parse_python(old_code)
+            new_ast = parse_python(new_code)
             
-            old_defs = PythonASTPatcher._get_definitions(old_ast)
-            new_defs = PythonASTPatcher._get_definitions(new_ast)
+            old_defs = PythonASTPatcher._get_definitions(old_ast, old_code)
+            new_defs = PythonASTPatcher._get_definitions(new_ast, new_code)
             
             # Find the first significant change
             for name in new_defs.keys() - old_defs.keys():
@@ -120,9 +122,8 @@ class PythonASTPatcher:
             
             for name in old_defs.keys() & new_defs.keys():
                 # Modified definition
-                old_src = ast.get_source_segment(old_code, old_defs[name]['node'])
-                new_src = ast.get_source_segment(new_code, new_defs[name]['node'])
-                if old_src != new_src:
+                if old_defs[name]['digest'] != new_defs[name]['digest']:
+                    new_src = ast.get_source_segment(new_code, new_defs[name]['node'])
                     return CodePatch(
                         file_path=file_path,
                         patch_type="function_replace" if new_defs[name]['type'] == 'function' else "class_replace",
@@ -154,23 +155,28 @@ class PythonASTPatcher:
         if patch.patch_type in ["function_replace", "class_replace"]:
             # Try to replace the specific function/class
             try:
-                old_ast = ast.parse(old_code)
+                old_ast = parse_python(old_code)
                 lines = old_code.splitlines(keepends=True)
                 
-                # Find the target definition
-                for node in ast.walk(old_ast):
-                    if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
-                        if node.name == patch.target:
-                            # Replace lines
-                            start_line = node.lineno - 1
-                            end_line = node.end_lineno
-                            
-                            new_lines = (
-                                lines[:start_line] +
-                                [patch.content + "\n"] +
-                                lines[end_line:]
-                            )
-                            return ''.join(new_lines)
+                # Find the target among top-level definitions only
+                defs = {
+                    node.name: node for node in old_ast.body
+                    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+                }
+                node = defs.get(patch.target)
+                if node is not None:
+                    # Replace lines
+                    start_line = node.lineno - 1
+                    end_line = node.end_lineno
+
+                    content = patch.content
+                    if not content.endswith("\n"):
+                        content += "\n"
+                    return ''.join(chain(
+                        islice(lines, start_line),
+                        (content,),
+                        islice(lines, end_line, None)
+                    ))
             
             except Exception as e:
                 logger.error(f"[ASTPatcher] Apply patch failed: {e}")
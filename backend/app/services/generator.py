@@ -1,9 +1,11 @@
 """Project generation service."""
+import asyncio
 import json
 import os
 import re
 import shutil
 import traceback
+import zipfile
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -19,13 +21,19 @@ from ..db import session_scope
 from ..models import Project
 from ..validators.ast_validator import validate_python_code
 from ..services.vfs import get_vfs, clear_vfs
-from ..services.validation import get_validation_service
+from ..services.validation import ValidationSeverity, get_validation_service
 from ..services.test_runner import get_test_service
 from ..services.memory import get_project_memory
 
 BASE_WORK_DIR = Path(settings.WORK_DIR)
 BASE_WORK_DIR.mkdir(parents=True, exist_ok=True)
 
+# Formats that are already compressed; deflating them again just burns CPU
+_STORE_EXTS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".ico",
+    ".gz", ".zip", ".woff", ".woff2",
+})
+
 
 async def start_generation_job(project_id: int) -> None:
     """Generate project files in background."""
@@ -73,19 +81,21 @@ async def start_generation_job(project_id: int) -> None:
         # Store generated code in memory for future context
         try:
             memory = get_project_memory(project_id)
+            code_items = []
             for filepath, content in files.items():
                 # Detect language
                 if filepath.endswith('.py'):
-                    memory.store_code(filepath, content, "python")
+                    code_items.append((filepath, content, "python"))
                 elif filepath.endswith(('.js', '.jsx')):
-                    memory.store_code(filepath, content, "javascript")
+                    code_items.append((filepath, content, "javascript"))
                 elif filepath.endswith(('.ts', '.tsx')):
-                    memory.store_code(filepath, content, "typescript")
+                    code_items.append((filepath, content, "typescript"))
+            # One batched embedding pass for the whole project
+            memory.store_code_bulk(code_items)
             
             # Store project preferences from spec
             if "tech_stack" in spec:
-                for key, value in spec["tech_stack"].items():
-                    memory.store_preference(key, value, category="tech_stack")
+                memory.store_preferences(spec["tech_stack"], category="tech_stack")
             
             logger.info(f"Stored {len(files)} files in project memory")
         except Exception as e:
@@ -112,7 +122,7 @@ async def start_generation_job(project_id: int) -> None:
                     # Collect error-level issues only
                     validation_errors.extend([
                         issue for issue in result.issues 
-                        if issue.severity.value == "error"
+                        if issue.severity == ValidationSeverity.ERROR
                     ])
         
         # Optionally run tests if test files exist
@@ -127,17 +137,17 @@ async def start_generation_job(project_id: int) -> None:
         commit_id = vfs.commit(f"Initial generation: {project_name}")
         logger.info(f"VFS commit {commit_id} for project {project_id}")
         
-        # Export to disk for ZIP creation
+        # Export to disk for the project file endpoints
         outdir = BASE_WORK_DIR / str(project_id)
         if outdir.exists():
             shutil.rmtree(outdir)
         outdir.mkdir(parents=True, exist_ok=True)
         
-        vfs.export_to_disk(outdir)
+        await vfs.export_to_disk(outdir)
         
-        # Create ZIP archive
-        zip_base = BASE_WORK_DIR / str(project_id)
-        archive_path = shutil.make_archive(str(zip_base), "zip", outdir)
+        # Create ZIP archive straight from the VFS contents
+        archive_path = str(BASE_WORK_DIR / f"{project_id}.zip")
+        _write_zip_archive(vfs.files, archive_path)
         
         logger.info(f"Created archive for project {project_id}: {archive_path}")
 
@@ -172,6 +182,25 @@ async def start_generation_job(project_id: int) -> None:
             raise
 
 
+def start_generation_job_sync(project_id: int) -> None:
+    """Run a generation job to completion from synchronous code."""
+    asyncio.run(start_generation_job(project_id))
+
+
+def _write_zip_archive(files: dict, archive_path: str) -> None:
+    """Write VFS files into a ZIP, storing pre-compressed assets uncompressed."""
+    with zipfile.ZipFile(archive_path, "w") as zf:
+        for path, node in sorted(files.items()):
+            if os.path.splitext(path)[1].lower() in _STORE_EXTS:
+                zf.writestr(path, node.content, compress_type=zipfile.ZIP_STORED)
+            else:
+                # Level 3 keeps most of the size win at a fraction of level 6's cost
+                zf.writestr(
+                    path, node.content,
+                    compress_type=zipfile.ZIP_DEFLATED, compresslevel=3
+                )
+
+
 def _fix_localhost_urls(files: dict) -> dict:
     """Post-process generated files to replace hard-coded localhost URLs with /api proxy."""
     fixed = {}
@@ -183,6 +212,11 @@ def _fix_localhost_urls(files: dict) -> dict:
         
         # Replace hard-coded localhost URLs in JavaScript/JSX files
         if filepath.endswith(('.js', '.jsx')):
+            # Most components never reference the backend; skip the rewrites
+            if 'localhost' not in content:
+                fixed[filepath] = content
+                continue
+
             # Replace 'http://localhost:8000' or 'http://localhost:3000' with '/api'
             content = content.replace("'http://localhost:8000'", "'/api'")
             content = content.replace('"http://localhost:8000"', '"/api"')
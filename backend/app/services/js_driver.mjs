@@ -0,0 +1,125 @@
+// Long-lived worker for the JavaScript/TypeScript validators.
+//
+// Loads ESLint, Prettier and TypeScript once and answers newline-delimited
+// JSON jobs on stdin, one JSON reply per line on stdout:
+//
+//   {"id": 1, "kind": "eslint", "root": "/tmp/x", "config": "/tmp/x/.eslintrc.validate.json"}
+//   {"id": 2, "kind": "prettier", "root": "/tmp/x", "files": ["src/App.jsx"]}
+//   {"id": 3, "kind": "tsc", "root": "/tmp/x", "config": "/tmp/x/tsconfig.validate.json"}
+//
+// A reply carries the job's id plus either the result, {"unavailable": msg}
+// when the tool cannot be loaded, or {"error": msg}.
+import { execFileSync } from "node:child_process";
+import { readFile } from "node:fs/promises";
+import { createRequire } from "node:module";
+import { join } from "node:path";
+import { createInterface } from "node:readline";
+import { pathToFileURL } from "node:url";
+
+const modules = new Map();
+let globalRoot;
+
+function resolveModule(name) {
+  // Same lookup as npx: the working directory first, then global installs
+  try {
+    return createRequire(join(process.cwd(), "noop.js")).resolve(name);
+  } catch {
+    globalRoot ??= execFileSync("npm", ["root", "-g"], { encoding: "utf8" }).trim();
+    return createRequire(join(globalRoot, "noop.js")).resolve(name);
+  }
+}
+
+function load(name) {
+  if (!modules.has(name)) {
+    modules.set(
+      name,
+      (async () => {
+        const mod = await import(pathToFileURL(resolveModule(name)).href);
+        return mod.default ?? mod;
+      })()
+    );
+  }
+  return modules.get(name);
+}
+
+class Unavailable extends Error {}
+
+async function tool(name) {
+  try {
+    return await load(name);
+  } catch (e) {
+    throw new Unavailable(`${name}: ${e.message}`);
+  }
+}
+
+const handlers = {
+  async eslint({ root, config }) {
+    const { ESLint } = await tool("eslint");
+    const eslint = new ESLint({
+      cwd: root,
+      useEslintrc: false,
+      overrideConfigFile: config,
+      errorOnUnmatchedPattern: false,
+    });
+    const results = await eslint.lintFiles([root]);
+    // Same fields the CLI's JSON formatter reports
+    return {
+      results: results.map(({ filePath, messages }) => ({ filePath, messages })),
+    };
+  },
+
+  async prettier({ root, files }) {
+    const prettier = await tool("prettier");
+    const unformatted = [];
+    for (const file of files) {
+      const filepath = join(root, file);
+      const source = await readFile(filepath, "utf8");
+      const options = (await prettier.resolveConfig(filepath)) ?? {};
+      if (!(await prettier.check(source, { ...options, filepath }))) {
+        unformatted.push(file);
+      }
+    }
+    return { unformatted };
+  },
+
+  async tsc({ root, config }) {
+    const ts = await tool("typescript");
+    const parsed = ts.getParsedCommandLineOfConfigFile(
+      config,
+      { noEmit: true },
+      { ...ts.sys, onUnRecoverableConfigFileDiagnostic: () => {} }
+    );
+    if (!parsed) {
+      throw new Error(`cannot read ${config}`);
+    }
+    const program = ts.createProgram(parsed.fileNames, parsed.options);
+    const diagnostics = [...parsed.errors, ...ts.getPreEmitDiagnostics(program)];
+    // The same "file(line,col): error TS1234: message" lines tsc prints
+    const output = ts.formatDiagnostics(diagnostics, {
+      getCanonicalFileName: (f) => f,
+      getCurrentDirectory: () => root,
+      getNewLine: () => "\n",
+    });
+    return { output, failed: diagnostics.length > 0 };
+  },
+};
+
+const lines = createInterface({ input: process.stdin });
+lines.on("line", async (line) => {
+  let id = null;
+  let reply;
+  try {
+    const { id: jobId, kind, ...job } = JSON.parse(line);
+    id = jobId;
+    const handler = handlers[kind];
+    if (!handler) {
+      throw new Error(`unknown job kind: ${kind}`);
+    }
+    reply = { id, ...(await handler(job)) };
+  } catch (e) {
+    reply = e instanceof Unavailable
+      ? { id, unavailable: e.message }
+      : { id, error: String(e?.stack ?? e) };
+  }
+  process.stdout.write(JSON.stringify(reply) + "\n");
+});
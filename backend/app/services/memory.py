@@ -1,11 +1,19 @@
 """Project memory service with vector embeddings and semantic search."""
+import asyncio
 import hashlib
 import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 
 import chromadb
+import numpy as np
 from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
 
@@ -15,61 +23,377 @@ from ..core.logging import logger
 # Initialize embedding model (lazy loading)
 _embedding_model: Optional[SentenceTransformer] = None
 
+# Optional model2vec static embedder (lazy loading)
+_static_model: Optional[Any] = None
+_static_model_checked = False
+
+# Embedding worker processes (lazy loading, opt-in via EMBEDDING_WORKERS)
+_encoder_pool: Optional[ProcessPoolExecutor] = None
+
 # ChromaDB client (lazy loading)
 _chroma_client: Optional[chromadb.Client] = None
+_PERSIST_DIR = Path(settings.WORK_DIR, "memory", "chroma")
+
+# Exact-match preference tables (prefs_{project_id}.json)
+_PREFS_DIR = Path(settings.WORK_DIR, "memory")
+
+# Rows fetched per page when listing metadata
+_PAGE_SIZE = 256
+
+# Query embeddings keyed by blake2b digest of the query text
+_QUERY_CACHE_SIZE = 1024
+_query_cache: "OrderedDict[bytes, Tuple[float, ...]]" = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+# Guards for the lazy singletons above (double-checked: the lock is only
+# taken until the first successful init)
+_model_lock = threading.Lock()
+_static_lock = threading.Lock()
+_pool_lock = threading.Lock()
+_client_lock = threading.Lock()
+
+
+def _cpu_supports_vnni() -> bool:
+    """Check whether the CPU can run the AVX-512 VNNI int8 ONNX model."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            return "avx512_vnni" in f.read()
+    except OSError:
+        return False
+
+
+def _load_onnx_model() -> SentenceTransformer:
+    """Load the embedding model on the ONNX Runtime backend."""
+    import onnxruntime as ort
+
+    session_options = ort.SessionOptions()
+    if settings.ORT_INTRA_OP_THREADS:
+        session_options.intra_op_num_threads = settings.ORT_INTRA_OP_THREADS
+    providers = [p.strip() for p in settings.ORT_PROVIDERS.split(",") if p.strip()]
+
+    model_kwargs = {"provider": providers[0], "session_options": session_options}
+    if _cpu_supports_vnni():
+        model_kwargs["file_name"] = settings.EMBEDDING_ONNX_FILE
+    else:
+        # No VNNI: the int8 model would run slower than plain FP32 ONNX
+        model_kwargs["file_name"] = "onnx/model_O3.onnx"
+
+    return SentenceTransformer(
+        settings.EMBEDDING_MODEL, backend="onnx", model_kwargs=model_kwargs
+    )
 
 
 def get_embedding_model() -> SentenceTransformer:
     """Get or create embedding model singleton."""
     global _embedding_model
     if _embedding_model is None:
-        logger.info("Loading sentence-transformers model...")
-        _embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        logger.info("✅ Embedding model loaded (384 dimensions)")
+        with _model_lock:
+            # Re-check: another thread may have loaded it while we waited
+            if _embedding_model is None:
+                logger.info("Loading sentence-transformers model...")
+                model = None
+                if settings.EMBEDDING_BACKEND == "onnx":
+                    try:
+                        model = _load_onnx_model()
+                        logger.info("✅ Embedding model loaded on ONNX Runtime")
+                    except Exception as e:
+                        logger.warning(f"ONNX embedding backend unavailable, using PyTorch: {e}")
+                if model is None:
+                    model = SentenceTransformer(settings.EMBEDDING_MODEL)
+                with _query_cache_lock:
+                    _query_cache.clear()  # Cached vectors belong to the previous model
+                _embedding_model = model
+                logger.info("✅ Embedding model loaded (384 dimensions)")
     return _embedding_model
 
 
+def _init_encoder_worker(counter) -> None:
+    """Pool initializer: one thread per worker, pinned to its own core, model loaded once."""
+    os.environ["OMP_NUM_THREADS"] = "1"
+    settings.ORT_INTRA_OP_THREADS = 1
+    
+    if hasattr(os, "sched_setaffinity"):
+        with counter.get_lock():
+            index = counter.value
+            counter.value += 1
+        cpus = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, {cpus[index % len(cpus)]})
+    
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+    
+    get_embedding_model()
+
+
+def _encode_batch(texts: List[str]):
+    """Encode texts with the worker's model (runs inside the pool)."""
+    return get_embedding_model().encode(
+        texts, batch_size=64, normalize_embeddings=True, convert_to_numpy=True
+    )
+
+
+def _embedding_dimension() -> int:
+    """Output size of the embedding model (runs inside the pool too)."""
+    return get_embedding_model().get_sentence_embedding_dimension()
+
+
+def get_encoder_pool() -> Optional[ProcessPoolExecutor]:
+    """Get the shared embedding process pool, or None when encoding in-process."""
+    global _encoder_pool
+    if _encoder_pool is None and settings.EMBEDDING_WORKERS > 0:
+        with _pool_lock:
+            if _encoder_pool is None:
+                # spawn: forking a process that already holds torch/ORT threads can deadlock
+                ctx = multiprocessing.get_context("spawn")
+                _encoder_pool = ProcessPoolExecutor(
+                    max_workers=settings.EMBEDDING_WORKERS,
+                    mp_context=ctx,
+                    initializer=_init_encoder_worker,
+                    initargs=(ctx.Value("i", 0),)
+                )
+                logger.info(f"✅ Embedding pool started with {settings.EMBEDDING_WORKERS} workers")
+    return _encoder_pool
+
+
+def get_static_model() -> Optional[Any]:
+    """Get the optional model2vec embedder for short keyword texts, or None."""
+    global _static_model, _static_model_checked
+    if not _static_model_checked:
+        with _static_lock:
+            if not _static_model_checked:
+                if settings.STATIC_EMBEDDING_MODEL:
+                    try:
+                        from model2vec import StaticModel
+                        model = StaticModel.from_pretrained(settings.STATIC_EMBEDDING_MODEL)
+                        # Ask the workers when they do the encoding, so this
+                        # process never loads a model of its own
+                        pool = get_encoder_pool()
+                        if pool is not None:
+                            expected = pool.submit(_embedding_dimension).result()
+                        else:
+                            expected = _embedding_dimension()
+                        if model.dim != expected:
+                            logger.warning(
+                                f"Static embedder has {model.dim} dimensions, expected {expected}; disabled"
+                            )
+                        else:
+                            _static_model = model
+                            logger.info("✅ Static embedding model loaded")
+                    except Exception as e:
+                        logger.warning(f"Static embedding model unavailable: {e}")
+                _static_model_checked = True
+    return _static_model
+
+
 def get_chroma_client() -> chromadb.Client:
     """Get or create ChromaDB client singleton."""
     global _chroma_client
     if _chroma_client is None:
-        persist_dir = Path(settings.WORK_DIR) / "memory" / "chroma"
-        persist_dir.mkdir(parents=True, exist_ok=True)
-        
-        _chroma_client = chromadb.Client(Settings(
-            persist_directory=str(persist_dir),
-            anonymized_telemetry=False
-        ))
-        logger.info(f"✅ ChromaDB initialized at {persist_dir}")
+        with _client_lock:
+            if _chroma_client is None:
+                if not _PERSIST_DIR.exists():
+                    _PERSIST_DIR.mkdir(parents=True, exist_ok=True)
+                
+                _chroma_client = chromadb.PersistentClient(
+                    path=str(_PERSIST_DIR),
+                    settings=Settings(anonymized_telemetry=False)
+                )
+                logger.info(f"✅ ChromaDB initialized at {_PERSIST_DIR}")
     return _chroma_client
 
 
+def _iso(ts_ns: int) -> str:
+    """Format a stored ts_ns metadata value as an ISO-8601 UTC timestamp."""
+    return datetime.fromtimestamp(ts_ns / 1e9, tz=timezone.utc).isoformat()
+
+
+def auto_configure_hnsw(n: int) -> Dict[str, Any]:
+    """Pick HNSW parameters for a collection expected to hold about n vectors.
+    
+    Args:
+        n: Expected number of vectors in the collection
+        
+    Returns:
+        Collection metadata with hnsw:* settings
+    """
+    if n < 10_000:
+        m, construction_ef, search_ef = 24, 128, 100
+    elif n < 100_000:
+        m, construction_ef, search_ef = 32, 200, 128
+    else:
+        m, construction_ef, search_ef = 48, 256, 200
+    
+    return {
+        # Embeddings are L2-normalized at encode time, so inner product
+        # equals cosine without Chroma re-normalizing every comparison
+        "hnsw:space": "ip",
+        "hnsw:M": m,
+        "hnsw:construction_ef": construction_ef,
+        "hnsw:search_ef": search_ef,
+    }
+
+
 class ProjectMemory:
     """Project memory with vector embeddings for semantic search."""
     
     def __init__(self, project_id: int):
         self.project_id = project_id
-        self.embedding_model = get_embedding_model()
+        self.static_model = get_static_model()
         self.client = get_chroma_client()
         
-        # Collections for different memory types
-        self.code_collection = self._get_or_create_collection("code")
-        self.decisions_collection = self._get_or_create_collection("decisions")
-        self.preferences_collection = self._get_or_create_collection("preferences")
-        self.constraints_collection = self._get_or_create_collection("constraints")
+        # One collection per project; entries are told apart by metadata "type"
+        self._bind_collection(self._get_or_create_collection())
+        
+        # (category, key) -> value, so exact lookups skip embedding + HNSW
+        self._kv_path = _PREFS_DIR / f"prefs_{project_id}.json"
+        self._kv_lock = threading.Lock()
+        self._kv_store: Dict[Tuple[str, str], Any] = self._load_kv_store()
+    
+    @property
+    def embedding_model(self) -> SentenceTransformer:
+        """The in-process embedding model, loaded on first use.
+        
+        With EMBEDDING_WORKERS set the workers encode instead, so the
+        parent process never has to load its own copy.
+        """
+        return get_embedding_model()
+    
+    def _bind_collection(self, collection):
+        """Point the collection attribute and its per-type aliases at a collection."""
+        self.collection = collection
+        
+        # Per-type names kept for existing callers
+        self.code_collection = collection
+        self.decisions_collection = collection
+        self.preferences_collection = collection
+        self.constraints_collection = collection
     
-    def _get_or_create_collection(self, memory_type: str):
-        """Get or create a ChromaDB collection."""
-        collection_name = f"project_{self.project_id}_{memory_type}"
+    def _get_or_create_collection(self, expected_size: int = 0):
+        """Get or create the project's ChromaDB collection.
+        
+        HNSW settings only take effect for newly created collections;
+        Chroma keeps the index parameters of existing ones.
+        """
         return self.client.get_or_create_collection(
-            name=collection_name,
-            metadata={"project_id": self.project_id, "type": memory_type}
+            name=f"project_{self.project_id}",
+            metadata={
+                "project_id": self.project_id,
+                **auto_configure_hnsw(expected_size),
+            }
         )
     
+    @staticmethod
+    def _where(memory_type: str, **filters: Any) -> Dict[str, Any]:
+        """Build a where filter scoped to one memory type."""
+        clauses = [{"type": memory_type}]
+        clauses.extend({key: value} for key, value in filters.items() if value)
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+    
     def _generate_id(self, content: str, memory_type: str) -> str:
         """Generate unique ID for memory entry."""
         hash_input = f"{self.project_id}:{memory_type}:{content}"
-        return hashlib.sha256(hash_input.encode()).hexdigest()[:16]
+        return hashlib.blake2b(hash_input.encode(), digest_size=8).hexdigest()
+    
+    def _embed(self, texts: List[str], fast: bool = False):
+        """Embed texts as L2-normalized vectors.
+        
+        Args:
+            texts: Texts to embed
+            fast: Use the static embedder if one is configured. Only for
+                preferences and constraints, which are searched within their type.
+        """
+        if fast and self.static_model is not None:
+            vectors = np.asarray(self.static_model.encode(texts), dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            return vectors / norms
+        
+        pool = get_encoder_pool()
+        if pool is not None:
+            return pool.submit(_encode_batch, texts).result()
+        
+        return self.embedding_model.encode(
+            texts, batch_size=64, normalize_embeddings=True, convert_to_numpy=True
+        )
+    
+    def _embedder(self, fast: bool = False) -> str:
+        """Name of the model _embed uses for the given fast flag."""
+        if fast and self.static_model is not None:
+            return settings.STATIC_EMBEDDING_MODEL
+        return settings.EMBEDDING_MODEL
+    
+    def _encode_query(self, query: str, fast: bool = False) -> List[float]:
+        """Embed a search query, reusing the vector for repeated queries."""
+        prefix = b"static:" if fast and self.static_model is not None else b""
+        key = hashlib.blake2b(prefix + query.encode(), digest_size=16).digest()
+        with _query_cache_lock:
+            embedding = _query_cache.get(key)
+            if embedding is not None:
+                _query_cache.move_to_end(key)
+        
+        if embedding is None:
+            embedding = tuple(self._embed([query], fast=fast)[0].tolist())
+            with _query_cache_lock:
+                _query_cache[key] = embedding
+                if len(_query_cache) > _QUERY_CACHE_SIZE:
+                    _query_cache.popitem(last=False)
+        return list(embedding)
+    
+    def _store_many(
+        self,
+        collection,
+        entries: List[Tuple[str, str, str, Dict[str, Any]]],
+        fast: bool = False
+    ):
+        """Embed entries in one batched forward pass and add them to a collection.
+        
+        Args:
+            collection: Target ChromaDB collection
+            entries: (doc_id, text_to_embed, document, metadata) tuples
+            fast: Embed with the static model when configured
+        """
+        # Chroma rejects duplicate IDs within a single add; keep the first
+        unique: Dict[str, Tuple[str, str, str, Dict[str, Any]]] = {}
+        for entry in entries:
+            unique.setdefault(entry[0], entry)
+        if not unique:
+            return
+        
+        ids, texts, documents, metadatas = zip(*unique.values())
+        embeddings = self._embed(list(texts), fast=fast)
+        # Vectors from different embedders can't be compared; searches filter on this
+        embedder = self._embedder(fast)
+        metadatas = [{**metadata, "embedder": embedder} for metadata in metadatas]
+        
+        # Chroma 0.4 only accepts lists of Python floats and stores float32
+        # in both HNSW and SQLite, so casting to float16/int8 here would
+        # lose precision without shrinking anything on disk
+        collection.add(
+            ids=list(ids),
+            embeddings=embeddings.tolist(),
+            documents=list(documents),
+            metadatas=list(metadatas)
+        )
+    
+    def _code_entry(
+        self,
+        filepath: str,
+        code: str,
+        language: str,
+        description: Optional[str] = None
+    ) -> Tuple[str, str, str, Dict[str, Any]]:
+        """Build the (id, text, document, metadata) entry for a code snippet."""
+        text = f"{filepath}\n{language}\n{description or ''}\n{code}"
+        return self._generate_id(code, "code"), text, code, {
+            "filepath": filepath,
+            "language": language,
+            "description": description or "",
+            "ts_ns": time.time_ns(),
+            "type": "code"
+        }
     
     def store_code(
         self,
@@ -86,31 +410,26 @@ class ProjectMemory:
             language: Programming language
             description: Optional description of the code
         """
-        # Create searchable text
-        text = f"{filepath}\n{language}\n{description or ''}\n{code}"
-        
-        # Generate embedding
-        embedding = self.embedding_model.encode(text).tolist()
-        
-        # Generate ID
-        doc_id = self._generate_id(code, "code")
-        
-        # Store in ChromaDB
-        self.code_collection.add(
-            ids=[doc_id],
-            embeddings=[embedding],
-            documents=[code],
-            metadatas=[{
-                "filepath": filepath,
-                "language": language,
-                "description": description or "",
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "type": "code"
-            }]
+        self._store_many(
+            self.collection,
+            [self._code_entry(filepath, code, language, description)]
         )
         
         logger.debug(f"Stored code: {filepath} ({language})")
     
+    def store_code_bulk(self, items: List[Tuple[str, str, str]]):
+        """Store many code snippets with a single batched embedding pass.
+        
+        Args:
+            items: (filepath, code, language) tuples
+        """
+        self._store_many(
+            self.collection,
+            [self._code_entry(filepath, code, language) for filepath, code, language in items]
+        )
+        
+        logger.debug(f"Stored {len(items)} code snippets")
+    
     def store_decision(
         self,
         decision: str,
@@ -124,33 +443,101 @@ class ProjectMemory:
             reasoning: Why this decision was made
             context: Additional context (tools used, alternatives considered, etc.)
         """
+        # Serialize once, compactly; reused for the search text and metadata
+        ctx_json = json.dumps(context or {}, separators=(",", ":"), ensure_ascii=False)
+        
         # Create searchable text
         text = f"{decision}\n{reasoning}"
         if context:
-            text += f"\n{json.dumps(context, indent=2)}"
+            text += f"\n{ctx_json}"
         
-        # Generate embedding
-        embedding = self.embedding_model.encode(text).tolist()
-        
-        # Generate ID
-        doc_id = self._generate_id(decision, "decision")
-        
-        # Store in ChromaDB
-        self.decisions_collection.add(
-            ids=[doc_id],
-            embeddings=[embedding],
-            documents=[text],
-            metadatas=[{
+        self._store_many(self.collection, [(
+            self._generate_id(decision, "decision"),
+            text,
+            text,
+            {
                 "decision": decision,
                 "reasoning": reasoning,
-                "context": json.dumps(context or {}),
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "context": ctx_json,
+                "ts_ns": time.time_ns(),
                 "type": "decision"
-            }]
-        )
+            }
+        )])
         
         logger.debug(f"Stored decision: {decision[:50]}...")
     
+    def _preference_entry(
+        self,
+        key: str,
+        value: Any,
+        category: str = "general"
+    ) -> Tuple[str, str, str, Dict[str, Any]]:
+        """Build the (id, text, document, metadata) entry for a preference."""
+        text = f"{category}: {key} = {value}"
+        return self._generate_id(f"{key}:{value}", "preference"), text, text, {
+            "key": key,
+            "value": str(value),
+            "category": category,
+            "ts_ns": time.time_ns(),
+            "type": "preference"
+        }
+    
+    def _load_kv_store(self) -> Dict[Tuple[str, str], Any]:
+        """Load the preference side table from disk."""
+        try:
+            with open(self._kv_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable preference table {self._kv_path}: {e}")
+            return {}
+        return {
+            (category, key): value
+            for category, values in data.items()
+            for key, value in values.items()
+        }
+    
+    def _save_kv_store(self):
+        """Persist the preference side table; caller holds ``_kv_lock``."""
+        data: Dict[str, Dict[str, Any]] = {}
+        for (category, key), value in self._kv_store.items():
+            data.setdefault(category, {})[key] = value
+        
+        _PREFS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = self._kv_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp, self._kv_path)
+    
+    def _update_kv_store(self, category: str, values: Dict[str, Any]):
+        """Record preferences in the side table and persist it."""
+        with self._kv_lock:
+            for key, value in values.items():
+                self._kv_store[(category, key)] = value
+            try:
+                self._save_kv_store()
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"Failed to persist preference table: {e}")
+    
+    def _clear_kv_store(self):
+        """Drop the preference side table in memory and on disk."""
+        with self._kv_lock:
+            self._kv_store.clear()
+            self._kv_path.unlink(missing_ok=True)
+    
+    def get_preference(self, key: str, category: str = "general") -> Any:
+        """Look up a preference by exact key without touching the vector store.
+        
+        Args:
+            key: Preference key (e.g., "ui_framework")
+            category: Category the preference was stored under
+            
+        Returns:
+            The stored value, or None if unknown
+        """
+        return self._kv_store.get((category, key))
+    
     def store_preference(
         self,
         key: str,
@@ -164,31 +551,31 @@ class ProjectMemory:
             value: Preference value
             category: Category (e.g., "frontend", "backend", "styling")
         """
-        # Create searchable text
-        text = f"{category}: {key} = {value}"
-        
-        # Generate embedding
-        embedding = self.embedding_model.encode(text).tolist()
-        
-        # Generate ID
-        doc_id = self._generate_id(f"{key}:{value}", "preference")
-        
-        # Store in ChromaDB
-        self.preferences_collection.add(
-            ids=[doc_id],
-            embeddings=[embedding],
-            documents=[text],
-            metadatas=[{
-                "key": key,
-                "value": str(value),
-                "category": category,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "type": "preference"
-            }]
+        self._store_many(
+            self.collection,
+            [self._preference_entry(key, value, category)],
+            fast=True
         )
+        self._update_kv_store(category, {key: value})
         
         logger.debug(f"Stored preference: {key} = {value}")
     
+    def store_preferences(self, preferences: Dict[str, Any], category: str = "general"):
+        """Store several preferences with a single batched embedding pass.
+        
+        Args:
+            preferences: Mapping of preference key to value
+            category: Category shared by all preferences
+        """
+        self._store_many(
+            self.collection,
+            [self._preference_entry(key, value, category) for key, value in preferences.items()],
+            fast=True
+        )
+        self._update_kv_store(category, preferences)
+        
+        logger.debug(f"Stored {len(preferences)} preferences in {category}")
+    
     def store_constraint(
         self,
         constraint: str,
@@ -205,25 +592,18 @@ class ProjectMemory:
         # Create searchable text
         text = f"{severity.upper()}: {constraint} (scope: {scope})"
         
-        # Generate embedding
-        embedding = self.embedding_model.encode(text).tolist()
-        
-        # Generate ID
-        doc_id = self._generate_id(constraint, "constraint")
-        
-        # Store in ChromaDB
-        self.constraints_collection.add(
-            ids=[doc_id],
-            embeddings=[embedding],
-            documents=[text],
-            metadatas=[{
+        self._store_many(self.collection, [(
+            self._generate_id(constraint, "constraint"),
+            text,
+            text,
+            {
                 "constraint": constraint,
                 "severity": severity,
                 "scope": scope,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "ts_ns": time.time_ns(),
                 "type": "constraint"
-            }]
-        )
+            }
+        )], fast=True)
         
         logger.debug(f"Stored constraint: {constraint[:50]}...")
     
@@ -244,18 +624,13 @@ class ProjectMemory:
             List of matching code snippets with metadata
         """
         # Generate query embedding
-        query_embedding = self.embedding_model.encode(query).tolist()
-        
-        # Build filter
-        where_filter = {}
-        if language:
-            where_filter["language"] = language
+        query_embedding = self._encode_query(query)
         
         # Search
-        results = self.code_collection.query(
+        results = self.collection.query(
             query_embeddings=[query_embedding],
             n_results=n_results,
-            where=where_filter if where_filter else None
+            where=self._where("code", language=language)
         )
         
         # Format results
@@ -276,12 +651,13 @@ class ProjectMemory:
             List of matching decisions with reasoning
         """
         # Generate query embedding
-        query_embedding = self.embedding_model.encode(query).tolist()
+        query_embedding = self._encode_query(query)
         
         # Search
-        results = self.decisions_collection.query(
+        results = self.collection.query(
             query_embeddings=[query_embedding],
-            n_results=n_results
+            n_results=n_results,
+            where=self._where("decision")
         )
         
         return self._format_results(results)
@@ -303,18 +679,13 @@ class ProjectMemory:
             List of matching preferences
         """
         # Generate query embedding
-        query_embedding = self.embedding_model.encode(query).tolist()
-        
-        # Build filter
-        where_filter = {}
-        if category:
-            where_filter["category"] = category
+        query_embedding = self._encode_query(query, fast=True)
         
         # Search
-        results = self.preferences_collection.query(
+        results = self.collection.query(
             query_embeddings=[query_embedding],
             n_results=n_results,
-            where=where_filter if where_filter else None
+            where=self._where("preference", category=category, embedder=self._embedder(fast=True))
         )
         
         return self._format_results(results)
@@ -336,18 +707,13 @@ class ProjectMemory:
             List of matching constraints
         """
         # Generate query embedding
-        query_embedding = self.embedding_model.encode(query).tolist()
-        
-        # Build filter
-        where_filter = {}
-        if severity:
-            where_filter["severity"] = severity
+        query_embedding = self._encode_query(query, fast=True)
         
         # Search
-        results = self.constraints_collection.query(
+        results = self.collection.query(
             query_embeddings=[query_embedding],
             n_results=n_results,
-            where=where_filter if where_filter else None
+            where=self._where("constraint", severity=severity, embedder=self._embedder(fast=True))
         )
         
         return self._format_results(results)
@@ -358,38 +724,50 @@ class ProjectMemory:
         Returns:
             Dictionary of key-value preferences
         """
-        results = self.preferences_collection.get()
-        
-        preferences = {}
-        if results and results.get("metadatas"):
-            for metadata in results["metadatas"]:
-                key = metadata.get("key")
-                value = metadata.get("value")
-                if key and value:
-                    preferences[key] = value
+        results = self.collection.get(
+            where=self._where("preference"), include=["metadatas"]
+        )
         
-        return preferences
+        metadatas = (results or {}).get("metadatas") or []
+        return {
+            m["key"]: m["value"]
+            for m in metadatas
+            if m.get("key") and m.get("value")
+        }
     
-    def get_all_constraints(self, severity: Optional[str] = None) -> List[str]:
+    def get_all_constraints(
+        self,
+        severity: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[str]:
         """Get all project constraints.
         
         Args:
             severity: Optional severity filter
+            limit: Stop after this many constraints (default: all)
             
         Returns:
             List of constraint strings
         """
-        where_filter = {"severity": severity} if severity else None
-        results = self.constraints_collection.get(where=where_filter)
-        
-        constraints = []
-        if results and results.get("metadatas"):
-            for metadata in results["metadatas"]:
-                constraint = metadata.get("constraint")
-                if constraint:
-                    constraints.append(constraint)
-        
-        return constraints
+        where_filter = self._where("constraint", severity=severity)
+        constraints: List[str] = []
+        offset = 0
+        
+        # Page through metadata only; documents and embeddings are never needed here
+        while limit is None or len(constraints) < limit:
+            page = self.collection.get(
+                where=where_filter,
+                limit=_PAGE_SIZE,
+                offset=offset,
+                include=["metadatas"]
+            )
+            metadatas = (page or {}).get("metadatas") or []
+            constraints.extend(m["constraint"] for m in metadatas if m.get("constraint"))
+            if len(metadatas) < _PAGE_SIZE:
+                break
+            offset += _PAGE_SIZE
+        
+        return constraints if limit is None else constraints[:limit]
     
     def _format_results(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Format ChromaDB results into clean dictionaries.
@@ -400,23 +778,32 @@ class ProjectMemory:
         Returns:
             List of formatted result dictionaries
         """
-        formatted = []
-        
         if not results or not results.get("ids"):
-            return formatted
+            return []
         
         ids = results["ids"][0]
-        documents = results.get("documents", [[]])[0]
-        metadatas = results.get("metadatas", [[]])[0]
-        distances = results.get("distances", [[]])[0]
+        n = len(ids)
+        documents = (results.get("documents") or [[]])[0] or []
+        metadatas = (results.get("metadatas") or [[]])[0] or []
+        raw_distances = ((results.get("distances") or [[]])[0] or [])[:n]
         
+        # Missing distances count as 1.0 (zero similarity), as before
+        distances = np.ones(n)
+        distances[:len(raw_distances)] = raw_distances
+        similarities = (1.0 - distances).tolist()
+        distances = distances.tolist()
+        
+        formatted = []
         for i, doc_id in enumerate(ids):
+            metadata = metadatas[i] if i < len(metadatas) else {}
+            if "ts_ns" in metadata:
+                metadata["timestamp"] = _iso(metadata["ts_ns"])
             formatted.append({
                 "id": doc_id,
                 "content": documents[i] if i < len(documents) else "",
-                "metadata": metadatas[i] if i < len(metadatas) else {},
-                "similarity": 1 - (distances[i] if i < len(distances) else 1.0),
-                "distance": distances[i] if i < len(distances) else 1.0
+                "metadata": metadata,
+                "similarity": similarities[i],
+                "distance": distances[i]
             })
         
         return formatted
@@ -443,31 +830,74 @@ class ProjectMemory:
             "suggestions": self.get_all_constraints(severity="should")
         }
     
+    async def get_context_for_generation_async(
+        self,
+        query: str,
+        max_results: int = 10
+    ) -> Dict[str, Any]:
+        """Async variant of get_context_for_generation running sub-queries concurrently.
+        
+        Args:
+            query: Generation context/description
+            max_results: Max results per category
+            
+        Returns:
+            Dictionary with relevant code, decisions, preferences, constraints
+        """
+        # Embed once up front so both searches hit the query cache
+        await asyncio.to_thread(self._encode_query, query)
+        
+        similar_code, past_decisions, preferences, constraints, suggestions = await asyncio.gather(
+            asyncio.to_thread(self.search_code, query, max_results),
+            asyncio.to_thread(self.search_decisions, query, max_results),
+            asyncio.to_thread(self.get_all_preferences),
+            asyncio.to_thread(self.get_all_constraints, "must"),
+            asyncio.to_thread(self.get_all_constraints, "should"),
+        )
+        
+        return {
+            "similar_code": similar_code,
+            "past_decisions": past_decisions,
+            "preferences": preferences,
+            "constraints": constraints,
+            "suggestions": suggestions
+        }
+    
     def clear_memory(self, memory_type: Optional[str] = None):
         """Clear project memory.
         
         Args:
             memory_type: Specific type to clear, or None for all
         """
-        if memory_type is None or memory_type == "code":
-            self.code_collection.delete(where={})
+        if memory_type is None:
+            # Dropping the collection beats tombstoning every HNSW entry
+            self.client.delete_collection(self.collection.name)
+            self._bind_collection(self._get_or_create_collection())
+            self._clear_kv_store()
+            logger.info(f"Cleared all memory for project {self.project_id}")
+            return
+        
+        if memory_type == "code":
+            self.collection.delete(where=self._where("code"))
             logger.info(f"Cleared code memory for project {self.project_id}")
         
-        if memory_type is None or memory_type == "decisions":
-            self.decisions_collection.delete(where={})
+        if memory_type == "decisions":
+            self.collection.delete(where=self._where("decision"))
             logger.info(f"Cleared decisions memory for project {self.project_id}")
         
-        if memory_type is None or memory_type == "preferences":
-            self.preferences_collection.delete(where={})
+        if memory_type == "preferences":
+            self.collection.delete(where=self._where("preference"))
+            self._clear_kv_store()
             logger.info(f"Cleared preferences memory for project {self.project_id}")
         
-        if memory_type is None or memory_type == "constraints":
-            self.constraints_collection.delete(where={})
+        if memory_type == "constraints":
+            self.collection.delete(where=self._where("constraint"))
             logger.info(f"Cleared constraints memory for project {self.project_id}")
 
 
 # Memory service singleton registry
 _project_memories: Dict[int, ProjectMemory] = {}
+_memories_lock = threading.Lock()
 
 
 def get_project_memory(project_id: int) -> ProjectMemory:
@@ -479,10 +909,15 @@ def get_project_memory(project_id: int) -> ProjectMemory:
     Returns:
         ProjectMemory instance
     """
-    if project_id not in _project_memories:
-        _project_memories[project_id] = ProjectMemory(project_id)
-        logger.info(f"✅ Created memory for project {project_id}")
-    return _project_memories[project_id]
+    memory = _project_memories.get(project_id)
+    if memory is None:
+        with _memories_lock:
+            memory = _project_memories.get(project_id)
+            if memory is None:
+                memory = ProjectMemory(project_id)
+                _project_memories[project_id] = memory
+                logger.info(f"✅ Created memory for project {project_id}")
+    return memory
 
 
 def clear_project_memory(project_id: int):
@@ -491,7 +926,8 @@ def clear_project_memory(project_id: int):
     Args:
         project_id: Project ID
     """
-    if project_id in _project_memories:
-        _project_memories[project_id].clear_memory()
-        del _project_memories[project_id]
+    with _memories_lock:
+        memory = _project_memories.pop(project_id, None)
+    if memory is not None:
+        memory.clear_memory()
         logger.info(f"✅ Cleared memory for project {project_id}")
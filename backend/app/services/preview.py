@@ -1,16 +1,29 @@
 """Preview sandbox service for ephemeral Docker environments."""
 import asyncio
+import functools
+import hashlib
+import heapq
+import io
 import json
 import logging
+import os
 import secrets
+import shutil
+import socket
+import tarfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 import docker
+import orjson
 from docker.errors import DockerException, NotFound
+from docker.types import Mount
 
 from ..core.config import settings
 from ..core.logging import logger
@@ -22,9 +35,102 @@ _docker_client: Optional[docker.DockerClient] = None
 # Preview container registry
 _preview_registry: Dict[int, "PreviewEnvironment"] = {}
 
+# Static previews can be restored from a CRIU checkpoint of a warm nginx
+# container (PREVIEW_CHECKPOINTS, needs an experimental daemon with CRIU).
+# nginx reads the site from disk per request, so a restored process serves
+# whatever is bind-mounted here; app servers would keep serving the warm
+# placeholder app, so only the static stack is checkpointed.
+_STATIC_ROOT = "/usr/share/nginx/html"
+_WARM_CHECKPOINT = "warm-static"
+
+# Preview images are tagged by a digest of their build context, so previews
+# of identical files share one image
+PREVIEW_IMAGE_REPO = "istudiox-preview"
+
+# Preview lifetime limits, in seconds
+PREVIEW_TTL = 3600
+PREVIEW_IDLE_TTL = 1800
+
+# Unregistered preview containers are only swept once this old, so ones that
+# are still being created or restored (here or by another worker) are left
+_STRANDED_GRACE = 600
+
+# Host ports handed out to preview containers
+PREVIEW_PORT_RANGE = range(8100, 8200)
+
 # Cleanup task
 _cleanup_task: Optional[asyncio.Task] = None
 
+# Unbuffered output so container logs show up as they're written; skip
+# pip/npm network chatter that only slows installs down
+_PYTHON_ENV = "ENV PYTHONUNBUFFERED=1 PIP_DISABLE_PIP_VERSION_CHECK=1"
+_NODE_ENV = "ENV npm_config_fund=false npm_config_audit=false npm_config_update_notifier=false"
+
+# Base images holding each stack's heavy dependency layers. Built once per
+# Docker host so per-preview builds only add the project files on top.
+BASE_IMAGE_REPO = "istudiox-preview-base"
+
+_NGINX_CONF = """server {
+    listen 80;
+    root /usr/share/nginx/html;
+    index index.html;
+    location / {
+        try_files $uri $uri/ /index.html;
+    }
+}
+"""
+
+BASE_IMAGES: Dict[str, Dict[str, str]] = {
+    "python": {
+        "Dockerfile": f"""FROM python:3.12-slim
+{_PYTHON_ENV}
+WORKDIR /app
+COPY requirements.txt .
+RUN pip install --no-cache-dir -r requirements.txt
+""",
+        "requirements.txt": """fastapi
+uvicorn[standard]
+pydantic
+sqlalchemy
+python-multipart
+requests
+""",
+    },
+    "nodejs": {
+        "Dockerfile": f"""FROM node:18-slim
+{_NODE_ENV}
+WORKDIR /app
+COPY package.json .
+RUN npm install
+""",
+        "package.json": json.dumps({
+            "name": "istudiox-preview-base",
+            "private": True,
+            "dependencies": {"express": "^4.18.2", "cors": "^2.8.5"},
+        }, indent=2),
+    },
+    "react": {
+        "Dockerfile": f"""FROM node:18-slim
+{_NODE_ENV}
+WORKDIR /app
+COPY package.json .
+RUN npm install
+""",
+        "package.json": json.dumps({
+            "name": "istudiox-preview-base",
+            "private": True,
+            "dependencies": {"react": "^18.2.0", "react-dom": "^18.2.0"},
+            "devDependencies": {"vite": "^5.0.0", "@vitejs/plugin-react": "^4.2.0"},
+        }, indent=2),
+    },
+    "static": {
+        "Dockerfile": """FROM nginx:alpine
+COPY nginx.conf /etc/nginx/conf.d/default.conf
+""",
+        "nginx.conf": _NGINX_CONF,
+    },
+}
+
 
 def get_docker_client() -> docker.DockerClient:
     """Get or create Docker client."""
@@ -39,6 +145,179 @@ def get_docker_client() -> docker.DockerClient:
     return _docker_client
 
 
+def get_docker_api_client() -> docker.APIClient:
+    """Get the low-level API client (streaming builds) bound to the same daemon."""
+    return get_docker_client().api
+
+
+@dataclass(frozen=True)
+class StackSpec:
+    """How previews of one project type are built and run."""
+    name: str  # Also the base image tag
+    label: str
+    upstream_image: str  # FROM image when the base image isn't available
+    # Formatted with {base}, {setup} (fallback_setup when building on the
+    # upstream image) and {install} (the npm install step)
+    dockerfile_template: str
+    internal_port: int
+    mem_limit: str = "512m"
+    cpu_quota: int = 50000  # Out of cpu_period=100000, i.e. 50% of 1 CPU
+    fallback_files: Dict[str, str] = field(default_factory=dict)
+    fallback_setup: str = ""
+    replace_dockerfile: bool = False  # Ignore a Dockerfile shipped by the project
+    checkpointable: bool = False  # Can start from the warm CRIU checkpoint
+    # Hot-reload stacks bind-mount the project at /app instead of COPYing it
+    # ({source} in the template), so edits reach the running dev server
+    # without a rebuild. Only these files go into the image build.
+    hot_reload: bool = False
+    manifest_files: Tuple[str, ...] = ()
+    # Image paths shadowed by the /app mount; kept via anonymous volumes
+    # seeded from the image
+    preserved_paths: Tuple[str, ...] = ()
+
+
+STACK_SPECS: Dict[str, StackSpec] = {
+    # Common packages are preinstalled in the base image, so the pip
+    # install only fetches what the project adds on top
+    "python": StackSpec(
+        name="python",
+        label="Python",
+        upstream_image="python:3.12-slim",
+        dockerfile_template=f"""FROM {{base}}
+{_PYTHON_ENV}
+WORKDIR /app
+COPY requirements.txt .
+RUN pip install --no-cache-dir -r requirements.txt
+{{source}}
+EXPOSE 8000
+CMD ["uvicorn", "main:app", "--host", "0.0.0.0", "--port", "8000", "--reload"]
+""",
+        internal_port=8000,
+        hot_reload=True,
+        manifest_files=("requirements.txt",),
+    ),
+    "nodejs": StackSpec(
+        name="nodejs",
+        label="Node.js",
+        upstream_image="node:18-slim",
+        dockerfile_template=f"""FROM {{base}}
+{_NODE_ENV}
+WORKDIR /app
+COPY package*.json ./
+{{install}}
+COPY . .
+EXPOSE 3000
+CMD ["npm", "start"]
+""",
+        internal_port=3000,
+    ),
+    "react": StackSpec(
+        name="react",
+        label="React",
+        upstream_image="node:18-slim",
+        dockerfile_template=f"""FROM {{base}}
+{_NODE_ENV}
+WORKDIR /app
+COPY package*.json ./
+{{install}}
+{{source}}
+EXPOSE 5173
+CMD ["npm", "run", "dev", "--", "--host", "0.0.0.0"]
+""",
+        internal_port=5173,
+        hot_reload=True,
+        manifest_files=("package.json", "package-lock.json"),
+        preserved_paths=("/app/node_modules",),
+    ),
+    # The static base image already carries the nginx config
+    "static": StackSpec(
+        name="static",
+        label="static site",
+        upstream_image="nginx:alpine",
+        dockerfile_template=f"""FROM {{base}}
+{{setup}}
+COPY . {_STATIC_ROOT}
+EXPOSE 80
+""",
+        internal_port=80,
+        mem_limit="256m",
+        cpu_quota=25000,
+        fallback_files={"nginx.conf": _NGINX_CONF},
+        fallback_setup="COPY nginx.conf /etc/nginx/conf.d/default.conf",
+        replace_dockerfile=True,
+        checkpointable=True,
+    ),
+}
+
+
+def _tar_context(files: Dict[str, str]) -> io.BytesIO:
+    """Pack files into an in-memory tar for use as a Docker build context."""
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w") as tf:
+        for path, content in files.items():
+            data = content.encode("utf-8") if isinstance(content, str) else content
+            info = tarfile.TarInfo(name=path)
+            info.size = len(data)
+            info.mode = 0o644
+            tf.addfile(info, io.BytesIO(data))
+    buf.seek(0)
+    return buf
+
+
+@functools.lru_cache(maxsize=256)
+def _package_uses_react(package_json: str) -> bool:
+    """Check whether a package.json lists react as a dependency."""
+    # Most Node projects never mention react; skip the parse for them
+    if '"react"' not in package_json:
+        return False
+    try:
+        pkg_json = orjson.loads(package_json or "{}")
+    except orjson.JSONDecodeError:
+        return False
+    return "react" in pkg_json.get("dependencies", {})
+
+
+@functools.lru_cache(maxsize=None)
+def _base_node_packages(stack: str) -> frozenset:
+    """Names of the packages preinstalled in a Node base image."""
+    pkg = json.loads(BASE_IMAGES[stack]["package.json"])
+    return frozenset(pkg.get("dependencies", {})) | frozenset(pkg.get("devDependencies", {}))
+
+
+def _preview_dir(preview_id: str) -> Path:
+    """On-disk copy of a preview's files (only used for bind-mounted previews)."""
+    return Path(settings.WORK_DIR).resolve() / "previews" / preview_id
+
+
+def _sync_files(root: Path, old: Dict[str, str], new: Dict[str, str]) -> int:
+    """Bring root from the old file set to the new one; returns files touched."""
+    changed = {path: content for path, content in new.items() if old.get(path) != content}
+    _write_files(root, changed)
+    removed = old.keys() - new.keys()
+    for path in removed:
+        try:
+            os.remove(os.path.join(root, path))
+        except FileNotFoundError:
+            pass
+    return len(changed) + len(removed)
+
+
+def _write_files(root: Path, files: Dict[str, str]):
+    """Write files under root with raw fds, creating each directory once."""
+    for directory in sorted({os.path.dirname(os.path.join(root, p)) for p in files}):
+        os.makedirs(directory, exist_ok=True)
+    
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    for filepath, content in files.items():
+        data = memoryview(content.encode("utf-8"))
+        fd = os.open(os.path.join(root, filepath), flags, 0o644)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+
+
 @dataclass
 class PreviewEnvironment:
     """Represents a preview environment."""
@@ -51,23 +330,48 @@ class PreviewEnvironment:
     port: Optional[int] = None
     url: Optional[str] = None
     created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
-    last_accessed: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
     error_message: Optional[str] = None
-    logs: List[str] = field(default_factory=list)
+    image_tag: Optional[str] = None
+    project_type: Optional[str] = None
+    hot_reload: bool = False  # Project files are bind-mounted from _preview_dir
+    files: Dict[str, str] = field(default_factory=dict, repr=False)
+    # Bounded so a chatty build or long-lived preview can't grow it forever
+    logs: "deque[str]" = field(default_factory=lambda: deque(maxlen=settings.PREVIEW_LOG_MAX))
+    # Monotonic clock readings; cheaper than datetime.now() on hot paths
+    created_mono: float = field(default_factory=time.monotonic, init=False, repr=False)
+    accessed_mono: float = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        self.accessed_mono = self.created_mono
+    
+    @property
+    def last_accessed(self) -> datetime:
+        """Wall-clock time of the last access."""
+        return self.created_at + timedelta(seconds=self.accessed_mono - self.created_mono)
+    
+    @property
+    def expires_at(self) -> float:
+        """Monotonic time at which the preview expires."""
+        return self.created_mono + PREVIEW_TTL
+    
+    @property
+    def idle_deadline(self) -> float:
+        """Monotonic time at which the preview counts as idle."""
+        return self.accessed_mono + PREVIEW_IDLE_TTL
     
     @property
     def is_expired(self) -> bool:
         """Check if preview has expired (1 hour)."""
-        return datetime.now(timezone.utc) - self.created_at > timedelta(hours=1)
+        return time.monotonic() > self.expires_at
     
     @property
     def is_idle(self) -> bool:
         """Check if preview has been idle (30 minutes)."""
-        return datetime.now(timezone.utc) - self.last_accessed > timedelta(minutes=30)
+        return time.monotonic() > self.idle_deadline
     
     def touch(self):
         """Update last accessed time."""
-        self.last_accessed = datetime.now(timezone.utc)
+        self.accessed_mono = time.monotonic()
     
     def add_log(self, message: str):
         """Add log message."""
@@ -82,8 +386,39 @@ class PreviewService:
     def __init__(self):
         self.client = get_docker_client()
         self.network_name = "istudiox-preview-network"
+        # docker-py is blocking; run its calls here so the event loop keeps
+        # serving other previews, health polls and cleanup
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.PREVIEW_PARALLELISM,
+            thread_name_prefix="preview"
+        )
+        # Stacks whose base image is ready. Images are looked up (and built
+        # if missing) on a stack's first preview, on the executor, since a
+        # build runs pip/npm installs for minutes
+        self._base_images: Set[str] = set()
+        self._base_images_checked: Set[str] = set()
+        self._base_image_locks = {stack: threading.Lock() for stack in BASE_IMAGES}
+        self._checkpoint_lock = threading.Lock()
+        self._checkpoint_checked = False
+        # Ports are popped on create and returned on stop, so concurrent
+        # creates can't race for the same one
+        self._free_ports: Set[int] = self._probe_free_ports()
+        self._port_lock = asyncio.Lock()
+        self._warm_checkpoint_dir: Optional[str] = None
+        # (deadline, project_id, preview_id) min-heaps so cleanup only looks
+        # at previews that are due. Idle entries are re-pushed lazily when a
+        # preview turns out to have been touched since.
+        self._expiry_heap: List[Tuple[float, int, str]] = []
+        self._idle_heap: List[Tuple[float, int, str]] = []
         self._ensure_network()
     
+    async def _run_blocking(self, fn, *args, **kwargs):
+        """Run a blocking call on the preview executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+    
     def _ensure_network(self):
         """Ensure preview network exists."""
         try:
@@ -97,6 +432,199 @@ class PreviewService:
             )
             logger.info(f"✅ Created network: {self.network_name}")
     
+    def _ensure_base_image(self, stack: str):
+        """Build the stack's base image if it is missing (blocking; run on the executor).
+        
+        Each stack is checked once per process. A stack whose base image
+        can't be built falls back to installing everything in the
+        per-preview build.
+        """
+        lock = self._base_image_locks.get(stack)
+        if lock is None:
+            return
+        with lock:
+            if stack in self._base_images_checked:
+                return
+            self._base_images_checked.add(stack)
+            
+            tag = f"{BASE_IMAGE_REPO}:{stack}"
+            try:
+                self.client.images.get(tag)
+            except NotFound:
+                stack_dir = Path(settings.WORK_DIR) / "base" / stack
+                stack_dir.mkdir(parents=True, exist_ok=True)
+                for filename, content in BASE_IMAGES[stack].items():
+                    (stack_dir / filename).write_text(content)
+                try:
+                    logger.info(f"Building base image {tag}...")
+                    self.client.images.build(
+                        path=str(stack_dir),
+                        tag=tag,
+                        pull=False,
+                        rm=True
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to build base image {tag}: {e}")
+                    return
+            except DockerException as e:
+                logger.warning(f"Failed to look up base image {tag}: {e}")
+                return
+            self._base_images.add(stack)
+            logger.info(f"✅ Preview base image ready: {tag}")
+    
+    def _ensure_warm_checkpoint(self):
+        """Checkpoint a warm nginx container that static previews restore from.
+        
+        Runs once per process, on the executor.
+        """
+        with self._checkpoint_lock:
+            if not self._checkpoint_checked:
+                self._checkpoint_checked = True
+                self._create_warm_checkpoint()
+    
+    def _create_warm_checkpoint(self):
+        """Start, checkpoint and remove a warm static container."""
+        try:
+            if not self.client.info().get("ExperimentalBuild"):
+                logger.info("Docker experimental mode is off; preview checkpoints disabled")
+                return
+        except DockerException as e:
+            logger.warning(f"Failed to query Docker for checkpoint support: {e}")
+            return
+        if "static" not in self._base_images:
+            return
+        
+        base_dir = Path(settings.WORK_DIR).resolve() / "base"
+        checkpoint_dir = base_dir / "checkpoints"
+        empty_root = base_dir / "static-root"
+        empty_root.mkdir(parents=True, exist_ok=True)
+        shutil.rmtree(checkpoint_dir / _WARM_CHECKPOINT, ignore_errors=True)
+        
+        api = get_docker_api_client()
+        container = None
+        try:
+            # Same mount target and network as the previews it will be restored into
+            container = self.client.containers.run(
+                f"{BASE_IMAGE_REPO}:static",
+                name=f"istudiox-warm-static-{secrets.token_hex(4)}",
+                detach=True,
+                network=self.network_name,
+                volumes={str(empty_root): {"bind": _STATIC_ROOT, "mode": "ro"}},
+                labels={"istudiox": "warm"}
+            )
+            time.sleep(1)  # Let nginx bind before freezing it
+            # docker-py has no checkpoint API; call the endpoint directly
+            res = api._post_json(
+                api._url("/containers/{0}/checkpoints", container.id),
+                data={
+                    "CheckpointID": _WARM_CHECKPOINT,
+                    "CheckpointDir": str(checkpoint_dir),
+                    "Exit": True
+                }
+            )
+            api._raise_for_status(res)
+            self._warm_checkpoint_dir = str(checkpoint_dir)
+            logger.info("✅ Warm static preview checkpoint created")
+        except Exception as e:
+            logger.warning(f"Failed to checkpoint warm preview container: {e}")
+        finally:
+            if container is not None:
+                try:
+                    container.remove(force=True)
+                except DockerException:
+                    pass
+    
+    async def _restore_static_preview(
+        self,
+        preview: PreviewEnvironment,
+        context: Dict[str, str]
+    ) -> bool:
+        """Start a static preview from the warm checkpoint.
+        
+        Returns:
+            False if no checkpoint is available or the restore failed
+        """
+        if self._warm_checkpoint_dir is None:
+            return False
+        
+        api = get_docker_api_client()
+        site_dir = _preview_dir(preview.preview_id)
+        port = None
+        container_id = None
+        try:
+            await self._run_blocking(_write_files, site_dir, context)
+            port = await self._acquire_port()
+            container = await self._run_blocking(
+                api.create_container,
+                f"{BASE_IMAGE_REPO}:static",
+                name=preview.container_name,
+                ports=[80],
+                labels={
+                    "istudiox": "preview",
+                    "project_id": str(preview.project_id),
+                    "preview_id": preview.preview_id
+                },
+                host_config=api.create_host_config(
+                    port_bindings={80: port},
+                    binds={str(site_dir): {"bind": _STATIC_ROOT, "mode": "ro"}},
+                    network_mode=self.network_name,
+                    mem_limit="256m",
+                    cpu_period=100000,
+                    cpu_quota=25000
+                )
+            )
+            container_id = container["Id"]
+            res = await self._run_blocking(
+                api._post,
+                api._url("/containers/{0}/start", container_id),
+                params={
+                    "checkpoint": _WARM_CHECKPOINT,
+                    "checkpoint-dir": self._warm_checkpoint_dir
+                }
+            )
+            api._raise_for_status(res)
+        except Exception as e:
+            preview.add_log(f"Checkpoint restore failed, building instead: {e}")
+            if container_id is not None:
+                try:
+                    await self._run_blocking(api.remove_container, container_id, force=True)
+                except DockerException:
+                    pass
+            await self._release_port(port)
+            await self._run_blocking(shutil.rmtree, site_dir, ignore_errors=True)
+            return False
+        
+        preview.port = port
+        preview.container_id = container_id
+        preview.url = f"http://localhost:{port}"
+        preview.add_log(f"Restored warm container: {container_id[:12]}")
+        
+        await self._wait_for_container(preview)
+        return True
+    
+    def _npm_install_step(self, stack: str, package_json: str) -> str:
+        """Return the Dockerfile install step for a Node project.
+        
+        Every container built on a base image shares its node_modules layer,
+        so the install is skipped when the project only uses packages the
+        base image already has.
+        """
+        if stack in self._base_images:
+            try:
+                pkg = orjson.loads(package_json or "{}")
+                wanted = set(pkg.get("dependencies", {})) | set(pkg.get("devDependencies", {}))
+            except (ValueError, AttributeError):
+                wanted = None
+            if wanted is not None and wanted <= _base_node_packages(stack):
+                return "# node_modules come from the base image"
+        return "RUN npm install"
+    
+    def _base_image(self, stack: str, fallback: str) -> str:
+        """Return the stack's base image, or the upstream image if it isn't built."""
+        if stack in self._base_images:
+            return f"{BASE_IMAGE_REPO}:{stack}"
+        return fallback
+    
     async def create_preview(
         self,
         project_id: int,
@@ -111,6 +639,10 @@ class PreviewService:
         Returns:
             PreviewEnvironment instance
         """
+        # Replacing a preview must not strand its container and port
+        if project_id in _preview_registry:
+            await self.stop_preview(project_id)
+        
         preview_id = secrets.token_urlsafe(8)
         container_name = f"istudiox-preview-{preview_id}"
         
@@ -121,6 +653,8 @@ class PreviewService:
         )
         
         _preview_registry[project_id] = preview
+        heapq.heappush(self._expiry_heap, (preview.expires_at, project_id, preview_id))
+        heapq.heappush(self._idle_heap, (preview.idle_deadline, project_id, preview_id))
         preview.add_log("Creating preview environment...")
         
         try:
@@ -134,29 +668,16 @@ class PreviewService:
             
             # Detect project type
             project_type = self._detect_project_type(files)
+            preview.project_type = project_type
             preview.add_log(f"Detected project type: {project_type}")
             
-            # Create temporary directory for project files
-            temp_dir = Path(settings.WORK_DIR) / "previews" / preview_id
-            temp_dir.mkdir(parents=True, exist_ok=True)
-            preview.add_log(f"Created temp directory: {temp_dir}")
-            
-            # Write files to temp directory
-            for filepath, content in files.items():
-                full_path = temp_dir / filepath
-                full_path.parent.mkdir(parents=True, exist_ok=True)
-                full_path.write_text(content)
-            preview.add_log(f"Wrote {len(files)} files to temp directory")
+            # Build context is tarred in memory, so nothing touches disk;
+            # the stack builders add their generated Dockerfile to it
+            context = dict(files)
             
             # Build and start container based on project type
-            if project_type == "python":
-                await self._create_python_preview(preview, temp_dir)
-            elif project_type == "nodejs":
-                await self._create_nodejs_preview(preview, temp_dir)
-            elif project_type == "react":
-                await self._create_react_preview(preview, temp_dir)
-            else:
-                await self._create_static_preview(preview, temp_dir)
+            spec = STACK_SPECS.get(project_type, STACK_SPECS["static"])
+            await self._create_preview_impl(preview, context, spec)
             
             preview.status = "running"
             preview.add_log(f"✅ Preview running at {preview.url}")
@@ -166,6 +687,17 @@ class PreviewService:
             preview.error_message = str(e)
             preview.add_log(f"❌ Error: {e}")
             logger.error(f"Failed to create preview {preview_id}: {e}", exc_info=True)
+            # A half-started container would keep holding the port
+            if preview.container_id:
+                try:
+                    container = await self._run_blocking(
+                        self.client.containers.get, preview.container_id
+                    )
+                    await self._run_blocking(container.remove, v=True, force=True)
+                except Exception as remove_error:
+                    logger.warning(f"Failed to remove preview container: {remove_error}")
+            await self._release_port(preview.port)
+            preview.port = None
         
         return preview
     
@@ -174,130 +706,92 @@ class PreviewService:
         if "requirements.txt" in files or "pyproject.toml" in files:
             return "python"
         if "package.json" in files:
-            pkg_json = json.loads(files.get("package.json", "{}"))
-            if "react" in pkg_json.get("dependencies", {}):
+            if _package_uses_react(files["package.json"]):
                 return "react"
             return "nodejs"
         if "index.html" in files:
             return "static"
         return "unknown"
     
-    async def _create_python_preview(
+    async def _create_preview_impl(
         self,
         preview: PreviewEnvironment,
-        temp_dir: Path
+        context: Dict[str, str],
+        spec: "StackSpec"
     ):
-        """Create Python/FastAPI preview."""
-        preview.add_log("Building Python container...")
-        
-        # Create Dockerfile if not exists
-        dockerfile_path = temp_dir / "Dockerfile"
-        if not dockerfile_path.exists():
-            dockerfile_content = """FROM python:3.12-slim
-WORKDIR /app
-COPY requirements.txt .
-RUN pip install --no-cache-dir -r requirements.txt
-COPY . .
-EXPOSE 8000
-CMD ["uvicorn", "main:app", "--host", "0.0.0.0", "--port", "8000", "--reload"]
-"""
-            dockerfile_path.write_text(dockerfile_content)
-            preview.add_log("Created Dockerfile")
-        
-        # Build image
-        image_tag = f"istudiox-preview-{preview.preview_id}"
-        try:
-            image, logs = self.client.images.build(
-                path=str(temp_dir),
-                tag=image_tag,
-                rm=True,
-                forcerm=True
-            )
-            for log in logs:
-                if "stream" in log:
-                    preview.add_log(log["stream"].strip())
-        except Exception as e:
-            raise RuntimeError(f"Failed to build image: {e}")
-        
-        # Find available port
-        port = self._find_available_port()
-        preview.port = port
-        
-        # Start container
-        container = self.client.containers.run(
-            image_tag,
-            name=preview.container_name,
-            detach=True,
-            ports={"8000/tcp": port},
-            network=self.network_name,
-            labels={
-                "istudiox": "preview",
-                "project_id": str(preview.project_id),
-                "preview_id": preview.preview_id
-            },
-            mem_limit="512m",
-            cpu_period=100000,
-            cpu_quota=50000,  # 50% of 1 CPU
-            remove=False
-        )
+        """Build (or reuse) the stack's image and start the preview container."""
+        await self._run_blocking(self._ensure_base_image, spec.name)
+        if spec.checkpointable and settings.PREVIEW_CHECKPOINTS:
+            await self._run_blocking(self._ensure_warm_checkpoint)
+        if spec.checkpointable and await self._restore_static_preview(preview, context):
+            return
         
-        preview.container_id = container.id
-        preview.url = f"http://localhost:{port}"
-        preview.add_log(f"Container started: {container.short_id}")
+        preview.add_log(f"Building {spec.label} container...")
         
-        # Wait for container to be healthy
-        await self._wait_for_container(preview)
-    
-    async def _create_nodejs_preview(
-        self,
-        preview: PreviewEnvironment,
-        temp_dir: Path
-    ):
-        """Create Node.js preview."""
-        preview.add_log("Building Node.js container...")
+        generate_dockerfile = spec.replace_dockerfile or "Dockerfile" not in context
+        # A project Dockerfile may not expect its sources at a mount point
+        hot_reload = spec.hot_reload and generate_dockerfile
+        volumes = {}
+        mounts = []
+        if hot_reload:
+            site_dir = _preview_dir(preview.preview_id)
+            await self._run_blocking(_write_files, site_dir, context)
+            volumes[str(site_dir)] = {"bind": "/app", "mode": "rw"}
+            mounts = [Mount(path, None, type="volume") for path in spec.preserved_paths]
+            preview.hot_reload = True
+            preview.files = dict(context)
+            preview.add_log("Mounted project files for hot reload")
         
-        # Create Dockerfile if not exists
-        dockerfile_path = temp_dir / "Dockerfile"
-        if not dockerfile_path.exists():
-            dockerfile_content = """FROM node:18-slim
-WORKDIR /app
-COPY package*.json ./
-RUN npm install
-COPY . .
-EXPOSE 3000
-CMD ["npm", "start"]
-"""
-            dockerfile_path.write_text(dockerfile_content)
+        # Create Dockerfile unless the project ships its own
+        if generate_dockerfile:
+            if spec.name in self._base_images:
+                base, setup = f"{BASE_IMAGE_REPO}:{spec.name}", ""
+            else:
+                base, setup = spec.upstream_image, spec.fallback_setup
+                context.update(spec.fallback_files)
+            install = ""
+            if "{install}" in spec.dockerfile_template:
+                install = self._npm_install_step(spec.name, context.get("package.json", ""))
+            context["Dockerfile"] = spec.dockerfile_template.format(
+                base=base,
+                setup=setup,
+                install=install,
+                source="" if hot_reload else "COPY . ."
+            )
             preview.add_log("Created Dockerfile")
         
-        # Build image
-        image_tag = f"istudiox-preview-{preview.preview_id}"
-        image, logs = self.client.images.build(
-            path=str(temp_dir),
-            tag=image_tag,
-            rm=True,
-            forcerm=True
-        )
+        # Build image; with the sources mounted only the manifests matter, so
+        # code edits keep hitting the same content-addressed image
+        if hot_reload:
+            context = {
+                name: context[name]
+                for name in ("Dockerfile", *spec.manifest_files)
+                if name in context
+            }
+        image_tag = await self._get_or_build_image(preview, context)
         
         # Find available port
-        port = self._find_available_port()
+        port = await self._acquire_port()
         preview.port = port
         
         # Start container
-        container = self.client.containers.run(
+        container = await self._run_blocking(
+            self.client.containers.run,
             image_tag,
             name=preview.container_name,
             detach=True,
-            ports={"3000/tcp": port},
+            ports={f"{spec.internal_port}/tcp": port},
             network=self.network_name,
             labels={
                 "istudiox": "preview",
                 "project_id": str(preview.project_id),
                 "preview_id": preview.preview_id
             },
-            mem_limit="512m",
+            mem_limit=spec.mem_limit,
             cpu_period=100000,
-            cpu_quota=50000,
+            cpu_quota=spec.cpu_quota,
+            volumes=volumes,
+            mounts=mounts,
             remove=False
         )
         
@@ -305,170 +799,179 @@ CMD ["npm", "start"]
         preview.url = f"http://localhost:{port}"
         preview.add_log(f"Container started: {container.short_id}")
         
+        # Wait for container to be healthy
         await self._wait_for_container(preview)
     
-    async def _create_react_preview(
+    async def _get_or_build_image(
         self,
         preview: PreviewEnvironment,
-        temp_dir: Path
-    ):
-        """Create React preview with Vite."""
-        preview.add_log("Building React container...")
+        context: Dict[str, str]
+    ) -> str:
+        """Return an image for the build context, building it only if missing."""
+        digest = hashlib.sha256()
+        for path in sorted(context):
+            digest.update(path.encode("utf-8") + b"\0")
+            digest.update(context[path].encode("utf-8") + b"\0")
+        image_tag = f"{PREVIEW_IMAGE_REPO}:{digest.hexdigest()[:16]}"
         
-        # Create Dockerfile for Vite
-        dockerfile_path = temp_dir / "Dockerfile"
-        if not dockerfile_path.exists():
-            dockerfile_content = """FROM node:18-slim
-WORKDIR /app
-COPY package*.json ./
-RUN npm install
-COPY . .
-EXPOSE 5173
-CMD ["npm", "run", "dev", "--", "--host", "0.0.0.0"]
-"""
-            dockerfile_path.write_text(dockerfile_content)
-            preview.add_log("Created Dockerfile for Vite")
-        
-        # Build and start container
-        image_tag = f"istudiox-preview-{preview.preview_id}"
-        image, logs = self.client.images.build(
-            path=str(temp_dir),
-            tag=image_tag,
-            rm=True,
-            forcerm=True
-        )
-        
-        port = self._find_available_port()
-        preview.port = port
-        
-        container = self.client.containers.run(
-            image_tag,
-            name=preview.container_name,
-            detach=True,
-            ports={"5173/tcp": port},
-            network=self.network_name,
-            labels={
-                "istudiox": "preview",
-                "project_id": str(preview.project_id),
-                "preview_id": preview.preview_id
-            },
-            mem_limit="512m",
-            cpu_period=100000,
-            cpu_quota=50000,
-            remove=False
-        )
-        
-        preview.container_id = container.id
-        preview.url = f"http://localhost:{port}"
-        preview.add_log(f"Container started: {container.short_id}")
+        try:
+            await self._run_blocking(self.client.images.get, image_tag)
+            preview.add_log(f"Reusing image {image_tag}")
+        except NotFound:
+            await self._build_image(
+                preview, context, tag=image_tag, labels={"istudiox": "preview"}
+            )
         
-        await self._wait_for_container(preview)
+        preview.image_tag = image_tag
+        return image_tag
     
-    async def _create_static_preview(
+    async def _build_image(
         self,
         preview: PreviewEnvironment,
-        temp_dir: Path
+        context: Dict[str, str],
+        **build_kwargs
     ):
-        """Create static HTML preview with nginx."""
-        preview.add_log("Building static site container...")
-        
-        # Create nginx config
-        nginx_conf = """server {
-    listen 80;
-    root /usr/share/nginx/html;
-    index index.html;
-    location / {
-        try_files $uri $uri/ /index.html;
-    }
-}
-"""
-        (temp_dir / "nginx.conf").write_text(nginx_conf)
+        """Build an image, logging build output to the preview as it streams in.
         
-        # Create Dockerfile
-        dockerfile_content = """FROM nginx:alpine
-COPY nginx.conf /etc/nginx/conf.d/default.conf
-COPY . /usr/share/nginx/html
-EXPOSE 80
-"""
-        (temp_dir / "Dockerfile").write_text(dockerfile_content)
-        preview.add_log("Created nginx Dockerfile")
-        
-        # Build and start
-        image_tag = f"istudiox-preview-{preview.preview_id}"
-        image, logs = self.client.images.build(
-            path=str(temp_dir),
-            tag=image_tag,
-            rm=True,
-            forcerm=True
-        )
-        
-        port = self._find_available_port()
-        preview.port = port
+        The context files are sent as an in-memory tar. The blocking docker
+        stream is drained on an executor thread and handed to the event loop
+        chunk by chunk.
+        """
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        done = object()
         
-        container = self.client.containers.run(
-            image_tag,
-            name=preview.container_name,
-            detach=True,
-            ports={"80/tcp": port},
-            network=self.network_name,
-            labels={
-                "istudiox": "preview",
-                "project_id": str(preview.project_id),
-                "preview_id": preview.preview_id
-            },
-            mem_limit="256m",
-            cpu_period=100000,
-            cpu_quota=25000,  # 25% of 1 CPU
-            remove=False
-        )
+        def pump():
+            try:
+                stream = get_docker_api_client().build(
+                    fileobj=_tar_context(context),
+                    custom_context=True,
+                    rm=True,
+                    forcerm=True,
+                    decode=True,
+                    **build_kwargs
+                )
+                for chunk in stream:
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, done)
         
-        preview.container_id = container.id
-        preview.url = f"http://localhost:{port}"
-        preview.add_log(f"Container started: {container.short_id}")
+        producer = loop.run_in_executor(self._executor, pump)
+        error = None
+        while True:
+            chunk = await chunks.get()
+            if chunk is done:
+                break
+            if isinstance(chunk, Exception):
+                error = str(chunk)
+            elif "stream" in chunk:
+                line = chunk["stream"].rstrip()
+                if line:
+                    preview.add_log(line)
+            elif "error" in chunk:
+                error = chunk["error"].strip()
+        await producer
         
-        await self._wait_for_container(preview)
+        if error:
+            raise RuntimeError(f"Failed to build image: {error}")
     
-    def _find_available_port(self, start: int = 8100, end: int = 8200) -> int:
-        """Find an available port in the range."""
-        import socket
-        for port in range(start, end):
+    @staticmethod
+    def _probe_free_ports() -> Set[int]:
+        """Return the ports in the preview range not already bound on the host."""
+        free = set()
+        for port in PREVIEW_PORT_RANGE:
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
                 try:
                     s.bind(("", port))
-                    return port
+                    free.add(port)
                 except OSError:
                     continue
-        raise RuntimeError("No available ports in range")
+        return free
+    
+    async def _acquire_port(self) -> int:
+        """Take a free port from the pool."""
+        async with self._port_lock:
+            if not self._free_ports:
+                raise RuntimeError("No available ports in range")
+            return self._free_ports.pop()
+    
+    async def _release_port(self, port: Optional[int]):
+        """Return a port to the pool."""
+        if port is not None:
+            async with self._port_lock:
+                self._free_ports.add(port)
     
     async def _wait_for_container(
         self,
         preview: PreviewEnvironment,
         timeout: int = 60
     ):
-        """Wait for container to be healthy."""
+        """Wait until the app in the container answers on its published port.
+        
+        docker-proxy accepts connections on the published port as soon as
+        the container starts, so a bare connect proves nothing; the app is
+        ready once an HTTP request gets any response bytes back.
+        """
         preview.add_log("Waiting for container to be ready...")
-        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
         
-        while time.time() - start_time < timeout:
-            try:
-                container = self.client.containers.get(preview.container_id)
-                status = container.status
-                
-                if status == "running":
-                    preview.add_log("Container is running")
-                    await asyncio.sleep(2)  # Wait for app to start
-                    return
-                elif status in ("exited", "dead"):
-                    logs = container.logs(tail=50).decode("utf-8")
-                    raise RuntimeError(f"Container failed: {logs}")
-                
-            except Exception as e:
-                raise RuntimeError(f"Failed to check container: {e}")
+        try:
+            container = await self._run_blocking(
+                self.client.containers.get, preview.container_id
+            )
+        except Exception as e:
+            raise RuntimeError(f"Failed to check container: {e}")
+        await self._raise_if_container_died(container)
+        
+        # Probe the app with exponential backoff instead of polling the daemon
+        delay = 0.05
+        next_status_check = loop.time() + 2
+        while loop.time() < deadline:
+            if await self._app_responds(preview.port):
+                preview.add_log("Container is accepting connections")
+                return
             
-            await asyncio.sleep(1)
+            # Still refusing: occasionally make sure the app didn't crash on boot
+            if loop.time() >= next_status_check:
+                await self._run_blocking(container.reload)
+                await self._raise_if_container_died(container)
+                next_status_check = loop.time() + 2
+            
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
         
         raise TimeoutError("Container failed to start within timeout")
     
+    @staticmethod
+    async def _app_responds(port: int) -> bool:
+        """Whether an HTTP request to the port gets any bytes back."""
+        try:
+            reader, writer = await asyncio.open_connection("localhost", port)
+        except OSError:
+            return False
+        try:
+            writer.write(b"GET / HTTP/1.0\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            # docker-proxy closes without a reply while nothing listens inside
+            return bool(await asyncio.wait_for(reader.read(1), timeout=2))
+        except (OSError, asyncio.TimeoutError):
+            return False
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+    
+    async def _raise_if_container_died(self, container):
+        """Raise with the container's last log lines if it has exited."""
+        if container.status in ("exited", "dead"):
+            logs = (await self._run_blocking(container.logs, tail=50)).decode("utf-8")
+            raise RuntimeError(f"Container failed: {logs}")
+    
     async def update_preview(
         self,
         project_id: int,
@@ -492,7 +995,24 @@ EXPOSE 80
         preview.add_log("Updating preview with new files...")
         
         try:
-            # For now, recreate container (future: hot reload)
+            # The dev server reloads mounted files itself; rebuild only when
+            # the stack or its dependency manifests changed
+            if preview.hot_reload and preview.status == "running":
+                spec = STACK_SPECS[preview.project_type]
+                if self._detect_project_type(files) == preview.project_type and all(
+                    files.get(name) == preview.files.get(name)
+                    for name in spec.manifest_files
+                ):
+                    synced = await self._run_blocking(
+                        _sync_files,
+                        _preview_dir(preview.preview_id),
+                        preview.files,
+                        files
+                    )
+                    preview.files = dict(files)
+                    preview.add_log(f"Hot reloaded {synced} changed files")
+                    return preview
+            
             await self.stop_preview(project_id)
             return await self.create_preview(project_id, files)
             
@@ -518,25 +1038,30 @@ EXPOSE 80
         
         try:
             if preview.container_id:
-                container = self.client.containers.get(preview.container_id)
-                container.stop(timeout=10)
-                container.remove()
-                preview.add_log("Container stopped and removed")
+                try:
+                    container = await self._run_blocking(
+                        self.client.containers.get, preview.container_id
+                    )
+                    # Preview apps hold no state worth a graceful shutdown
+                    await self._run_blocking(container.stop, timeout=2)
+                    # v=True drops the anonymous volumes for preserved paths
+                    await self._run_blocking(container.remove, v=True)
+                    preview.add_log("Container stopped and removed")
+                except NotFound:
+                    preview.add_log("Container already removed")
             
-            # Cleanup temp directory
-            temp_dir = Path(settings.WORK_DIR) / "previews" / preview.preview_id
-            if temp_dir.exists():
-                import shutil
-                shutil.rmtree(temp_dir)
-                preview.add_log("Temp directory cleaned up")
+            # Only now is the host port free; if the container could not be
+            # removed it may still hold it, so the port stays with the preview
+            # and a retried stop releases it. Cleared so a retry can't hand
+            # back a port that was reacquired in the meantime
+            await self._release_port(preview.port)
+            preview.port = None
             
-            # Remove image
-            try:
-                image_tag = f"istudiox-preview-{preview.preview_id}"
-                self.client.images.remove(image_tag, force=True)
-                preview.add_log("Image removed")
-            except Exception:
-                pass
+            # Cleanup bind-mounted files, if any
+            site_dir = _preview_dir(preview.preview_id)
+            if site_dir.exists():
+                await self._run_blocking(shutil.rmtree, site_dir)
+                preview.add_log("Preview files cleaned up")
             
             preview.status = "stopped"
             del _preview_registry[project_id]
@@ -573,7 +1098,7 @@ EXPOSE 80
         if not preview:
             return []
         
-        logs = preview.logs.copy()
+        logs = list(preview.logs)
         
         # Also get container logs if available
         if preview.container_id:
@@ -589,15 +1114,84 @@ EXPOSE 80
     
     async def cleanup_expired_previews(self):
         """Cleanup expired or idle previews."""
-        to_remove = []
+        now = time.monotonic()
+        to_remove = set()
         
-        for project_id, preview in _preview_registry.items():
-            if preview.is_expired or preview.is_idle:
-                logger.info(f"Cleaning up expired preview {preview.preview_id}")
-                to_remove.append(project_id)
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, project_id, preview_id = heapq.heappop(self._expiry_heap)
+            preview = _preview_registry.get(project_id)
+            # Skip entries for previews that were already stopped or replaced
+            if preview is not None and preview.preview_id == preview_id:
+                to_remove.add(project_id)
+        
+        while self._idle_heap and self._idle_heap[0][0] <= now:
+            _, project_id, preview_id = heapq.heappop(self._idle_heap)
+            preview = _preview_registry.get(project_id)
+            if preview is None or preview.preview_id != preview_id or project_id in to_remove:
+                continue
+            if preview.idle_deadline <= now:
+                to_remove.add(project_id)
+            else:
+                heapq.heappush(self._idle_heap, (preview.idle_deadline, project_id, preview_id))
         
         for project_id in to_remove:
-            await self.stop_preview(project_id)
+            logger.info(f"Cleaning up expired preview {_preview_registry[project_id].preview_id}")
+        
+        # Stops are independent and mostly waiting on the daemon
+        await asyncio.gather(*(self.stop_preview(project_id) for project_id in to_remove))
+        
+        # Catch containers the registry lost track of (crashes, restarts).
+        # Sparse listing: labels and creation time without an inspect each
+        try:
+            stranded = await self._run_blocking(
+                self.client.containers.list,
+                all=True,
+                sparse=True,
+                filters={
+                    "label": "istudiox=preview",
+                    "status": ["exited", "dead", "created"]
+                }
+            )
+        except DockerException as e:
+            logger.warning(f"Failed to list stranded preview containers: {e}")
+            return
+        
+        # Registry entries exist before their container, so matching on the
+        # preview_id label also covers containers still being set up
+        tracked = {p.preview_id for p in _preview_registry.values()}
+        cutoff = time.time() - _STRANDED_GRACE
+        stranded = [
+            c for c in stranded
+            if (c.attrs.get("Labels") or {}).get("preview_id") not in tracked
+            and c.attrs.get("Created", 0) < cutoff
+        ]
+        if stranded:
+            logger.info(f"Removing {len(stranded)} stranded preview containers")
+            await asyncio.gather(
+                *(self._run_blocking(c.remove, force=True) for c in stranded),
+                return_exceptions=True
+            )
+    
+    async def prune_images(self):
+        """Remove preview images no container uses, in one daemon call.
+        
+        Images are content-addressed and shared, so they're left in place
+        when a preview stops and only pruned once they've gone unused.
+        """
+        try:
+            result = await self._run_blocking(
+                self.client.images.prune,
+                filters={"label": "istudiox=preview", "dangling": False, "until": "30m"}
+            )
+        except DockerException as e:
+            logger.warning(f"Failed to prune preview images: {e}")
+            return
+        removed = result.get("ImagesDeleted") or []
+        if removed:
+            logger.info(
+                f"Pruned {len(removed)} preview image layers, "
+                f"reclaimed {result.get('SpaceReclaimed', 0)} bytes"
+            )
     
     def list_previews(self) -> List[PreviewEnvironment]:
         """List all active previews."""
@@ -631,6 +1225,7 @@ async def _cleanup_loop():
         try:
             await asyncio.sleep(300)  # Check every 5 minutes
             await service.cleanup_expired_previews()
+            await service.prune_images()
         except Exception as e:
             logger.error(f"Cleanup task error: {e}", exc_info=True)
 
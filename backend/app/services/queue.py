@@ -1,8 +1,9 @@
 """Background job queue using Redis Queue (RQ)."""
+import asyncio
 import os
 from typing import Any, Callable, Optional
 
-from redis import Redis
+from redis import ConnectionPool, Redis
 from rq import Queue
 from rq.job import Job
 
@@ -25,7 +26,13 @@ class JobQueue:
     def _connect(self):
         """Connect to Redis."""
         try:
-            self._redis = Redis.from_url(settings.REDIS_URL)
+            # One bounded pool of keepalive sockets shared by every enqueue
+            pool = ConnectionPool.from_url(
+                settings.REDIS_URL,
+                max_connections=32,
+                socket_keepalive=True
+            )
+            self._redis = Redis(connection_pool=pool)
             self._redis.ping()  # Test connection
             self._queue = Queue(connection=self._redis)
             logger.info("Connected to Redis for background jobs")
@@ -74,6 +81,22 @@ class JobQueue:
         
         return None
     
+    async def enqueue_async(
+        self,
+        func: Callable,
+        *args,
+        job_timeout: int = 600,
+        **kwargs
+    ) -> Optional[Job]:
+        """
+        Enqueue a job from async code without blocking the event loop.
+        
+        Runs enqueue() in a worker thread, including its sync fallback.
+        """
+        return await asyncio.to_thread(
+            self.enqueue, func, *args, job_timeout=job_timeout, **kwargs
+        )
+    
     def get_job(self, job_id: str) -> Optional[Job]:
         """Get a job by ID."""
         if not self.is_available:
@@ -84,15 +107,25 @@ class JobQueue:
             return None
     
     def get_queue_status(self) -> dict:
-        """Get queue status."""
+        """Get queue status.
+        
+        Registry sizes are read in one pipelined round trip; entries that
+        expired since the workers last cleaned the registries still count.
+        """
         if not self.is_available:
             return {"available": False, "message": "Redis not connected"}
         
+        with self._redis.pipeline(transaction=False) as pipe:
+            pipe.llen(self._queue.key)
+            pipe.zcard(self._queue.failed_job_registry.key)
+            pipe.zcard(self._queue.finished_job_registry.key)
+            queued, failed, finished = pipe.execute()
+        
         return {
             "available": True,
-            "queued": len(self._queue),
-            "failed": self._queue.failed_job_registry.count,
-            "finished": self._queue.finished_job_registry.count,
+            "queued": queued,
+            "failed": failed,
+            "finished": finished,
         }
 
 
@@ -1,15 +1,501 @@
 """Test execution service for dynamic validation."""
 import asyncio
+import atexit
+import errno
+import hashlib
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
 import tempfile
+import threading
 import json
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import AsyncIterator, Dict, Optional, List, Tuple
 from dataclasses import dataclass
 import time
 
+import orjson
+
+from ..core.config import settings
 from ..core.logging import logger
 
 
+# pytest-json-report gives exact counts; without it the summary line is parsed
+_HAS_JSON_REPORT = importlib.util.find_spec("pytest_jsonreport") is not None
+
+# xdist shards a run only past this many test files and with enough free RAM
+_HAS_XDIST = importlib.util.find_spec("xdist") is not None
+_XDIST_MIN_FILES = 4
+_XDIST_MAX_WORKERS = 8
+_XDIST_MIN_MEMORY = 1 << 30
+
+# Bytecode cache shared by test subprocesses (PYTHONPYCACHEPREFIX)
+_PYCACHE_DIR = Path(settings.WORK_DIR, "test-runner", "pyc").resolve()
+
+# Shared Jest install linked into every Jest run
+_JEST_CACHE_DIR = Path(settings.WORK_DIR, "test-runner", "jest").resolve()
+_JEST_PACKAGES = ("jest@29.7.0", "ts-jest@29.1.2", "@types/jest@29.5.12", "typescript@5.4.5")
+_JEST_IN_BAND_MAX_FILES = 2
+
+_SUMMARY_KINDS = ("passed", "failed", "skipped")
+
+
+def _summary_counts(line: str) -> Dict[str, int]:
+    """Counts from a pytest summary line ("1 failed, 2 passed in 0.1s")."""
+    counts = {}
+    line = line.strip("= \r")
+    cut = line.rfind(" in ")
+    if cut >= 0:
+        line = line[:cut]
+    for token in line.split(", "):
+        number, _, kind = token.strip().partition(" ")
+        if number.isdigit() and kind in _SUMMARY_KINDS:
+            counts[kind] = int(number)
+    return counts
+
+
+def _parse_summary(output: str) -> Tuple[int, int, int]:
+    """Read pytest's passed/failed/skipped counts from its output.
+    
+    Lines are scanned from the end since pytest prints the summary last;
+    the first line that parses as a summary wins.
+    
+    Returns:
+        (passed, failed, skipped)
+    """
+    end = len(output)
+    while end > 0:
+        start = output.rfind("\n", 0, end) + 1
+        line = output[start:end]
+        if " passed" in line or " failed" in line or " skipped" in line:
+            counts = _summary_counts(line)
+            if counts:
+                return counts.get("passed", 0), counts.get("failed", 0), counts.get("skipped", 0)
+        end = start - 1
+    return 0, 0, 0
+
+
+_JS_TEST_PATTERNS = (".test.", ".spec.", "__tests__/")
+
+
+def _is_js_test(path: str) -> bool:
+    """Whether a path looks like a Jest test file."""
+    for pattern in _JS_TEST_PATTERNS:
+        if pattern in path:
+            return True
+    return False
+
+
+def _read_json_report(path: Path) -> Optional[Tuple[int, int, int]]:
+    """Read counts from a pytest-json-report file.
+    
+    Returns:
+        (passed, failed, skipped), or None if the report is missing or invalid
+    """
+    try:
+        summary = orjson.loads(path.read_bytes())["summary"]
+    except (OSError, KeyError, TypeError, orjson.JSONDecodeError):
+        return None
+    return summary.get("passed", 0), summary.get("failed", 0), summary.get("skipped", 0)
+
+
+def _cpu_count() -> int:
+    """CPUs this process may run on (unlike os.cpu_count, honours affinity masks)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _available_memory() -> Optional[int]:
+    """Bytes of memory available for new processes (None if unknown)."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _xdist_workers(test_count: int) -> int:
+    """How many xdist workers to use for a run (0 runs in-process).
+    
+    Args:
+        test_count: Number of test files in the run
+        
+    Returns:
+        Worker count; 0 when disabled, unavailable or not worth forking
+    """
+    if not (settings.TEST_RUNNER_XDIST and _HAS_XDIST) or test_count <= _XDIST_MIN_FILES:
+        return 0
+    available = _available_memory()
+    if available is not None and available < _XDIST_MIN_MEMORY:
+        return 0
+    workers = min(_cpu_count(), _XDIST_MAX_WORKERS)
+    return workers if workers > 1 else 0
+
+
+def _scratch_root() -> Optional[str]:
+    """Pick a RAM-backed temp root for test projects.
+    
+    Returns:
+        TEST_RUNNER_TMPDIR (or NODE_TMPDIR) when set, /dev/shm when writable,
+        otherwise None to use the system default
+    """
+    for candidate in (settings.TEST_RUNNER_TMPDIR, os.environ.get("NODE_TMPDIR"), "/dev/shm"):
+        if candidate and os.path.isdir(candidate) and os.access(candidate, os.W_OK | os.X_OK):
+            return candidate
+    return None
+
+
+_SCRATCH_ROOT = _scratch_root()
+
+# Space assumed per file on top of its content (tmpfs allocates whole pages)
+_FILE_OVERHEAD = 4096
+
+
+def _scratch_dir(files: Dict[str, str]) -> Optional[str]:
+    """Pick where to materialize a project: the scratch root if it has room.
+    
+    /dev/shm is often small (64 MB in a default Docker container), so a
+    project that does not fit goes to the system temp dir instead.
+    
+    Returns:
+        _SCRATCH_ROOT, or None to use the system default
+    """
+    if _SCRATCH_ROOT is None:
+        return None
+    needed = sum(len(content) + _FILE_OVERHEAD for content in files.values())
+    try:
+        stat = os.statvfs(_SCRATCH_ROOT)
+    except OSError:
+        return None
+    return _SCRATCH_ROOT if stat.f_bavail * stat.f_frsize > needed else None
+
+
+_WRITE_CONCURRENCY = 16
+
+# Largest project (total characters across files) the runners will write out
+_MAX_PROJECT_SIZE = 50 * 1024 * 1024
+
+
+def _write_batch(batch: List[Tuple[Path, bytes]]) -> None:
+    """Write a batch of files with raw fds; parent directories must exist."""
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    for path, payload in batch:
+        data = memoryview(payload)
+        fd = os.open(path, flags, 0o644)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+
+
+async def _materialize_files(tmppath: Path, files: Dict[str, str]) -> None:
+    """Write project files under tmppath from a few worker threads.
+    
+    Files are split into at most _WRITE_CONCURRENCY batches so each thread
+    handoff covers many open/write/close calls rather than one file.
+    
+    Args:
+        tmppath: Root directory to write into
+        files: Dict of {filepath: content}
+    """
+    targets = [
+        (tmppath / filepath, content.encode("utf-8"))
+        for filepath, content in files.items()
+    ]
+    # One mkdir per distinct directory instead of one per file
+    for parent in {path.parent for path, _ in targets}:
+        parent.mkdir(parents=True, exist_ok=True)
+    
+    batches = [targets[i::_WRITE_CONCURRENCY] for i in range(_WRITE_CONCURRENCY)]
+    await asyncio.gather(*(
+        asyncio.to_thread(_write_batch, batch) for batch in batches if batch
+    ))
+
+
+# Recently materialized project trees: content hash -> (dir, {file: mtime_ns}, bytes)
+_MATERIALIZE_CACHE: "OrderedDict[str, Tuple[Path, Dict[Path, int], int]]" = OrderedDict()
+_MATERIALIZE_CACHE_SIZE = 8
+# Total size of cached trees; they usually sit in RAM on /dev/shm
+_MATERIALIZE_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def _files_key(files: Dict[str, str]) -> str:
+    """Hash a file set by path and content."""
+    digest = hashlib.blake2b(digest_size=16)
+    for filepath in sorted(files):
+        for part in (filepath.encode("utf-8"), files[filepath].encode("utf-8")):
+            digest.update(len(part).to_bytes(8, "little"))
+            digest.update(part)
+    return digest.hexdigest()
+
+
+def _is_intact(mtimes: Dict[Path, int]) -> bool:
+    """Whether no materialized file was changed or removed since it was written."""
+    try:
+        return all(os.stat(path).st_mtime_ns == mtime for path, mtime in mtimes.items())
+    except FileNotFoundError:
+        return False
+
+
+def _reset_tree(root: Path, mtimes: Dict[Path, int]) -> bool:
+    """Strip a cached tree back to exactly the files it was materialized with.
+    
+    Anything a previous run left behind (sqlite files, fixture output,
+    __pycache__, reports) is deleted so the next run starts hermetic.
+    
+    Returns:
+        False if a materialized file was changed or removed, so the tree
+        has to be rebuilt instead
+    """
+    if not _is_intact(mtimes):
+        return False
+    keep_dirs = {root}
+    for path in mtimes:
+        keep_dirs.update(path.parents)
+    for dirpath, dirnames, filenames in os.walk(root):
+        directory = Path(dirpath)
+        for name in list(dirnames):
+            path = directory / name
+            if path in keep_dirs:
+                continue
+            dirnames.remove(name)
+            if path.is_symlink():
+                path.unlink()
+            else:
+                shutil.rmtree(path, ignore_errors=True)
+        for name in filenames:
+            path = directory / name
+            if path not in mtimes:
+                path.unlink(missing_ok=True)
+    return True
+
+
+def _remove_tree(path: Path) -> None:
+    """Delete a project tree along with its bytecode under the shared prefix."""
+    shutil.rmtree(path, ignore_errors=True)
+    shutil.rmtree(_PYCACHE_DIR / path.relative_to(path.anchor), ignore_errors=True)
+
+
+@asynccontextmanager
+async def _project_dir(files: Dict[str, str]) -> AsyncIterator[Path]:
+    """Yield a directory holding files, reusing a cached identical tree.
+    
+    A cached tree is checked out for the duration of the run so concurrent
+    runs of the same files never share a directory, and is stripped of
+    whatever the previous run created before it is handed out again.
+    
+    Args:
+        files: Dict of {filepath: content}
+        
+    Yields:
+        Directory containing the files
+    """
+    key = _files_key(files)
+    entry = _MATERIALIZE_CACHE.pop(key, None)
+    if entry is not None and not await asyncio.to_thread(_reset_tree, *entry[:2]):
+        _remove_tree(entry[0])
+        entry = None
+    
+    if entry is None:
+        scratch = _scratch_dir(files)
+        tmppath = Path(tempfile.mkdtemp(dir=scratch))
+        try:
+            try:
+                await _materialize_files(tmppath, files)
+            except OSError as e:
+                if scratch is None or e.errno != errno.ENOSPC:
+                    raise
+                # The scratch root filled up meanwhile; use the system temp dir
+                logger.warning(f"[TestRunner] {scratch} is full, using the system temp dir")
+                _remove_tree(tmppath)
+                tmppath = Path(tempfile.mkdtemp())
+                await _materialize_files(tmppath, files)
+        except BaseException:
+            _remove_tree(tmppath)
+            raise
+        mtimes = {}
+        size = 0
+        for filepath in files:
+            stat = os.stat(tmppath / filepath)
+            mtimes[tmppath / filepath] = stat.st_mtime_ns
+            size += stat.st_size
+        entry = (tmppath, mtimes, size)
+    
+    try:
+        yield entry[0]
+    finally:
+        # A concurrent run of the same files may have checked its tree in
+        # first; drop that one rather than orphan it
+        displaced = _MATERIALIZE_CACHE.pop(key, None)
+        if displaced is not None and displaced[0] != entry[0]:
+            _remove_tree(displaced[0])
+        _MATERIALIZE_CACHE[key] = entry
+        cached_bytes = sum(size for _, _, size in _MATERIALIZE_CACHE.values())
+        while (
+            len(_MATERIALIZE_CACHE) > _MATERIALIZE_CACHE_SIZE
+            or cached_bytes > _MATERIALIZE_CACHE_BYTES
+        ):
+            _, (stale, _, size) = _MATERIALIZE_CACHE.popitem(last=False)
+            _remove_tree(stale)
+            cached_bytes -= size
+
+
+@atexit.register
+def _clear_materialize_cache() -> None:
+    """Remove cached project trees on shutdown."""
+    while _MATERIALIZE_CACHE:
+        _, (path, _, _) = _MATERIALIZE_CACHE.popitem()
+        _remove_tree(path)
+
+
+_OUTPUT_TAIL_BYTES = 256 * 1024
+
+
+async def _read_tail(stream: asyncio.StreamReader, maxbytes: int = _OUTPUT_TAIL_BYTES) -> bytes:
+    """Drain a stream, keeping only its last maxbytes bytes."""
+    buf = bytearray()
+    while True:
+        chunk = await stream.read(8192)
+        if not chunk:
+            break
+        buf += chunk
+        if len(buf) > maxbytes:
+            del buf[:len(buf) - maxbytes]
+    return bytes(buf)
+
+
+async def _communicate(process: asyncio.subprocess.Process, timeout: float) -> Tuple[bytes, bytes]:
+    """Wait for a test process, keeping the tail of its stdout and stderr.
+    
+    Args:
+        process: Process started with stdout/stderr pipes
+        timeout: Seconds before the process is killed
+        
+    Returns:
+        (stdout tail, stderr tail)
+        
+    Raises:
+        asyncio.TimeoutError: The process was killed after timeout
+    """
+    try:
+        stdout, stderr, _ = await asyncio.wait_for(
+            asyncio.gather(_read_tail(process.stdout), _read_tail(process.stderr), process.wait()),
+            timeout=timeout
+        )
+    except asyncio.TimeoutError:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+        raise
+    return stdout, stderr
+
+
+# Spare pytest interpreter: imports pytest and its plugins up front, then
+# blocks until a job line arrives on stdin ({"cwd", "args", "stdout",
+# "stderr"}; output goes to the given files).
+# Each worker runs a single job, so test modules never leak between runs.
+_PYTEST_WORKER = """
+import json, os, sys, tempfile
+from importlib import import_module, metadata
+import pytest
+for ep in metadata.entry_points(group="pytest11"):
+    try:
+        import_module(ep.module)
+    except Exception:
+        pass
+line = sys.stdin.readline()
+if not line:
+    sys.exit(0)
+job = json.loads(line)
+for fd, path in ((1, job["stdout"]), (2, job["stderr"])):
+    out = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    os.dup2(out, fd)
+    os.close(out)
+os.chdir(job["cwd"])
+sys.path.insert(0, job["cwd"])
+os.environ["TMPDIR"] = job["cwd"]
+tempfile.tempdir = None
+# Plugins were imported before pytest could rewrite their asserts
+args = ["-W", "ignore::pytest.PytestAssertRewriteWarning", *job["args"]]
+sys.exit(int(pytest.main(args)))
+"""
+
+
+# Seconds a spare pytest worker may sit unused before it is stopped
+_SPARE_IDLE_TIMEOUT = 300
+
+
+def _stop_worker(worker: subprocess.Popen) -> None:
+    """Stop an idle worker: EOF on stdin makes it exit without running a job."""
+    try:
+        worker.stdin.close()
+    except OSError:
+        pass
+    try:
+        worker.wait(5)
+    except subprocess.TimeoutExpired:
+        worker.kill()
+        worker.wait()
+
+
+def _read_file_tail(path: Path, maxbytes: int = _OUTPUT_TAIL_BYTES) -> bytes:
+    """Read the last maxbytes bytes of a file (empty if it is missing)."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(max(0, f.seek(0, os.SEEK_END) - maxbytes))
+            return f.read()
+    except FileNotFoundError:
+        return b""
+
+
+def _run_to_files(cmd: List[str], cwd: Path, env: Dict[str, str], timeout: float) -> Tuple[int, bytes, bytes]:
+    """Run a command in the calling thread, spooling its output to files in cwd.
+    
+    Returns:
+        (returncode, stdout tail, stderr tail)
+        
+    Raises:
+        asyncio.TimeoutError: The process was killed after timeout
+    """
+    stdout_path = cwd / ".stdout"
+    stderr_path = cwd / ".stderr"
+    with open(stdout_path, "wb") as out, open(stderr_path, "wb") as err:
+        process = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=out, stderr=err)
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            raise asyncio.TimeoutError()
+    return process.returncode, _read_file_tail(stdout_path), _read_file_tail(stderr_path)
+
+
+def _subprocess_env(tmpdir: Optional[Path] = None) -> Dict[str, str]:
+    """Environment for test subprocesses.
+    
+    Bytecode goes to a shared prefix so dependencies compiled by one run
+    are reused by the next; temp files stay in tmpdir when given.
+    """
+    env = os.environ.copy()
+    # Any non-empty value (even "0") disables writing bytecode
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["PYTHONPYCACHEPREFIX"] = str(_PYCACHE_DIR)
+    if tmpdir is not None:
+        env["TMPDIR"] = str(tmpdir)
+    return env
+
+
 @dataclass
 class TestResult:
     """Result of test execution."""
@@ -19,9 +505,17 @@ class TestResult:
     failed_tests: int
     skipped_tests: int
     execution_time: float
-    output: str
+    output: str  # stdout (or a status message)
     coverage: Optional[Dict] = None
     errors: List[str] = None
+    stderr: str = ""
+    
+    @property
+    def full_output(self) -> str:
+        """stdout followed by stderr, joined only when asked for."""
+        if not self.stderr:
+            return self.output
+        return "\n".join((self.output, self.stderr))
     
     def to_dict(self) -> Dict:
         """Convert to dictionary."""
@@ -32,7 +526,7 @@ class TestResult:
             "failed_tests": self.failed_tests,
             "skipped_tests": self.skipped_tests,
             "execution_time": self.execution_time,
-            "output": self.output,
+            "output": self.full_output,
             "coverage": self.coverage,
             "errors": self.errors or []
         }
@@ -50,6 +544,9 @@ class TestRunner:
     ) -> TestResult:
         """Run tests on files."""
         raise NotImplementedError
+    
+    def shutdown(self) -> None:
+        """Release background processes; the runner can still be used afterwards."""
 
 
 class PytestRunner(TestRunner):
@@ -57,6 +554,64 @@ class PytestRunner(TestRunner):
     
     name = "pytest"
     
+    def __init__(self):
+        self._spare: Optional[subprocess.Popen] = None
+        self._spare_timer: Optional[threading.Timer] = None
+        self._spare_lock = threading.Lock()
+    
+    def _spawn_worker(self) -> subprocess.Popen:
+        """Start a pytest interpreter that warms up while it waits for a job."""
+        # The server's own interpreter, so the worker sees the same venv and plugins
+        return subprocess.Popen(
+            [sys.executable, "-c", _PYTEST_WORKER],
+            cwd=_SCRATCH_ROOT,
+            env=_subprocess_env(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+    
+    def _take_worker(self) -> subprocess.Popen:
+        """Hand out the warm spare (or a fresh worker) and start the next spare."""
+        with self._spare_lock:
+            worker, self._spare = self._spare, None
+            if self._spare_timer is not None:
+                self._spare_timer.cancel()
+                self._spare_timer = None
+        if worker is None or worker.poll() is not None:
+            worker = self._spawn_worker()
+        try:
+            spare = self._spawn_worker()
+        except OSError as e:
+            logger.warning(f"[Pytest] Failed to start spare worker: {e}")
+            return worker
+        
+        # Stop the spare if no run claims it for a while
+        timer = threading.Timer(_SPARE_IDLE_TIMEOUT, self._reap_spare, args=(spare,))
+        timer.daemon = True
+        with self._spare_lock:
+            self._spare, self._spare_timer = spare, timer
+        timer.start()
+        return worker
+    
+    def _reap_spare(self, spare: subprocess.Popen) -> None:
+        """Stop spare if it is still the unused spare."""
+        with self._spare_lock:
+            if self._spare is not spare:
+                return
+            self._spare, self._spare_timer = None, None
+        _stop_worker(spare)
+    
+    def shutdown(self) -> None:
+        """Stop the spare worker, if any."""
+        with self._spare_lock:
+            spare, self._spare = self._spare, None
+            if self._spare_timer is not None:
+                self._spare_timer.cancel()
+                self._spare_timer = None
+        if spare is not None:
+            _stop_worker(spare)
+    
     async def run_tests(
         self,
         files: Dict[str, str],
@@ -82,71 +637,88 @@ class PytestRunner(TestRunner):
                 output="No test files found"
             )
         
-        # Create temp directory with all files
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmppath = Path(tmpdir)
+        # Refuse oversized projects before anything touches disk
+        total_size = sum(map(len, files.values()))
+        if total_size > _MAX_PROJECT_SIZE:
+            return TestResult(
+                passed=False,
+                total_tests=0,
+                passed_tests=0,
+                failed_tests=0,
+                skipped_tests=0,
+                execution_time=time.time() - start_time,
+                output="Project too large to test",
+                errors=[f"{total_size} characters of source exceeds the {_MAX_PROJECT_SIZE} limit"]
+            )
+        
+        # Materialize all files (tests + dependencies), reusing an identical tree
+        async with _project_dir(files) as tmppath:
+            
+            # Build pytest arguments
+            # Quiet output: counts come from the JSON report or the summary line
+            args = ["-q", "--tb=line", "--no-header", "-p", "no:cacheprovider"]
+            
+            report_file = tmppath / ".report.json"
+            coverage_file = tmppath / "coverage.json"
+            # Never read a report left by an earlier run in this tree
+            report_file.unlink(missing_ok=True)
+            coverage_file.unlink(missing_ok=True)
             
-            # Write all files (tests + dependencies)
-            for filepath, content in files.items():
-                file_path = tmppath / filepath
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_text(content, encoding="utf-8")
+            if _HAS_JSON_REPORT:
+                args.extend(["--json-report", "--json-report-summary", f"--json-report-file={report_file}"])
             
-            # Build pytest command
-            cmd = ["python", "-m", "pytest", "-v", "--tb=short"]
+            # pytest-cov combines per-worker coverage data itself
+            workers = _xdist_workers(len(test_files))
+            if workers:
+                args.extend(["-n", str(workers), "--dist=loadfile"])
             
             if with_coverage:
-                cmd.extend(["--cov=.", "--cov-report=json"])
+                args.extend(["--cov=.", f"--cov-report=json:{coverage_file}"])
             
             # Add test files
             for test_file in test_files.keys():
-                cmd.append(str(tmppath / test_file))
+                args.append(str(tmppath / test_file))
             
-            # Run pytest
+            # Run pytest in a pre-warmed interpreter
             try:
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    cwd=tmppath,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=120  # 2 minute timeout
-                )
+                process = self._take_worker()
+                stdout_path = tmppath / ".pytest-stdout"
+                stderr_path = tmppath / ".pytest-stderr"
+                job = {
+                    "cwd": str(tmppath),
+                    "args": args,
+                    "stdout": str(stdout_path),
+                    "stderr": str(stderr_path),
+                }
+                process.stdin.write((json.dumps(job) + "\n").encode("utf-8"))
+                process.stdin.close()
                 
-                output = stdout.decode("utf-8", errors="ignore")
-                error_output = stderr.decode("utf-8", errors="ignore")
+                try:
+                    await asyncio.to_thread(process.wait, 120)  # 2 minute timeout
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+                    raise asyncio.TimeoutError()
                 
-                # Parse pytest output
-                total_tests = 0
-                passed_tests = 0
-                failed_tests = 0
-                skipped_tests = 0
+                stdout = _read_file_tail(stdout_path)
+                stderr = _read_file_tail(stderr_path)
                 
-                # Look for summary line: "X passed, Y failed, Z skipped"
-                import re
-                summary_pattern = r"(\d+) passed|(\d+) failed|(\d+) skipped"
-                matches = re.findall(summary_pattern, output)
+                output = stdout.decode("utf-8", errors="ignore")
                 
-                for match in matches:
-                    if match[0]:  # passed
-                        passed_tests = int(match[0])
-                    if match[1]:  # failed
-                        failed_tests = int(match[1])
-                    if match[2]:  # skipped
-                        skipped_tests = int(match[2])
+                # Prefer the structured report; parse the output if there is none
+                counts = _read_json_report(report_file)
+                if counts is None:
+                    counts = _parse_summary(output)
+                passed_tests, failed_tests, skipped_tests = counts
                 
                 total_tests = passed_tests + failed_tests + skipped_tests
                 
                 # Load coverage if requested
                 coverage_data = None
                 if with_coverage:
-                    coverage_file = tmppath / "coverage.json"
                     if coverage_file.exists():
                         try:
-                            coverage_data = json.loads(coverage_file.read_text())
+                            coverage_data = orjson.loads(coverage_file.read_bytes())
                         except Exception as e:
                             logger.warning(f"[Pytest] Failed to load coverage: {e}")
                 
@@ -159,7 +731,8 @@ class PytestRunner(TestRunner):
                     failed_tests=failed_tests,
                     skipped_tests=skipped_tests,
                     execution_time=execution_time,
-                    output=output + "\n" + error_output,
+                    output=output,
+                    stderr=stderr.decode("utf-8", errors="ignore"),
                     coverage=coverage_data
                 )
                 
@@ -193,6 +766,54 @@ class JestRunner(TestRunner):
     
     name = "jest"
     
+    def __init__(self):
+        self._cache_lock = asyncio.Lock()
+        self._cache_ready = False
+        self._cache_failed = False
+    
+    async def _ensure_node_modules(self) -> Optional[Path]:
+        """Install Jest once into a shared node_modules for all runs.
+        
+        Returns:
+            The shared node_modules directory, or None if it can't be built
+        """
+        node_modules = _JEST_CACHE_DIR / "node_modules"
+        if self._cache_ready:
+            return node_modules
+        if self._cache_failed:
+            return None
+        
+        async with self._cache_lock:
+            if self._cache_ready or self._cache_failed:
+                return node_modules if self._cache_ready else None
+            if (node_modules / ".bin" / "jest").exists():
+                self._cache_ready = True
+                return node_modules
+            
+            _JEST_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    "npm", "install", "--prefer-offline", "--no-audit", "--no-fund",
+                    "--no-save", *_JEST_PACKAGES,
+                    cwd=_JEST_CACHE_DIR,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                _, stderr = await _communicate(process, timeout=300)
+            except (OSError, asyncio.TimeoutError) as e:
+                stderr, process = str(e).encode(), None
+            
+            if process is None or process.returncode != 0:
+                logger.warning(
+                    f"[Jest] Failed to build shared node_modules: "
+                    f"{stderr.decode('utf-8', errors='ignore')[-500:]}"
+                )
+                self._cache_failed = True
+                return None
+            
+            self._cache_ready = True
+            return node_modules
+    
     async def run_tests(
         self,
         files: Dict[str, str],
@@ -204,7 +825,7 @@ class JestRunner(TestRunner):
         # Filter test files
         test_files = {
             f: c for f, c in files.items()
-            if any(pattern in f for pattern in [".test.", ".spec.", "__tests__/"])
+            if _is_js_test(f)
         }
         
         if not test_files:
@@ -218,15 +839,22 @@ class JestRunner(TestRunner):
                 output="No test files found"
             )
         
-        # Create temp directory with all files
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmppath = Path(tmpdir)
-            
-            # Write all files
-            for filepath, content in files.items():
-                file_path = tmppath / filepath
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_text(content, encoding="utf-8")
+        # Refuse oversized projects before anything touches disk
+        total_size = sum(map(len, files.values()))
+        if total_size > _MAX_PROJECT_SIZE:
+            return TestResult(
+                passed=False,
+                total_tests=0,
+                passed_tests=0,
+                failed_tests=0,
+                skipped_tests=0,
+                execution_time=time.time() - start_time,
+                output="Project too large to test",
+                errors=[f"{total_size} characters of source exceeds the {_MAX_PROJECT_SIZE} limit"]
+            )
+        
+        # Materialize all files, reusing an identical tree
+        async with _project_dir(files) as tmppath:
             
             # Create minimal package.json
             package_json = tmppath / "package.json"
@@ -238,31 +866,49 @@ class JestRunner(TestRunner):
                 }
             }), encoding="utf-8")
             
+            # Link the shared install instead of resolving Jest per run
+            node_modules = await self._ensure_node_modules()
+            link = tmppath / "node_modules"
+            if node_modules is not None and not os.path.lexists(link):
+                os.symlink(node_modules, link, target_is_directory=True)
+            
             # Build jest command
-            cmd = ["npx", "jest", "--json", "--verbose"]
+            # Results go to a file so the stdout tail can stay bounded
+            results_file = tmppath / "jest-results.json"
+            results_file.unlink(missing_ok=True)
+            cmd = ["npx", "jest", "--json", f"--outputFile={results_file}", "--verbose"]
+            
+            # A worker pool costs more than it saves for a couple of files
+            if len(test_files) <= _JEST_IN_BAND_MAX_FILES:
+                cmd.append("--runInBand")
             
             if with_coverage:
                 cmd.append("--coverage")
             
             # Run jest
             try:
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    cwd=tmppath,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=120
-                )
+                if len(test_files) == 1 or _cpu_count() == 1:
+                    # Single short run: a plain Popen in a thread skips
+                    # registering pipes with the event loop
+                    returncode, stdout, stderr = await asyncio.to_thread(
+                        _run_to_files, cmd, tmppath, _subprocess_env(tmppath), 120
+                    )
+                else:
+                    process = await asyncio.create_subprocess_exec(
+                        *cmd,
+                        cwd=tmppath,
+                        env=_subprocess_env(tmppath),
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE
+                    )
+                    stdout, stderr = await _communicate(process, timeout=120)
+                    returncode = process.returncode
                 
                 output = stdout.decode("utf-8", errors="ignore")
                 
                 # Parse Jest JSON output
                 try:
-                    result = json.loads(output)
+                    result = orjson.loads(results_file.read_bytes())
                     
                     total_tests = result.get("numTotalTests", 0)
                     passed_tests = result.get("numPassedTests", 0)
@@ -278,20 +924,21 @@ class JestRunner(TestRunner):
                         failed_tests=failed_tests,
                         skipped_tests=skipped_tests,
                         execution_time=time.time() - start_time,
-                        output=json.dumps(result, indent=2),
+                        output=orjson.dumps(result, option=orjson.OPT_INDENT_2).decode("utf-8"),
                         coverage=coverage_data
                     )
                     
-                except json.JSONDecodeError:
+                except (OSError, json.JSONDecodeError):
                     # Fallback to text output
                     return TestResult(
-                        passed=process.returncode == 0,
+                        passed=returncode == 0,
                         total_tests=0,
                         passed_tests=0,
                         failed_tests=0,
                         skipped_tests=0,
                         execution_time=time.time() - start_time,
-                        output=output
+                        output=output,
+                        stderr=stderr.decode("utf-8", errors="ignore")
                     )
                     
             except asyncio.TimeoutError:
@@ -319,14 +966,34 @@ class JestRunner(TestRunner):
                 )
 
 
+_RUNNER_TYPES: Dict[str, type] = {
+    PytestRunner.name: PytestRunner,
+    JestRunner.name: JestRunner,
+}
+
+
 class TestExecutionService:
     """Service for executing tests."""
     
     def __init__(self):
-        self.runners: Dict[str, TestRunner] = {
-            "pytest": PytestRunner(),
-            "jest": JestRunner()
-        }
+        # Runners are built on first use, so only the languages a
+        # deployment actually tests pay for warm workers or caches
+        self._runners: Dict[str, TestRunner] = {}
+    
+    def shutdown(self) -> None:
+        """Release every created runner's background processes."""
+        for test_runner in self._runners.values():
+            test_runner.shutdown()
+    
+    def _get(self, name: str) -> Optional[TestRunner]:
+        """Get the runner called name, creating it on first use."""
+        test_runner = self._runners.get(name)
+        if test_runner is None:
+            runner_cls = _RUNNER_TYPES.get(name)
+            if runner_cls is None:
+                return None
+            test_runner = self._runners[name] = runner_cls()
+        return test_runner
     
     async def run_tests(
         self,
@@ -347,19 +1014,17 @@ class TestExecutionService:
         """
         # Auto-detect runner
         if runner == "auto":
-            has_py_tests = any(
-                f.endswith(".py") and ("test_" in f or "_test.py" in f or "/tests/" in f)
-                for f in files.keys()
-            )
-            has_js_tests = any(
-                any(pattern in f for pattern in [".test.", ".spec.", "__tests__/"])
-                for f in files.keys()
-            )
+            # Python tests take precedence, so stop at the first one
+            detected = None
+            for f in files:
+                if f.endswith(".py") and ("test_" in f or "_test.py" in f or "/tests/" in f):
+                    detected = "pytest"
+                    break
+                if detected is None and _is_js_test(f):
+                    detected = "jest"
             
-            if has_py_tests:
-                runner = "pytest"
-            elif has_js_tests:
-                runner = "jest"
+            if detected:
+                runner = detected
             else:
                 logger.info("[TestExecution] No test files detected")
                 return TestResult(
@@ -373,7 +1038,7 @@ class TestExecutionService:
                 )
         
         # Get runner
-        test_runner = self.runners.get(runner)
+        test_runner = self._get(runner)
         if not test_runner:
             raise ValueError(f"Unknown test runner: {runner}")
         
@@ -399,3 +1064,9 @@ def get_test_service() -> TestExecutionService:
     if _test_service is None:
         _test_service = TestExecutionService()
     return _test_service
+
+
+def shutdown_test_service():
+    """Stop the test service's warm workers, if it was created."""
+    if _test_service is not None:
+        _test_service.shutdown()
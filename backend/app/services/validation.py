@@ -1,23 +1,89 @@
 """Validation service for code quality and correctness."""
 import asyncio
+import fnmatch
+import functools
+import hashlib
+import importlib.util
+import itertools
+import multiprocessing
+import os
+import re
+import shutil
+import signal
 import subprocess
 import tempfile
+import threading
+import time
+import warnings
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, field
-from enum import Enum
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, Type, Union
+from dataclasses import dataclass, field, replace
+from enum import IntEnum
 
+from ..core.config import settings
 from ..core.logging import logger
 
+# mypy daemon shared by all MypyValidator runs; exits after 30 idle minutes
+_DMYPY_STATUS_FILE = Path(settings.WORK_DIR, "validation", "dmypy.json").resolve()
+_DMYPY_IDLE_TIMEOUT = 1800
+_MYPY_FLAGS = ["--ignore-missing-imports", "--no-error-summary", "--show-column-numbers"]
+_dmypy_lock = threading.Lock()
 
-class ValidationSeverity(str, Enum):
-    """Validation issue severity levels."""
-    ERROR = "error"
-    WARNING = "warning"
-    INFO = "info"
+# mypy diagnostics: path/file.py:line:col: error: message
+_MYPY_RE = re.compile(r"^(.+?):(\d+):(\d+): (error|warning|note): (.+)$", re.M)
 
+# Longest stdout line a streamed command may print
+_STREAM_LINE_LIMIT = 1 << 20
 
-@dataclass
+# Threads that fork/exec validator tools and wait on them, so several tools
+# start at once instead of one after another on the event loop thread
+_SPAWN_WORKERS = 8
+_spawn_pool: Optional[ThreadPoolExecutor] = None
+_spawn_pool_lock = threading.Lock()
+
+# CPUs this process may run on: container cpusets and affinity masks make
+# os.cpu_count() overreport
+if hasattr(os, "sched_getaffinity"):
+    _CPUS = sorted(os.sched_getaffinity(0))
+else:
+    _CPUS = list(range(os.cpu_count() or 1))
+# Cores handed out round-robin to pinned single-threaded tools
+_next_cpu = itertools.cycle(_CPUS)
+
+# Syntax checks fan out to processes once a project has this many files;
+# below it, pickling the sources costs more than parsing them inline
+_PARALLEL_PARSE_MIN_FILES = 16
+_PARSE_WORKERS = len(_CPUS)
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+
+# Validators running at once per event loop; the rest queue for a slot
+_VALIDATOR_CONCURRENCY = len(_CPUS)
+
+# Validation results kept per (validator, content digest), oldest dropped first
+_ISSUE_CACHE_SIZE = 4096
+
+
+class ValidationSeverity(IntEnum):
+    """Validation issue severity levels (ESLint's numbering)."""
+    ERROR = 2
+    WARNING = 1
+    INFO = 0
+
+
+# Names the API reports severities by
+_SEVERITY_NAMES = {
+    ValidationSeverity.ERROR: "error",
+    ValidationSeverity.WARNING: "warning",
+    ValidationSeverity.INFO: "info"
+}
+
+
+@dataclass(slots=True)
 class ValidationIssue:
     """A single validation issue."""
     file: str
@@ -34,14 +100,14 @@ class ValidationIssue:
             "file": self.file,
             "line": self.line,
             "column": self.column,
-            "severity": self.severity.value,
+            "severity": _SEVERITY_NAMES[self.severity],
             "message": self.message,
             "rule": self.rule,
             "fixable": self.fixable
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationResult:
     """Result of validation."""
     validator: str
@@ -49,16 +115,20 @@ class ValidationResult:
     issues: List[ValidationIssue] = field(default_factory=list)
     execution_time: float = 0.0
     error: Optional[str] = None
+    # Counted once when the result is built; issues is final by then
+    error_count: int = field(init=False, default=0)
+    warning_count: int = field(init=False, default=0)
     
-    @property
-    def error_count(self) -> int:
-        """Count of error-level issues."""
-        return sum(1 for issue in self.issues if issue.severity == ValidationSeverity.ERROR)
-    
-    @property
-    def warning_count(self) -> int:
-        """Count of warning-level issues."""
-        return sum(1 for issue in self.issues if issue.severity == ValidationSeverity.WARNING)
+    def __post_init__(self):
+        """Count error- and warning-level issues in one pass."""
+        error_count = warning_count = 0
+        for issue in self.issues:
+            if issue.severity == ValidationSeverity.ERROR:
+                error_count += 1
+            elif issue.severity == ValidationSeverity.WARNING:
+                warning_count += 1
+        self.error_count = error_count
+        self.warning_count = warning_count
     
     def to_dict(self) -> Dict:
         """Convert to dictionary."""
@@ -73,65 +143,358 @@ class ValidationResult:
         }
 
 
+def _write_files(root: Path, files: Dict[str, str]):
+    """Write files under root, creating each parent directory once."""
+    targets = {root / filepath: content for filepath, content in files.items()}
+    for parent in {path.parent for path in targets}:
+        parent.mkdir(parents=True, exist_ok=True)
+    for path, content in targets.items():
+        path.write_text(content, encoding="utf-8")
+
+
+def _digest(filepath: str, content: str) -> bytes:
+    """Hash one file, path included, for the validation cache."""
+    h = hashlib.blake2b(filepath.encode("utf-8"), digest_size=16)
+    h.update(b"\0")
+    h.update(content.encode("utf-8"))
+    return h.digest()
+
+
+def _digest_files(files: Dict[str, str]) -> bytes:
+    """Hash a whole file set, paths included, for the validation cache."""
+    h = hashlib.blake2b(digest_size=16)
+    for filepath in sorted(files):
+        h.update(_digest(filepath, files[filepath]))
+    return h.digest()
+
+
+async def _write_tree(root: Path, files: Dict[str, str]):
+    """Write files under root in a worker thread so the event loop keeps running."""
+    await asyncio.to_thread(_write_files, root, files)
+
+
+def _parse_one(item: Tuple[str, str]) -> Tuple[str, Optional[Tuple[int, int, str]]]:
+    """
+    Parse one Python file.
+    
+    Returns:
+        (filepath, None) if it parses, else (filepath, (line, column, message))
+    """
+    filepath, content = item
+    try:
+        # Nothing reads the tree, so compile instead of ast.parse: the parser's
+        # AST stays in C and no Python node objects are built
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            compile(content, filepath, "exec", dont_inherit=True)
+    except SyntaxError as e:
+        return filepath, (e.lineno or 0, e.offset or 0, e.msg)
+    return filepath, None
+
+
+def get_spawn_pool() -> ThreadPoolExecutor:
+    """Get the shared thread pool validator tools are spawned and awaited on."""
+    global _spawn_pool
+    if _spawn_pool is None:
+        with _spawn_pool_lock:
+            if _spawn_pool is None:
+                _spawn_pool = ThreadPoolExecutor(
+                    max_workers=_SPAWN_WORKERS,
+                    thread_name_prefix="validator-spawn"
+                )
+    return _spawn_pool
+
+
+def _popen(cmd: List[str], cwd: Path, stdin, pin: bool) -> subprocess.Popen:
+    """Start cmd with stdout and stderr piped, optionally pinned to one core."""
+    process = subprocess.Popen(
+        cmd, cwd=cwd, stdin=stdin,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    # Set from the parent: preexec_fn is unsafe when spawning from threads
+    if pin and len(_CPUS) > 1 and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(process.pid, {next(_next_cpu)})
+        except OSError:
+            pass  # Already exited
+    return process
+
+
+async def _spawn(
+    cmd: List[str],
+    cwd: Path,
+    stdin=None,
+    pin: bool = False
+) -> subprocess.Popen:
+    """Start cmd on the spawn pool with stdout and stderr piped."""
+    return await asyncio.get_running_loop().run_in_executor(
+        get_spawn_pool(), _popen, cmd, cwd, stdin, pin
+    )
+
+
+def _kill(process: subprocess.Popen, *pipes):
+    """Kill and reap a process that is still running, then close pipes."""
+    if process.poll() is None:
+        process.kill()
+        process.wait()
+    for pipe in pipes:
+        if pipe is not None:
+            pipe.close()
+
+
+def _decode(data: bytes) -> str:
+    """Decode tool output (most tools print nothing when all is well)."""
+    return data.decode("utf-8", "replace") if data else ""
+
+
+class CommandError(Exception):
+    """A validator's tool timed out, failed to start or was killed.
+    
+    Raised instead of returning the tool's (empty) output, so the run is
+    reported as an error rather than as a clean, cacheable result.
+    """
+
+
+def _exit_status(cmd: List[str], returncode: int) -> int:
+    """Pass a tool's return code through; raise if a signal killed it."""
+    if returncode < 0:
+        try:
+            reason = signal.Signals(-returncode).name
+        except ValueError:
+            reason = f"signal {-returncode}"
+        logger.warning(f"[Validator] {cmd[0]} was killed by {reason}")
+        raise CommandError(f"{cmd[0]} was killed by {reason}")
+    return returncode
+
+
+def _dmypy_check(path: str, cwd: Path, timeout: int) -> Tuple[int, str, str]:
+    """
+    Type-check path on the shared mypy daemon, starting it if needed.
+    
+    Talks to the daemon with the dmypy client in this process instead of
+    starting a dmypy interpreter per check. Only starting the daemon goes
+    through the CLI, since the client daemonizes by forking its caller.
+    
+    Returns:
+        (return_code, stdout, stderr)
+    """
+    from mypy.dmypy.client import request
+    from mypy.ipc import BadStatus
+    
+    status_file = str(_DMYPY_STATUS_FILE)
+    with _dmypy_lock:
+        try:
+            response = request(status_file, "check", timeout=timeout, files=[path], export_types=False)
+        except BadStatus:
+            # Not running (first check, or it exited after idling)
+            subprocess.run(
+                [
+                    "dmypy", "--status-file", status_file,
+                    "start", "--timeout", str(_DMYPY_IDLE_TIMEOUT),
+                    "--", *_MYPY_FLAGS
+                ],
+                cwd=cwd,
+                capture_output=True,
+                timeout=timeout,
+                check=True
+            )
+            response = request(status_file, "check", timeout=timeout, files=[path], export_types=False)
+    
+    if "error" in response:
+        return 2, "", response["error"]
+    return response["status"], response["out"], response["err"]
+
+
+@functools.lru_cache(maxsize=None)
+def _tool_available(tool: str) -> bool:
+    """Whether an external tool is on PATH (a stat per PATH entry, no fork)."""
+    return shutil.which(tool) is not None
+
+
+@functools.lru_cache(maxsize=None)
+def _mypy_available() -> bool:
+    """Whether mypy is importable and its dmypy daemon can be started."""
+    return importlib.util.find_spec("mypy") is not None and _tool_available("dmypy")
+
+
+def get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """Get the shared syntax-check process pool, or None on a single core."""
+    global _parse_pool
+    if _parse_pool is None and _PARSE_WORKERS > 1:
+        with _parse_pool_lock:
+            if _parse_pool is None:
+                # spawn: the parent runs an event loop and worker threads
+                _parse_pool = ProcessPoolExecutor(
+                    max_workers=_PARSE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _parse_pool
+
+
 class BaseValidator:
     """Base class for validators."""
     
     name: str = "base"
     file_patterns: List[str] = []  # e.g., ["*.py"]
+    uses_workdir: bool = False  # Runs an external tool over files on disk
+    per_file: bool = False  # A file's issues depend only on that file's content
+    cost: int = 0  # Relative run time; cheaper validators are started first
+    pin_cpu: bool = False  # Single-threaded tool: run each invocation on one core
+    _pattern_re: "re.Pattern[str]" = re.compile(r"(?!)")  # file_patterns, compiled
+    
+    def __init_subclass__(cls, **kwargs):
+        """Compile the subclass's file_patterns into one regex."""
+        super().__init_subclass__(**kwargs)
+        if cls.file_patterns:
+            cls._pattern_re = re.compile(
+                "|".join(fnmatch.translate(p) for p in cls.file_patterns)
+            )
     
-    async def validate(self, files: Dict[str, str]) -> ValidationResult:
+    async def validate(
+        self,
+        files: Dict[str, str],
+        workdir: Optional[Path] = None
+    ) -> ValidationResult:
         """
         Validate files.
         
         Args:
             files: Dict of {filepath: content}
+            workdir: Directory already holding the matching files (optional)
             
         Returns:
             ValidationResult
         """
         raise NotImplementedError
     
+    @asynccontextmanager
+    async def _workdir(
+        self,
+        files: Dict[str, str],
+        workdir: Optional[Path]
+    ) -> AsyncIterator[Path]:
+        """Yield the shared workdir, or a temp dir holding files if there is none."""
+        if workdir is not None:
+            yield workdir
+            return
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmppath = Path(tmpdir)
+            await _write_tree(tmppath, files)
+            yield tmppath
+    
     def matches_file(self, filepath: str) -> bool:
         """Check if validator applies to file."""
-        from fnmatch import fnmatch
-        return any(fnmatch(filepath, pattern) for pattern in self.file_patterns)
+        return self._pattern_re.match(filepath) is not None
     
     async def _run_command(
         self,
         cmd: List[str],
         cwd: Path,
-        timeout: int = 30
-    ) -> Tuple[int, str, str]:
+        timeout: int = 30,
+        input: Optional[bytes] = None,
+        text: bool = True
+    ) -> Tuple[int, Union[str, bytes], str]:
         """
         Run a command asynchronously.
         
+        Args:
+            input: Bytes fed to the command's stdin (optional)
+            text: Decode stdout; False returns it as bytes (e.g. for orjson)
+        
         Returns:
             (return_code, stdout, stderr)
+        
+        Raises:
+            CommandError: The command timed out, failed to start or was killed
         """
+        process = None
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                cwd=cwd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            process = await _spawn(
+                cmd, cwd,
+                stdin=subprocess.PIPE if input is not None else None,
+                pin=self.pin_cpu
             )
-            
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=timeout
+            stdout, stderr = await asyncio.get_running_loop().run_in_executor(
+                get_spawn_pool(), process.communicate, input, timeout
             )
             
             return (
-                process.returncode or 0,
-                stdout.decode("utf-8", errors="ignore"),
-                stderr.decode("utf-8", errors="ignore")
+                _exit_status(cmd, process.returncode),
+                _decode(stdout) if text else stdout,
+                _decode(stderr)
+            )
+        except subprocess.TimeoutExpired:
+            logger.error(f"[Validator] Command timeout: {' '.join(cmd)}")
+            raise CommandError(f"{cmd[0]} timed out after {timeout}s")
+        except CommandError:
+            raise
+        except Exception as e:
+            logger.error(f"[Validator] Command failed: {e}")
+            raise CommandError(f"{cmd[0]} failed: {e}") from e
+        finally:
+            if process is not None:
+                _kill(process, process.stdin, process.stdout, process.stderr)
+    
+    async def _run_command_streaming(
+        self,
+        cmd: List[str],
+        cwd: Path,
+        on_line: Callable[[str], None],
+        timeout: int = 30
+    ) -> Tuple[int, str]:
+        """
+        Run a command, handing each stdout line to on_line as it is printed.
+        
+        Args:
+            on_line: Called with every decoded stdout line, newline included
+        
+        Returns:
+            (return_code, stderr)
+        
+        Raises:
+            CommandError: The command timed out, failed to start or was killed
+        """
+        loop = asyncio.get_running_loop()
+        pool = get_spawn_pool()
+        process = None
+        transport = None
+        
+        try:
+            process = await _spawn(cmd, cwd, pin=self.pin_cpu)
+            # Read stdout on the event loop; stderr and the exit wait on the pool
+            reader = asyncio.StreamReader(limit=_STREAM_LINE_LIMIT, loop=loop)
+            transport, _ = await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader, loop=loop),
+                process.stdout
+            )
+            
+            async def read_stdout():
+                async for line in reader:
+                    on_line(line.decode("utf-8", "replace"))
+            
+            _, stderr, returncode = await asyncio.wait_for(
+                asyncio.gather(
+                    read_stdout(),
+                    loop.run_in_executor(pool, process.stderr.read),
+                    loop.run_in_executor(pool, process.wait)
+                ),
+                timeout=timeout
             )
+            
+            return _exit_status(cmd, returncode), _decode(stderr)
         except asyncio.TimeoutError:
             logger.error(f"[Validator] Command timeout: {' '.join(cmd)}")
-            return (1, "", "Command timed out")
+            raise CommandError(f"{cmd[0]} timed out after {timeout}s")
+        except CommandError:
+            raise
         except Exception as e:
             logger.error(f"[Validator] Command failed: {e}")
-            return (1, "", str(e))
+            raise CommandError(f"{cmd[0]} failed: {e}") from e
+        finally:
+            if process is not None:
+                _kill(process, process.stderr)
+            if transport is not None:
+                transport.close()
 
 
 class PythonSyntaxValidator(BaseValidator):
@@ -139,31 +502,43 @@ class PythonSyntaxValidator(BaseValidator):
     
     name = "python-syntax"
     file_patterns = ["*.py"]
+    per_file = True
     
-    async def validate(self, files: Dict[str, str]) -> ValidationResult:
+    async def validate(
+        self,
+        files: Dict[str, str],
+        workdir: Optional[Path] = None
+    ) -> ValidationResult:
         """Validate Python files for syntax errors."""
-        import ast
         import time
         
         start_time = time.time()
         issues = []
         
-        for filepath, content in files.items():
-            if not self.matches_file(filepath):
+        items = [(f, c) for f, c in files.items() if self.matches_file(f)]
+        pool = get_parse_pool() if len(items) >= _PARALLEL_PARSE_MIN_FILES else None
+        if pool is not None:
+            # Parse on every core; the loop waits in a thread, not on the parser
+            chunksize = max(1, len(items) // (_PARSE_WORKERS * 4))
+            outcomes = await asyncio.to_thread(
+                lambda: list(pool.map(_parse_one, items, chunksize=chunksize))
+            )
+        else:
+            outcomes = [_parse_one(item) for item in items]
+        
+        for filepath, error in outcomes:
+            if error is None:
                 continue
-            
-            try:
-                ast.parse(content)
-            except SyntaxError as e:
-                issues.append(ValidationIssue(
-                    file=filepath,
-                    line=e.lineno or 0,
-                    column=e.offset or 0,
-                    severity=ValidationSeverity.ERROR,
-                    message=e.msg,
-                    rule="syntax-error",
-                    fixable=False
-                ))
+            lineno, offset, msg = error
+            issues.append(ValidationIssue(
+                file=filepath,
+                line=lineno,
+                column=offset,
+                severity=ValidationSeverity.ERROR,
+                message=msg,
+                rule="syntax-error",
+                fixable=False
+            ))
         
         execution_time = time.time() - start_time
         
@@ -180,11 +555,16 @@ class MypyValidator(BaseValidator):
     
     name = "mypy"
     file_patterns = ["*.py"]
+    uses_workdir = True
+    cost = 3
     
-    async def validate(self, files: Dict[str, str]) -> ValidationResult:
+    async def validate(
+        self,
+        files: Dict[str, str],
+        workdir: Optional[Path] = None
+    ) -> ValidationResult:
         """Run mypy type checking."""
         import time
-        import re
         
         start_time = time.time()
         
@@ -197,48 +577,44 @@ class MypyValidator(BaseValidator):
                 execution_time=time.time() - start_time
             )
         
-        # Create temp directory with files
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmppath = Path(tmpdir)
-            
-            # Write files
-            for filepath, content in py_files.items():
-                file_path = tmppath / filepath
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_text(content, encoding="utf-8")
-            
-            # Run mypy
-            cmd = [
-                "mypy",
-                "--ignore-missing-imports",
-                "--no-error-summary",
-                "--show-column-numbers",
-                str(tmppath)
-            ]
-            
-            returncode, stdout, stderr = await self._run_command(cmd, tmppath)
+        # Use the shared workdir, or write the files to a temp directory
+        async with self._workdir(py_files, workdir) as tmppath:
+            # Check through the shared daemon, which keeps typeshed and the
+            # stdlib loaded between runs. The daemon keeps the cwd it started
+            # in, so always use a stable one
+            daemon_cwd = _DMYPY_STATUS_FILE.parent
+            daemon_cwd.mkdir(parents=True, exist_ok=True)
+            try:
+                returncode, stdout, stderr = await asyncio.get_running_loop().run_in_executor(
+                    get_spawn_pool(), _dmypy_check, str(tmppath), daemon_cwd, 120
+                )
+            except Exception as e:
+                logger.error(f"[Validator] mypy daemon failed: {e}")
+                raise CommandError(f"mypy daemon failed: {e}") from e
+            if returncode == 2:
+                # mypy's exit code for a crash or bad invocation, not for findings
+                raise CommandError(f"mypy failed: {stderr.strip() or 'exit code 2'}")
             
             # Parse mypy output
             issues = []
-            # Format: path/file.py:line:col: error: message
-            pattern = r"^(.+?):(\d+):(\d+): (error|warning|note): (.+)$"
-            
-            for line in stdout.splitlines():
-                match = re.match(pattern, line)
-                if match:
-                    file, line_num, col, severity, message = match.groups()
-                    # Make path relative
-                    rel_path = Path(file).relative_to(tmppath)
-                    
-                    issues.append(ValidationIssue(
-                        file=str(rel_path),
-                        line=int(line_num),
-                        column=int(col),
-                        severity=ValidationSeverity.ERROR if severity == "error" else ValidationSeverity.WARNING,
-                        message=message.strip(),
-                        rule="type-check",
-                        fixable=False
-                    ))
+            root = tmppath.resolve()
+            for match in _MYPY_RE.finditer(stdout):
+                file, line_num, col, severity, message = match.groups()
+                # Make path relative (mypy reports paths relative to its cwd)
+                try:
+                    rel_path = (daemon_cwd / file).resolve().relative_to(root)
+                except ValueError:
+                    rel_path = Path(file)
+                
+                issues.append(ValidationIssue(
+                    file=str(rel_path),
+                    line=int(line_num),
+                    column=int(col),
+                    severity=ValidationSeverity.ERROR if severity == "error" else ValidationSeverity.WARNING,
+                    message=message.strip(),
+                    rule="type-check",
+                    fixable=False
+                ))
             
             execution_time = time.time() - start_time
             
@@ -255,11 +631,19 @@ class BanditValidator(BaseValidator):
     
     name = "bandit"
     file_patterns = ["*.py"]
+    uses_workdir = True
+    cost = 2
+    pin_cpu = True
+    per_file = True
     
-    async def validate(self, files: Dict[str, str]) -> ValidationResult:
+    async def validate(
+        self,
+        files: Dict[str, str],
+        workdir: Optional[Path] = None
+    ) -> ValidationResult:
         """Run bandit security checks."""
         import time
-        import json
+        import orjson
         
         start_time = time.time()
         
@@ -272,16 +656,8 @@ class BanditValidator(BaseValidator):
                 execution_time=time.time() - start_time
             )
         
-        # Create temp directory with files
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmppath = Path(tmpdir)
-            
-            # Write files
-            for filepath, content in py_files.items():
-                file_path = tmppath / filepath
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_text(content, encoding="utf-8")
-            
+        # Use the shared workdir, or write the files to a temp directory
+        async with self._workdir(py_files, workdir) as tmppath:
             # Run bandit
             cmd = [
                 "bandit",
@@ -290,13 +666,16 @@ class BanditValidator(BaseValidator):
                 "-q"  # Quiet mode
             ]
             
-            returncode, stdout, stderr = await self._run_command(cmd, tmppath)
+            returncode, stdout, stderr = await self._run_command(cmd, tmppath, text=False)
+            if returncode not in (0, 1) or not stdout:
+                # 0 and 1 are bandit's "no issues" / "issues found"
+                raise CommandError(f"bandit failed: {stderr.strip() or f'exit code {returncode}'}")
             
             # Parse bandit JSON output
             issues = []
             try:
                 if stdout:
-                    result = json.loads(stdout)
+                    result = orjson.loads(stdout)
                     for finding in result.get("results", []):
                         rel_path = Path(finding["filename"]).relative_to(tmppath)
                         
@@ -316,8 +695,9 @@ class BanditValidator(BaseValidator):
                             rule=finding["test_id"],
                             fixable=False
                         ))
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 logger.warning(f"[Bandit] Failed to parse JSON output")
+                raise CommandError("bandit printed invalid JSON")
             
             execution_time = time.time() - start_time
             
@@ -334,8 +714,14 @@ class BlackValidator(BaseValidator):
     
     name = "black"
     file_patterns = ["*.py"]
+    uses_workdir = True
+    cost = 1
     
-    async def validate(self, files: Dict[str, str]) -> ValidationResult:
+    async def validate(
+        self,
+        files: Dict[str, str],
+        workdir: Optional[Path] = None
+    ) -> ValidationResult:
         """Check if Python code is formatted with black."""
         import time
         
@@ -350,49 +736,53 @@ class BlackValidator(BaseValidator):
                 execution_time=time.time() - start_time
             )
         
-        # Create temp directory with files
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmppath = Path(tmpdir)
-            
-            # Write files
-            for filepath, content in py_files.items():
-                file_path = tmppath / filepath
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_text(content, encoding="utf-8")
-            
-            # Run black in check mode
-            cmd = [
-                "black",
-                "--check",
-                "--quiet",
-                str(tmppath)
-            ]
-            
-            returncode, stdout, stderr = await self._run_command(cmd, tmppath)
-            
-            # Black returns 1 if files would be reformatted
-            issues = []
-            if returncode != 0:
-                # Parse which files need formatting
-                for filepath in py_files.keys():
-                    issues.append(ValidationIssue(
-                        file=filepath,
-                        line=0,
-                        column=0,
-                        severity=ValidationSeverity.WARNING,
-                        message="File would be reformatted by black",
-                        rule="format",
-                        fixable=True
-                    ))
-            
-            execution_time = time.time() - start_time
-            
-            return ValidationResult(
-                validator=self.name,
-                passed=returncode == 0,
-                issues=issues,
-                execution_time=execution_time
+        if workdir is None and len(py_files) == 1:
+            # A single file goes through stdin instead of a temp directory
+            content = next(iter(py_files.values()))
+            cmd = ["black", "--check", "--quiet", "-"]
+            returncode, stdout, stderr = await self._run_command(
+                cmd, Path(tempfile.gettempdir()), input=content.encode("utf-8")
             )
+        else:
+            # Use the shared workdir, or write the files to a temp directory
+            async with self._workdir(py_files, workdir) as tmppath:
+                # Run black in check mode
+                cmd = [
+                    "black",
+                    "--check",
+                    "--quiet",
+                    str(tmppath)
+                ]
+                
+                returncode, stdout, stderr = await self._run_command(cmd, tmppath)
+        
+        if returncode not in (0, 1):
+            # 123 is black's internal error; only 0 and 1 are verdicts
+            raise CommandError(f"black failed: {stderr.strip() or f'exit code {returncode}'}")
+        
+        # Black returns 1 if files would be reformatted
+        issues = []
+        if returncode != 0:
+            # Parse which files need formatting
+            for filepath in py_files.keys():
+                issues.append(ValidationIssue(
+                    file=filepath,
+                    line=0,
+                    column=0,
+                    severity=ValidationSeverity.WARNING,
+                    message="File would be reformatted by black",
+                    rule="format",
+                    fixable=True
+                ))
+        
+        execution_time = time.time() - start_time
+        
+        return ValidationResult(
+            validator=self.name,
+            passed=returncode == 0,
+            issues=issues,
+            execution_time=execution_time
+        )
 
 
 class ValidationService:
@@ -400,35 +790,87 @@ class ValidationService:
     
     def __init__(self):
         self.validators: Dict[str, BaseValidator] = {}
+        # (validator name, content digest) -> issues of one file for per-file
+        # validators, or the ValidationResult of a whole file set otherwise
+        self._issue_cache: OrderedDict = OrderedDict()
+        # Generation jobs on different threads share the cache; LRU upkeep
+        # reorders the dict, so every access goes through this lock
+        self._cache_lock = threading.Lock()
+        # One semaphore per event loop: each generation job runs its own loop
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        # Validators not built yet: name -> (class, tool probe)
+        self._lazy: Dict[str, Tuple[Type[BaseValidator], Callable[[], bool]]] = {}
         self._register_default_validators()
     
     def _register_default_validators(self):
-        """Register default validators."""
+        """Register default validators; tool-backed ones are probed on first use."""
         self.register_validator(PythonSyntaxValidator())
         
         # Optional validators (require external tools)
-        try:
-            import mypy
-            self.register_validator(MypyValidator())
-        except ImportError:
-            logger.info("[Validation] mypy not available")
+        self._lazy.update({
+            "mypy": (MypyValidator, _mypy_available),
+            "bandit": (BanditValidator, functools.partial(_tool_available, "bandit")),
+            "black": (BlackValidator, functools.partial(_tool_available, "black")),
+        })
+    
+    def _resolve(self, name: str) -> Optional[BaseValidator]:
+        """Get a validator, registering a lazy one if its tool is installed."""
+        if name in self.validators:
+            return self.validators[name]
+        entry = self._lazy.pop(name, None)
+        if entry is None:
+            return None
         
-        # Check if bandit is available
-        try:
-            subprocess.run(["bandit", "--version"], capture_output=True, check=True)
-            self.register_validator(BanditValidator())
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            logger.info("[Validation] bandit not available")
+        validator_cls, available = entry
+        if not available():
+            logger.info(f"[Validation] {name} not available")
+            return None
+        self.register_validator(validator_cls())
+        return self.validators[name]
+    
+    @asynccontextmanager
+    async def _materialize(
+        self,
+        files: Dict[str, str],
+        validators: List[BaseValidator]
+    ) -> AsyncIterator[Optional[Path]]:
+        """
+        Write the files any of validators reads into one temp directory.
+        
+        Yields:
+            The directory, or None if no validator needs one
+        """
+        if not validators:
+            yield None
+            return
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmppath = Path(tmpdir)
+            await _write_tree(tmppath, {
+                f: c for f, c in files.items()
+                if any(v.matches_file(f) for v in validators)
+            })
+            yield tmppath
+    
+    def shutdown(self):
+        """Stop the mypy daemon and the Node driver if they were started."""
+        from .validators_js import shutdown_node_driver
+        shutdown_node_driver()
         
-        # Check if black is available
+        if "mypy" not in self.validators or not _DMYPY_STATUS_FILE.exists():
+            return
         try:
-            subprocess.run(["black", "--version"], capture_output=True, check=True)
-            self.register_validator(BlackValidator())
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            logger.info("[Validation] black not available")
+            subprocess.run(
+                ["dmypy", "--status-file", str(_DMYPY_STATUS_FILE), "stop"],
+                capture_output=True,
+                timeout=10
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.warning(f"[Validation] Failed to stop dmypy: {e}")
     
     def register_validator(self, validator: BaseValidator):
         """Register a validator."""
+        self._lazy.pop(validator.name, None)
         self.validators[validator.name] = validator
         logger.info(f"[Validation] Registered validator: {validator.name}")
     
@@ -450,11 +892,16 @@ class ValidationService:
         # Determine which validators to run
         if validators:
             active_validators = [
-                self.validators[name]
-                for name in validators
-                if name in self.validators
+                validator
+                for validator in map(self._resolve, validators)
+                if validator is not None
             ]
         else:
+            # Probe the tools of lazy validators that apply to these files
+            for name, (validator_cls, _) in list(self._lazy.items()):
+                if any(validator_cls._pattern_re.match(f) for f in files):
+                    self._resolve(name)
+            
             # Auto-detect based on file patterns
             active_validators = []
             for validator in self.validators.values():
@@ -465,27 +912,155 @@ class ValidationService:
             logger.info("[Validation] No applicable validators found")
             return {}
         
-        logger.info(f"[Validation] Running {len(active_validators)} validators")
+        # Reuse results for content already validated; only the rest is run.
+        # Per-file validators are cached file by file, the others (mypy,
+        # black, tsc) only when their whole file set is unchanged
+        to_run: Dict[str, Dict[str, str]] = {}
+        cached: Dict[str, List[ValidationIssue]] = {}
+        whole: Dict[str, Tuple[bytes, ValidationResult]] = {}
+        file_digests: Dict[str, Dict[str, bytes]] = {}
+        for validator in active_validators:
+            matching = {f: c for f, c in files.items() if validator.matches_file(f)}
+            if validator.per_file:
+                digests = {f: _digest(f, c) for f, c in matching.items()}
+                file_digests[validator.name] = digests
+                cached[validator.name] = []
+                pending = {}
+                for filepath, digest in digests.items():
+                    hit = self._cache_get((validator.name, digest))
+                    if hit is None:
+                        pending[filepath] = matching[filepath]
+                    else:
+                        cached[validator.name].extend(hit)
+                if pending or not matching:
+                    to_run[validator.name] = pending
+            else:
+                digest = _digest_files(matching)
+                hit = self._cache_get((validator.name, digest))
+                if hit is None:
+                    to_run[validator.name] = matching
+                whole[validator.name] = (digest, hit)
+        
+        running = [v for v in active_validators if v.name in to_run]
+        logger.info(
+            f"[Validation] Running {len(running)} validators "
+            f"({len(active_validators) - len(running)} served from cache)"
+        )
         
-        # Run validators in parallel
-        tasks = [validator.validate(files) for validator in active_validators]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Tool-based validators that need every matching file share one copy
+        # of them on disk; ones running on a subset write their own
+        shared = [
+            v for v in running
+            if v.uses_workdir and not (v.per_file and cached[v.name])
+        ]
+        async with self._materialize(files, shared) as workdir:
+            # Run validators in parallel, at most one per core, cheapest
+            # first so quick checks finish while mypy/tsc are still running
+            running.sort(key=lambda v: v.cost)
+            tasks = [
+                self._bounded(
+                    validator,
+                    to_run[validator.name],
+                    workdir if validator in shared else None
+                )
+                for validator in running
+            ]
+            results = dict(zip(
+                [v.name for v in running],
+                await asyncio.gather(*tasks, return_exceptions=True)
+            ))
         
         # Collect results
         validation_results = {}
-        for validator, result in zip(active_validators, results):
+        for validator in active_validators:
+            result = results.get(validator.name)
             if isinstance(result, Exception):
                 logger.error(f"[Validation] {validator.name} failed: {result}")
-                validation_results[validator.name] = ValidationResult(
+                result = ValidationResult(
                     validator=validator.name,
                     passed=False,
                     error=str(result)
                 )
-            else:
-                validation_results[validator.name] = result
+            elif result is not None and result.error is None:
+                self._cache_store(validator, result, to_run[validator.name],
+                                  file_digests.get(validator.name),
+                                  whole.get(validator.name, (None, None))[0])
+            
+            if not validator.per_file:
+                validation_results[validator.name] = result or replace(
+                    whole[validator.name][1], execution_time=0.0
+                )
+                continue
+            
+            # Merge cached issues with those of the files just validated
+            issues = cached[validator.name] + (result.issues if result else [])
+            validation_results[validator.name] = ValidationResult(
+                validator=validator.name,
+                passed=(result is None or result.passed) and not any(
+                    issue.severity == ValidationSeverity.ERROR
+                    for issue in cached[validator.name]
+                ),
+                issues=issues,
+                execution_time=result.execution_time if result else 0.0,
+                error=result.error if result else None
+            )
         
         return validation_results
     
+    async def _bounded(
+        self,
+        validator: BaseValidator,
+        files: Dict[str, str],
+        workdir: Optional[Path]
+    ) -> ValidationResult:
+        """Run a validator once a concurrency slot is free."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(_VALIDATOR_CONCURRENCY)
+        
+        queued = time.monotonic()
+        async with semaphore:
+            logger.debug(
+                f"[Validation] {validator.name} waited "
+                f"{time.monotonic() - queued:.3f}s for a slot"
+            )
+            return await validator.validate(files, workdir=workdir)
+    
+    def _cache_get(self, key: Tuple[str, bytes]):
+        """Look up a cached result, marking it most recently used."""
+        with self._cache_lock:
+            hit = self._issue_cache.get(key)
+            if hit is not None:
+                self._issue_cache.move_to_end(key)
+            return hit
+    
+    def _cache_store(
+        self,
+        validator: BaseValidator,
+        result: ValidationResult,
+        files: Dict[str, str],
+        digests: Optional[Dict[str, bytes]],
+        digest: Optional[bytes]
+    ):
+        """Cache a fresh result: per file for per-file validators, else whole."""
+        if validator.per_file:
+            by_file: Dict[str, List[ValidationIssue]] = {f: [] for f in files}
+            for issue in result.issues:
+                by_file.setdefault(issue.file, []).append(issue)
+            entries = [
+                ((validator.name, digests[f]), by_file[f]) for f in files
+            ]
+        else:
+            entries = [((validator.name, digest), result)]
+        
+        with self._cache_lock:
+            for key, value in entries:
+                self._issue_cache[key] = value
+                self._issue_cache.move_to_end(key)
+            while len(self._issue_cache) > _ISSUE_CACHE_SIZE:
+                self._issue_cache.popitem(last=False)
+    
     async def validate_and_report(
         self,
         files: Dict[str, str],
@@ -525,3 +1100,9 @@ def get_validation_service() -> ValidationService:
     if _validation_service is None:
         _validation_service = ValidationService()
     return _validation_service
+
+
+def shutdown_validation_service():
+    """Release the validation service's background tools, if it was created."""
+    if _validation_service is not None:
+        _validation_service.shutdown()
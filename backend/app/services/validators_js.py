@@ -1,22 +1,194 @@
 """JavaScript/TypeScript validators."""
-import tempfile
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+import asyncio
+import subprocess
+import threading
 import time
-import json
 import re
 
-from .validation import BaseValidator, ValidationResult, ValidationIssue, ValidationSeverity
+import orjson
+
+from .validation import (
+    BaseValidator, CommandError, ValidationResult, ValidationIssue, ValidationSeverity
+)
 from ..core.logging import logger
 
+# tsc diagnostics: path/file.ts(line,col): error TS1234: message
+_TSC_RE = re.compile(r"^(.+?)\((\d+),(\d+)\): (error|warning) TS(\d+): (.+)$", re.M)
+
+_DRIVER_SCRIPT = Path(__file__).with_name("js_driver.mjs")
+
+# ESLint's levels are ValidationSeverity's values
+_ESLINT_SEVERITY = {s.value: s for s in ValidationSeverity}
+
+
+class NodeDriver:
+    """
+    One long-lived Node process running ESLint, Prettier and tsc.
+    
+    Saves each validation a Node start-up and module load per tool. Jobs
+    are sent one at a time; a tool the driver cannot load is reported as
+    unavailable and its validator falls back to the npx CLI.
+    """
+    
+    def __init__(self):
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._unavailable: set = set()  # Job kinds whose tool failed to load
+    
+    async def request(self, kind: str, timeout: int = 60, **job) -> Optional[Dict]:
+        """
+        Run one job on the driver.
+        
+        Args:
+            kind: "eslint", "prettier" or "tsc"
+            timeout: Seconds the job may run before the driver is killed,
+                counted from when it reaches the driver, not while queued
+            job: Job fields (root, config, files)
+            
+        Returns:
+            The driver's reply, or None if the CLI should be used instead
+        """
+        if kind in self._unavailable:
+            return None
+        return await asyncio.to_thread(self._call, kind, job, timeout)
+    
+    def _call(self, kind: str, job: Dict, timeout: float) -> Optional[Dict]:
+        """Send one job and block for its reply, killing the driver on timeout."""
+        with self._lock:
+            timed_out = threading.Event()
+            timer = None
+            try:
+                if self._process is None or self._process.poll() is not None:
+                    self._process = subprocess.Popen(
+                        ["node", str(_DRIVER_SCRIPT)],
+                        stdin=subprocess.PIPE,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.DEVNULL
+                    )
+                process = self._process
+                
+                def kill():
+                    timed_out.set()
+                    process.kill()
+                
+                # Armed only once the job holds the driver, so it never
+                # kills the driver while another caller's job is running
+                timer = threading.Timer(timeout, kill)
+                timer.daemon = True
+                timer.start()
+                self._next_id += 1
+                frame = orjson.dumps({"id": self._next_id, "kind": kind, **job})
+                process.stdin.write(frame + b"\n")
+                process.stdin.flush()
+                line = process.stdout.readline()
+            except FileNotFoundError:
+                logger.info("[Validation] node not available")
+                self._unavailable.update(("eslint", "prettier", "tsc"))
+                return None
+            except OSError as e:
+                if timed_out.is_set():
+                    logger.error(f"[Validation] Node driver timed out on {kind}")
+                else:
+                    logger.warning(f"[Validation] Node driver failed: {e}")
+                self._close()
+                return None
+            finally:
+                if timer is not None:
+                    timer.cancel()
+            
+            if not line:
+                if timed_out.is_set():
+                    logger.error(f"[Validation] Node driver timed out on {kind}")
+                # Driver exited (or was killed on timeout); restart next time
+                self._close()
+                return None
+            
+            reply = orjson.loads(line)
+            if "unavailable" in reply:
+                logger.info(f"[Validation] Node driver cannot load {reply['unavailable']}")
+                self._unavailable.add(kind)
+                return None
+            if "error" in reply:
+                logger.warning(f"[Validation] Node driver {kind} failed: {reply['error']}")
+                return None
+            return reply
+    
+    def _close(self):
+        """Reap the driver process and drop it."""
+        if self._process is not None:
+            self.stop()
+            for pipe in (self._process.stdin, self._process.stdout):
+                try:
+                    pipe.close()
+                except OSError:
+                    pass
+            self._process = None
+    
+    def stop(self):
+        """Kill the driver if it is running."""
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+_node_driver: Optional[NodeDriver] = None
+
+
+def get_node_driver() -> NodeDriver:
+    """Get the shared Node driver (started on its first job)."""
+    global _node_driver
+    if _node_driver is None:
+        _node_driver = NodeDriver()
+    return _node_driver
+
+
+def shutdown_node_driver():
+    """Stop the shared Node driver if one was started."""
+    if _node_driver is not None:
+        _node_driver.stop()
+
+
+def _eslint_issues(results: List[Dict], tmppath: Path) -> List[ValidationIssue]:
+    """Convert ESLint JSON results into issues."""
+    issues = []
+    for file_result in results:
+        if "messages" not in file_result:
+            continue
+        
+        rel_path = Path(file_result["filePath"]).relative_to(tmppath)
+        
+        for message in file_result["messages"]:
+            issues.append(ValidationIssue(
+                file=str(rel_path),
+                line=message.get("line", 0),
+                column=message.get("column", 0),
+                severity=_ESLINT_SEVERITY.get(message.get("severity", 1), ValidationSeverity.WARNING),
+                message=message.get("message", ""),
+                rule=message.get("ruleId", "unknown"),
+                fixable=message.get("fix") is not None
+            ))
+    return issues
+
 
 class ESLintValidator(BaseValidator):
     """ESLint validator for JavaScript/TypeScript."""
     
     name = "eslint"
     file_patterns = ["*.js", "*.jsx", "*.ts", "*.tsx"]
+    uses_workdir = True
+    cost = 2
+    pin_cpu = True
+    per_file = True
     
-    async def validate(self, files: Dict[str, str]) -> ValidationResult:
+    async def validate(
+        self,
+        files: Dict[str, str],
+        workdir: Optional[Path] = None
+    ) -> ValidationResult:
         """Run ESLint validation."""
         start_time = time.time()
         
@@ -29,19 +201,11 @@ class ESLintValidator(BaseValidator):
                 execution_time=time.time() - start_time
             )
         
-        # Create temp directory with files
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmppath = Path(tmpdir)
-            
-            # Write files
-            for filepath, content in js_files.items():
-                file_path = tmppath / filepath
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_text(content, encoding="utf-8")
-            
-            # Create minimal eslintrc
-            eslintrc = tmppath / ".eslintrc.json"
-            eslintrc.write_text(json.dumps({
+        # Use the shared workdir, or write the files to a temp directory
+        async with self._workdir(js_files, workdir) as tmppath:
+            # Create minimal eslintrc (own name: the workdir may hold the project's)
+            eslintrc = tmppath / ".eslintrc.validate.json"
+            eslintrc.write_bytes(orjson.dumps({
                 "env": {
                     "browser": True,
                     "es2021": True,
@@ -56,47 +220,41 @@ class ESLintValidator(BaseValidator):
                     }
                 },
                 "rules": {}
-            }), encoding="utf-8")
-            
-            # Run eslint
-            cmd = [
-                "npx", "eslint",
-                "--format", "json",
-                "--no-error-on-unmatched-pattern",
-                str(tmppath)
-            ]
-            
-            returncode, stdout, stderr = await self._run_command(cmd, tmppath, timeout=60)
+            }))
             
-            # Parse eslint JSON output
             issues = []
+            reply = await get_node_driver().request(
+                "eslint", root=str(tmppath), config=str(eslintrc)
+            )
+            
             try:
-                if stdout:
-                    results = json.loads(stdout)
-                    for file_result in results:
-                        if "messages" not in file_result:
-                            continue
-                        
-                        rel_path = Path(file_result["filePath"]).relative_to(tmppath)
-                        
-                        for message in file_result["messages"]:
-                            severity_map = {
-                                2: ValidationSeverity.ERROR,
-                                1: ValidationSeverity.WARNING,
-                                0: ValidationSeverity.INFO
-                            }
-                            
-                            issues.append(ValidationIssue(
-                                file=str(rel_path),
-                                line=message.get("line", 0),
-                                column=message.get("column", 0),
-                                severity=severity_map.get(message.get("severity", 1), ValidationSeverity.WARNING),
-                                message=message.get("message", ""),
-                                rule=message.get("ruleId", "unknown"),
-                                fixable=message.get("fix") is not None
-                            ))
-            except json.JSONDecodeError:
+                if reply is not None:
+                    issues = _eslint_issues(reply["results"], tmppath)
+                else:
+                    # No driver: run the eslint CLI
+                    cmd = [
+                        "npx", "eslint",
+                        "--no-eslintrc", "--config", str(eslintrc),
+                        "--format", "json",
+                        "--no-error-on-unmatched-pattern",
+                        str(tmppath)
+                    ]
+                    
+                    returncode, stdout, stderr = await self._run_command(
+                        cmd, tmppath, timeout=60, text=False
+                    )
+                    if returncode not in (0, 1):
+                        # 2 is ESLint's config or internal error
+                        raise CommandError(
+                            f"eslint failed: {stderr.strip() or f'exit code {returncode}'}"
+                        )
+                    if stdout:
+                        issues = _eslint_issues(orjson.loads(stdout), tmppath)
+            except CommandError:
+                raise
+            except orjson.JSONDecodeError:
                 logger.warning(f"[ESLint] Failed to parse JSON output")
+                raise CommandError("eslint printed invalid JSON")
             except Exception as e:
                 logger.error(f"[ESLint] Error parsing output: {e}")
             
@@ -115,8 +273,15 @@ class PrettierValidator(BaseValidator):
     
     name = "prettier"
     file_patterns = ["*.js", "*.jsx", "*.ts", "*.tsx", "*.json", "*.css", "*.html"]
+    uses_workdir = True
+    cost = 1
+    pin_cpu = True
     
-    async def validate(self, files: Dict[str, str]) -> ValidationResult:
+    async def validate(
+        self,
+        files: Dict[str, str],
+        workdir: Optional[Path] = None
+    ) -> ValidationResult:
         """Check if code is formatted with Prettier."""
         start_time = time.time()
         
@@ -129,40 +294,44 @@ class PrettierValidator(BaseValidator):
                 execution_time=time.time() - start_time
             )
         
-        # Create temp directory with files
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmppath = Path(tmpdir)
-            
-            # Write files
-            for filepath, content in applicable_files.items():
-                file_path = tmppath / filepath
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_text(content, encoding="utf-8")
-            
-            # Run prettier in check mode
-            cmd = [
-                "npx", "prettier",
-                "--check",
-                "--log-level", "error",
-                str(tmppath)
-            ]
+        # Use the shared workdir, or write the files to a temp directory
+        async with self._workdir(applicable_files, workdir) as tmppath:
+            reply = await get_node_driver().request(
+                "prettier", root=str(tmppath), files=list(applicable_files)
+            )
             
-            returncode, stdout, stderr = await self._run_command(cmd, tmppath, timeout=60)
+            if reply is not None:
+                # The driver reports exactly which files are unformatted
+                unformatted = reply["unformatted"]
+                returncode = 1 if unformatted else 0
+            else:
+                # Run prettier in check mode
+                cmd = [
+                    "npx", "prettier",
+                    "--check",
+                    "--log-level", "error",
+                    # Only this validator's files; the workdir may hold others
+                    *applicable_files
+                ]
+                
+                returncode, stdout, stderr = await self._run_command(cmd, tmppath, timeout=60)
+                if returncode not in (0, 1):
+                    # 2 is Prettier's own error, not a formatting verdict
+                    raise CommandError(f"prettier failed: {stderr.strip() or f'exit code {returncode}'}")
+                # Prettier returns non-zero if files need formatting
+                unformatted = list(applicable_files) if returncode != 0 else []
             
-            # Prettier returns non-zero if files need formatting
             issues = []
-            if returncode != 0:
-                # Try to parse which files need formatting from stderr
-                for filepath in applicable_files.keys():
-                    issues.append(ValidationIssue(
-                        file=filepath,
-                        line=0,
-                        column=0,
-                        severity=ValidationSeverity.WARNING,
-                        message="File would be reformatted by Prettier",
-                        rule="format",
-                        fixable=True
-                    ))
+            for filepath in unformatted:
+                issues.append(ValidationIssue(
+                    file=filepath,
+                    line=0,
+                    column=0,
+                    severity=ValidationSeverity.WARNING,
+                    message="File would be reformatted by Prettier",
+                    rule="format",
+                    fixable=True
+                ))
             
             execution_time = time.time() - start_time
             
@@ -179,8 +348,15 @@ class TypeScriptValidator(BaseValidator):
     
     name = "typescript"
     file_patterns = ["*.ts", "*.tsx"]
+    uses_workdir = True
+    cost = 3
+    pin_cpu = True
     
-    async def validate(self, files: Dict[str, str]) -> ValidationResult:
+    async def validate(
+        self,
+        files: Dict[str, str],
+        workdir: Optional[Path] = None
+    ) -> ValidationResult:
         """Run TypeScript type checking."""
         start_time = time.time()
         
@@ -193,19 +369,11 @@ class TypeScriptValidator(BaseValidator):
                 execution_time=time.time() - start_time
             )
         
-        # Create temp directory with files
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmppath = Path(tmpdir)
-            
-            # Write files
-            for filepath, content in ts_files.items():
-                file_path = tmppath / filepath
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_text(content, encoding="utf-8")
-            
-            # Create minimal tsconfig.json
-            tsconfig = tmppath / "tsconfig.json"
-            tsconfig.write_text(json.dumps({
+        # Use the shared workdir, or write the files to a temp directory
+        async with self._workdir(ts_files, workdir) as tmppath:
+            # Create minimal tsconfig (own name: the workdir may hold the project's)
+            tsconfig = tmppath / "tsconfig.validate.json"
+            tsconfig.write_bytes(orjson.dumps({
                 "compilerOptions": {
                     "target": "ES2020",
                     "module": "ESNext",
@@ -216,41 +384,54 @@ class TypeScriptValidator(BaseValidator):
                     "noEmit": True
                 },
                 "include": ["**/*"]
-            }), encoding="utf-8")
+            }))
             
             # Run tsc
             cmd = [
                 "npx", "tsc",
+                "-p", str(tsconfig),
                 "--noEmit",
                 "--pretty", "false"
             ]
             
-            returncode, stdout, stderr = await self._run_command(cmd, tmppath, timeout=60)
-            
-            # Parse TypeScript compiler output
             issues = []
-            # Format: path/file.ts(line,col): error TS1234: message
-            pattern = r"^(.+?)\((\d+),(\d+)\): (error|warning) TS(\d+): (.+)$"
             
-            output = stdout + stderr
-            for line in output.splitlines():
-                match = re.match(pattern, line)
-                if match:
-                    file, line_num, col, severity, code, message = match.groups()
-                    try:
-                        rel_path = Path(file).relative_to(tmppath)
-                    except ValueError:
-                        rel_path = Path(file)
-                    
-                    issues.append(ValidationIssue(
-                        file=str(rel_path),
-                        line=int(line_num),
-                        column=int(col),
-                        severity=ValidationSeverity.ERROR if severity == "error" else ValidationSeverity.WARNING,
-                        message=message.strip(),
-                        rule=f"TS{code}",
-                        fixable=False
-                    ))
+            def on_line(line: str):
+                match = _TSC_RE.match(line)
+                if not match:
+                    return
+                file, line_num, col, severity, code, message = match.groups()
+                try:
+                    rel_path = Path(file).relative_to(tmppath)
+                except ValueError:
+                    rel_path = Path(file)
+                
+                issues.append(ValidationIssue(
+                    file=str(rel_path),
+                    line=int(line_num),
+                    column=int(col),
+                    severity=ValidationSeverity.ERROR if severity == "error" else ValidationSeverity.WARNING,
+                    message=message.strip(),
+                    rule=f"TS{code}",
+                    fixable=False
+                ))
+            
+            reply = await get_node_driver().request(
+                "tsc", root=str(tmppath), config=str(tsconfig)
+            )
+            
+            if reply is not None:
+                for line in reply["output"].splitlines():
+                    on_line(line)
+                returncode = 1 if reply["failed"] else 0
+            else:
+                # No driver: parse diagnostics as the tsc CLI prints them
+                # (stderr is short; scan it after)
+                returncode, stderr = await self._run_command_streaming(
+                    cmd, tmppath, on_line, timeout=60
+                )
+                for line in stderr.splitlines():
+                    on_line(line)
             
             execution_time = time.time() - start_time
             
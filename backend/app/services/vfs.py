@@ -1,14 +1,72 @@
 """Virtual File System with Git-like version control."""
+import asyncio
+import difflib
 import hashlib
-import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
-from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from dataclasses import dataclass, field, replace
 from enum import Enum
 
+import orjson
+
+from ..core.config import settings
 from ..core.logging import logger
 
+try:
+    import blake3
+except ImportError:  # Optional; hashlib's sha1 (OpenSSL, SHA-NI) is the fallback
+    blake3 = None
+
+# Longest chain of deltas a saved blob may sit behind; caps the work needed to
+# rebuild one blob on load (same idea as git's pack.depth)
+_DELTA_MAX_DEPTH = 50
+
+# Files export_to_disk writes at once
+_EXPORT_CONCURRENCY = 32
+
+
+def _hexdigest(algorithm: str, data: bytes) -> str:
+    """Hash data with the VFS hash algorithm ("blake3" or "sha1")."""
+    if algorithm == "blake3":
+        return blake3.blake3(data).hexdigest()
+    return hashlib.sha1(data).hexdigest()
+
+
+def _default_hash() -> str:
+    """The configured VFS hash, or sha1 when blake3 is not installed."""
+    if settings.VFS_HASH == "blake3" and blake3 is None:
+        return "sha1"
+    return settings.VFS_HASH
+
+
+def _delta_encode(base: str, target: str) -> List:
+    """
+    Encode target as a line delta against base.
+    
+    Returns a list of ops: ``[start, end]`` copies base lines
+    ``start:end``, a string is inserted as-is.
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines)
+    ops: List = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append("".join(target_lines[j1:j2]))
+    return ops
+
+
+def _delta_apply(base: str, ops: List) -> str:
+    """Rebuild content from its base and the ops of ``_delta_encode``."""
+    base_lines = base.splitlines(keepends=True)
+    return "".join(
+        op if isinstance(op, str) else "".join(base_lines[op[0]:op[1]])
+        for op in ops
+    )
+
 
 class FileStatus(str, Enum):
     """File status in VFS."""
@@ -18,9 +76,14 @@ class FileStatus(str, Enum):
     UNCHANGED = "unchanged"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FileNode:
-    """A file in the VFS."""
+    """
+    A file in the VFS.
+    
+    Nodes are immutable: a status change swaps in a copy, so the working
+    tree can hand nodes out without them changing underneath the caller.
+    """
     path: str
     content: str
     status: FileStatus = FileStatus.UNCHANGED
@@ -33,8 +96,8 @@ class FileNode:
             "path": self.path,
             "content": self.content,
             "status": self.status.value,
-            "created_at": self.created_at.isoformat(),
-            "modified_at": self.modified_at.isoformat()
+            "created_at": self.created_at,
+            "modified_at": self.modified_at
         }
     
     @classmethod
@@ -49,13 +112,41 @@ class FileNode:
         )
 
 
+@dataclass(frozen=True, slots=True)
+class CommitEntry:
+    """A file in a commit snapshot; its content lives in the VFS blob store."""
+    path: str
+    blob_sha: str
+    created_at: datetime
+    modified_at: datetime
+    
+    def to_dict(self) -> Dict:
+        """Convert to dictionary."""
+        return {
+            "path": self.path,
+            "blob_sha": self.blob_sha,
+            "created_at": self.created_at,
+            "modified_at": self.modified_at
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CommitEntry":
+        """Create from dictionary."""
+        return cls(
+            path=data["path"],
+            blob_sha=data["blob_sha"],
+            created_at=datetime.fromisoformat(data["created_at"]),
+            modified_at=datetime.fromisoformat(data["modified_at"])
+        )
+
+
 @dataclass
 class Commit:
     """A VFS commit."""
     id: str
     message: str
     timestamp: datetime
-    files: Dict[str, FileNode]
+    files: Dict[str, CommitEntry]
     parent_id: Optional[str] = None
     
     def to_dict(self) -> Dict:
@@ -63,9 +154,9 @@ class Commit:
         return {
             "id": self.id,
             "message": self.message,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp": self.timestamp,
             "parent_id": self.parent_id,
-            "files": {path: node.to_dict() for path, node in self.files.items()}
+            "files": {path: entry.to_dict() for path, entry in self.files.items()}
         }
     
     @classmethod
@@ -76,7 +167,7 @@ class Commit:
             message=data["message"],
             timestamp=datetime.fromisoformat(data["timestamp"]),
             parent_id=data.get("parent_id"),
-            files={path: FileNode.from_dict(node) for path, node in data["files"].items()}
+            files={path: CommitEntry.from_dict(entry) for path, entry in data["files"].items()}
         )
 
 
@@ -97,9 +188,33 @@ class VirtualFileSystem:
         self.project_id = project_id
         self.files: Dict[str, FileNode] = {}  # Current working tree
         self.commits: List[Commit] = []
+        self._commit_by_id: Dict[str, Commit] = {}  # Index over self.commits
+        # Content-addressed store shared by all commits: hash -> content, so a
+        # file unchanged across commits is kept once
+        self._blobs: Dict[str, str] = {}
+        self.hash_algorithm = _default_hash()
         self.current_commit_id: Optional[str] = None
         self.branches: Dict[str, str] = {"main": None}  # branch -> commit_id
         self.current_branch = "main"
+        # Called with the new commit id whenever current_commit_id changes
+        self._commit_listeners: List[Callable[[str], None]] = []
+    
+    def add_commit_listener(self, listener: Callable[[str], None]) -> None:
+        """Call listener(commit_id) after every commit or rollback."""
+        self._commit_listeners.append(listener)
+    
+    def remove_commit_listener(self, listener: Callable[[str], None]) -> None:
+        """Stop notifying a listener added with add_commit_listener."""
+        if listener in self._commit_listeners:
+            self._commit_listeners.remove(listener)
+    
+    def _notify_commit(self) -> None:
+        """Tell listeners current_commit_id changed."""
+        for listener in list(self._commit_listeners):
+            try:
+                listener(self.current_commit_id)
+            except Exception as e:
+                logger.error(f"[VFS] Commit listener failed: {e}")
     
     def write_file(self, path: str, content: str) -> None:
         """Write or update a file in the VFS."""
@@ -128,7 +243,7 @@ class VirtualFileSystem:
     def delete_file(self, path: str) -> None:
         """Mark a file as deleted."""
         if path in self.files:
-            self.files[path].status = FileStatus.DELETED
+            self.files[path] = replace(self.files[path], status=FileStatus.DELETED)
     
     def get_changed_files(self) -> Dict[str, FileNode]:
         """Get all files with changes."""
@@ -138,23 +253,44 @@ class VirtualFileSystem:
             if node.status != FileStatus.UNCHANGED
         }
     
+    def _put_blob(self, content: str) -> str:
+        """Store content in the blob store and return its sha."""
+        sha = _hexdigest(self.hash_algorithm, content.encode("utf-8"))
+        if sha not in self._blobs:
+            self._blobs[sha] = content
+        return sha
+    
     def commit(self, message: str) -> str:
         """Create a commit snapshot."""
-        commit_id = hashlib.sha1(
+        commit_id = _hexdigest(
+            self.hash_algorithm,
             f"{self.project_id}-{datetime.utcnow().isoformat()}".encode()
-        ).hexdigest()[:8]
+        )[:8]
         
-        # Deep copy current files
+        # Snapshot blob references, not content. Unchanged files reuse the
+        # parent's entry, so only changed files are hashed. The same pass
+        # drops deleted files and marks the rest unchanged
+        parent = self._commit_by_id.get(self.current_commit_id)
+        parent_files = parent.files if parent else {}
         snapshot = {}
+        files = {}
         for path, node in self.files.items():
-            if node.status != FileStatus.DELETED:
-                snapshot[path] = FileNode(
+            if node.status == FileStatus.DELETED:
+                continue
+            entry = parent_files.get(path) if node.status == FileStatus.UNCHANGED else None
+            if entry is None:
+                entry = CommitEntry(
                     path=node.path,
-                    content=node.content,
-                    status=FileStatus.UNCHANGED,  # Reset status
+                    blob_sha=self._put_blob(node.content),
                     created_at=node.created_at,
                     modified_at=node.modified_at
                 )
+            snapshot[path] = entry
+            # Only nodes that actually changed are copied
+            if node.status != FileStatus.UNCHANGED:
+                node = replace(node, status=FileStatus.UNCHANGED)
+            files[path] = node
+        self.files = files
         
         commit = Commit(
             id=commit_id,
@@ -165,41 +301,35 @@ class VirtualFileSystem:
         )
         
         self.commits.append(commit)
+        self._commit_by_id[commit_id] = commit
         self.current_commit_id = commit_id
         self.branches[self.current_branch] = commit_id
         
-        # Mark all files as unchanged
-        for node in self.files.values():
-            if node.status != FileStatus.DELETED:
-                node.status = FileStatus.UNCHANGED
-        
-        # Remove deleted files
-        self.files = {path: node for path, node in self.files.items() 
-                     if node.status != FileStatus.DELETED}
-        
         logger.info(f"[VFS] Created commit {commit_id}: {message}")
+        self._notify_commit()
         return commit_id
     
     def rollback(self, commit_id: str) -> bool:
         """Rollback to a specific commit."""
-        commit = next((c for c in self.commits if c.id == commit_id), None)
+        commit = self._commit_by_id.get(commit_id)
         if not commit:
             logger.error(f"[VFS] Commit {commit_id} not found")
             return False
         
         # Restore files from commit
         self.files = {}
-        for path, node in commit.files.items():
+        for path, entry in commit.files.items():
             self.files[path] = FileNode(
-                path=node.path,
-                content=node.content,
+                path=entry.path,
+                content=self._blobs[entry.blob_sha],
                 status=FileStatus.UNCHANGED,
-                created_at=node.created_at,
-                modified_at=node.modified_at
+                created_at=entry.created_at,
+                modified_at=entry.modified_at
             )
         
         self.current_commit_id = commit_id
         logger.info(f"[VFS] Rolled back to commit {commit_id}")
+        self._notify_commit()
         return True
     
     def get_diff(self, from_commit: Optional[str] = None) -> Dict[str, Dict]:
@@ -214,7 +344,7 @@ class VirtualFileSystem:
                 for path, node in self.files.items()
             }
         
-        old_commit = next((c for c in self.commits if c.id == from_commit), None)
+        old_commit = self._commit_by_id.get(from_commit)
         if not old_commit:
             logger.error(f"[VFS] Commit {from_commit} not found")
             return {}
@@ -226,10 +356,12 @@ class VirtualFileSystem:
         for path, node in self.files.items():
             if path not in old_files:
                 diff[path] = {"status": "added", "content": node.content}
-            elif old_files[path].content != node.content:
+                continue
+            old_content = self._blobs[old_files[path].blob_sha]
+            if old_content != node.content:
                 diff[path] = {
                     "status": "modified",
-                    "old_content": old_files[path].content,
+                    "old_content": old_content,
                     "new_content": node.content
                 }
         
@@ -267,19 +399,31 @@ class VirtualFileSystem:
         logger.info(f"[VFS] Switched to branch {branch_name}")
         return True
     
-    def export_to_disk(self, base_path: Path) -> None:
-        """Export VFS to disk."""
-        base_path.mkdir(parents=True, exist_ok=True)
+    async def export_to_disk(self, base_path: Path) -> None:
+        """Export VFS to disk without blocking the event loop."""
+        files = [
+            (base_path / path, node.content)
+            for path, node in self.files.items()
+            if node.status != FileStatus.DELETED
+        ]
         
-        for path, node in self.files.items():
-            if node.status == FileStatus.DELETED:
-                continue
-            
-            file_path = base_path / path
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            file_path.write_text(node.content, encoding="utf-8")
+        def make_dirs() -> None:
+            # Create each directory once, not once per file in it
+            for directory in {base_path, *(file_path.parent for file_path, _ in files)}:
+                directory.mkdir(parents=True, exist_ok=True)
+        
+        await asyncio.to_thread(make_dirs)
         
-        logger.info(f"[VFS] Exported {len(self.files)} files to {base_path}")
+        # Overlap the writes on worker threads, a bounded number at a time
+        semaphore = asyncio.Semaphore(_EXPORT_CONCURRENCY)
+        
+        async def write(file_path: Path, content: str) -> None:
+            async with semaphore:
+                await asyncio.to_thread(file_path.write_text, content, encoding="utf-8")
+        
+        await asyncio.gather(*(write(file_path, content) for file_path, content in files))
+        
+        logger.info(f"[VFS] Exported {len(files)} files to {base_path}")
     
     def import_from_disk(self, base_path: Path) -> None:
         """Import files from disk into VFS."""
@@ -291,6 +435,59 @@ class VirtualFileSystem:
         
         logger.info(f"[VFS] Imported {len(self.files)} files from {base_path}")
     
+    def _pack_blobs(self) -> Dict[str, object]:
+        """
+        Serialize the blob store, delta-compressing history.
+        
+        A blob a commit introduces is written as a delta against the blob
+        at the same path in the parent commit when that is smaller than
+        the full content, so a commit that edits a few lines of a file
+        only costs those lines on disk.
+        
+        Returns:
+            sha -> content, or sha -> {"base": sha, "delta": ops}
+        """
+        packed: Dict[str, object] = {}
+        depth: Dict[str, int] = {}
+        # Commits are appended after their parent, so a delta's base is
+        # always packed before it
+        for commit in self.commits:
+            parent = self._commit_by_id.get(commit.parent_id)
+            for path, entry in commit.files.items():
+                sha = entry.blob_sha
+                if sha in packed:
+                    continue
+                content = self._blobs[sha]
+                packed[sha] = content
+                depth[sha] = 0
+                base = parent.files.get(path) if parent else None
+                if base is None or depth[base.blob_sha] >= _DELTA_MAX_DEPTH:
+                    continue
+                ops = _delta_encode(self._blobs[base.blob_sha], content)
+                if len(orjson.dumps(ops)) < len(orjson.dumps(content)):
+                    packed[sha] = {"base": base.blob_sha, "delta": ops}
+                    depth[sha] = depth[base.blob_sha] + 1
+        return packed
+    
+    @staticmethod
+    def _unpack_blobs(packed: Dict[str, object]) -> Dict[str, str]:
+        """Rebuild full blob contents from ``_pack_blobs`` output."""
+        blobs: Dict[str, str] = {}
+        for sha in packed:
+            # Walk down to the nearest resolved base, then apply the deltas
+            # back up; chains are at most _DELTA_MAX_DEPTH long
+            chain = []
+            while sha not in blobs and isinstance(packed[sha], dict):
+                chain.append(sha)
+                sha = packed[sha]["base"]
+            content = blobs.get(sha)
+            if content is None:
+                content = blobs[sha] = packed[sha]
+            for delta_sha in reversed(chain):
+                content = _delta_apply(content, packed[delta_sha]["delta"])
+                blobs[delta_sha] = content
+        return blobs
+    
     def save_to_json(self, file_path: Path) -> None:
         """Save VFS state to JSON file."""
         data = {
@@ -299,24 +496,40 @@ class VirtualFileSystem:
             "current_commit_id": self.current_commit_id,
             "branches": self.branches,
             "files": {path: node.to_dict() for path, node in self.files.items()},
+            "hash": self.hash_algorithm,
+            "blobs": self._pack_blobs(),
             "commits": [commit.to_dict() for commit in self.commits]
         }
         
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        file_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        # orjson writes the datetimes in to_dict() natively, in the same
+        # isoformat() layout from_dict() parses
+        file_path.write_bytes(orjson.dumps(data))
         logger.info(f"[VFS] Saved state to {file_path}")
     
     @classmethod
     def load_from_json(cls, file_path: Path) -> "VirtualFileSystem":
         """Load VFS state from JSON file."""
-        data = json.loads(file_path.read_text(encoding="utf-8"))
+        data = orjson.loads(file_path.read_bytes())
         
         vfs = cls(data["project_id"])
         vfs.current_branch = data["current_branch"]
         vfs.current_commit_id = data.get("current_commit_id")
         vfs.branches = data["branches"]
         vfs.files = {path: FileNode.from_dict(node) for path, node in data["files"].items()}
+        # Keep hashing like the saved blobs so unchanged content still dedupes;
+        # saves without a "hash" field predate the setting and used sha1
+        saved_hash = data.get("hash", "sha1")
+        if saved_hash == "sha1" or blake3 is not None:
+            vfs.hash_algorithm = saved_hash
+        vfs._blobs = cls._unpack_blobs(data.get("blobs", {}))
+        for commit in data["commits"]:
+            # Older saves kept each snapshot's content inline
+            for entry in commit["files"].values():
+                if "blob_sha" not in entry:
+                    entry["blob_sha"] = vfs._put_blob(entry.pop("content"))
         vfs.commits = [Commit.from_dict(commit) for commit in data["commits"]]
+        vfs._commit_by_id = {commit.id: commit for commit in vfs.commits}
         
         logger.info(f"[VFS] Loaded state from {file_path}")
         return vfs
@@ -17,29 +17,49 @@ _commit_callbacks: Dict[int, Set[Callable]] = {}
 class VFSWatcher:
     """Watches VFS for commits and triggers preview updates."""
     
-    def __init__(self, project_id: int, poll_interval: float = 1.0):
+    def __init__(self, project_id: int):
         self.project_id = project_id
-        self.poll_interval = poll_interval
         self.vfs: Optional[VFS] = None
         self.last_commit_id: Optional[str] = None
         self.running = False
+        self._changed = asyncio.Event()
     
-    async def start(self):
-        """Start watching VFS for changes."""
+    def _subscribe(self):
+        """Start receiving commit notifications (call on the event loop)."""
+        # The VFS pushes commits to us instead of being polled; commits may
+        # come from another thread, so hop onto the loop to set the event
+        loop = asyncio.get_running_loop()
         self.vfs = get_vfs(self.project_id)
         self.last_commit_id = self.vfs.current_commit_id
+        self._on_commit = lambda commit_id: loop.call_soon_threadsafe(self._changed.set)
+        self.vfs.add_commit_listener(self._on_commit)
+    
+    def _unsubscribe(self):
+        """Stop receiving commit notifications."""
+        if self.vfs is not None:
+            self.vfs.remove_commit_listener(self._on_commit)
+    
+    async def start(self):
+        """Start watching VFS for changes."""
+        if self.vfs is None:
+            self._subscribe()
         self.running = True
         
         logger.info(f"🔍 Started VFS watcher for project {self.project_id}")
         
-        while self.running:
-            try:
-                await asyncio.sleep(self.poll_interval)
-                await self._check_for_changes()
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"VFS watcher error for project {self.project_id}: {e}")
+        try:
+            while self.running:
+                try:
+                    await self._changed.wait()
+                    self._changed.clear()
+                    if self.running:
+                        await self._check_for_changes()
+                except asyncio.CancelledError:
+                    break
+                except Exception as e:
+                    logger.error(f"VFS watcher error for project {self.project_id}: {e}")
+        finally:
+            self._unsubscribe()
         
         logger.info(f"🔍 Stopped VFS watcher for project {self.project_id}")
     
@@ -98,14 +118,15 @@ class VFSWatcher:
     def stop(self):
         """Stop watching."""
         self.running = False
+        self._changed.set()
 
 
-def start_vfs_watcher(project_id: int, poll_interval: float = 1.0) -> asyncio.Task:
+def start_vfs_watcher(project_id: int, poll_interval: Optional[float] = None) -> asyncio.Task:
     """Start VFS watcher for a project.
     
     Args:
         project_id: Project ID to watch
-        poll_interval: Polling interval in seconds
+        poll_interval: Unused; the VFS notifies the watcher on each commit
         
     Returns:
         asyncio.Task running the watcher
@@ -114,8 +135,11 @@ def start_vfs_watcher(project_id: int, poll_interval: float = 1.0) -> asyncio.Ta
     stop_vfs_watcher(project_id)
     
     # Create and start new watcher
-    watcher = VFSWatcher(project_id, poll_interval)
+    watcher = VFSWatcher(project_id)
+    # Subscribe before the task first runs so an immediate commit isn't missed
+    watcher._subscribe()
     task = asyncio.create_task(watcher.start())
+    task.add_done_callback(lambda _: watcher._unsubscribe())
     _watchers[project_id] = task
     
     logger.info(f"✅ VFS watcher started for project {project_id}")
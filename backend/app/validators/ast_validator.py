@@ -1,11 +1,48 @@
 import ast
-from typing import Tuple
+import hashlib
+from typing import Dict, Tuple
+
+_CACHE_SIZE = 1024
+_results: Dict[bytes, Tuple[bool, str | None]] = {}
+# Trees are far bigger than verdicts; keep just enough for the patcher to
+# reuse the old/new pair it parses across analyze, generate and apply
+_TREE_CACHE_SIZE = 8
+_trees: Dict[bytes, ast.Module] = {}
+
+
+def _source_key(content: str) -> bytes:
+    """Short digest of the source so the cache doesn't hold whole files as keys."""
+    return hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _remember(cache: Dict, key: bytes, value, size: int = _CACHE_SIZE) -> None:
+    if len(cache) >= size:
+        del cache[next(iter(cache))]
+    cache[key] = value
+
+
+def parse_python(content: str) -> ast.Module:
+    """Parse source, reusing the tree for content seen before. Callers must not mutate it."""
+    key = _source_key(content)
+    tree = _trees.get(key)
+    if tree is None:
+        tree = ast.parse(content)
+        _remember(_trees, key, tree, _TREE_CACHE_SIZE)
+    return tree
 
 
 def validate_python_code(content: str) -> Tuple[bool, str | None]:
     """Return (is_valid, error_message)."""
+    key = _source_key(content)
+    cached = _results.get(key)
+    if cached is not None:
+        return cached
+
     try:
-        ast.parse(content)
-        return True, None
+        compile(content, "<validate>", "exec", flags=ast.PyCF_ONLY_AST)
+        result = (True, None)
     except SyntaxError as e:
-        return False, f"SyntaxError: {e.msg} at line {e.lineno}:{e.offset}"
+        result = (False, f"SyntaxError: {e.msg} at line {e.lineno}:{e.offset}")
+
+    _remember(_results, key, result)
+    return result
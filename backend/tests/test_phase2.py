@@ -3,6 +3,7 @@ import pytest
 from pathlib import Path
 import tempfile
 import shutil
+import json
 
 from app.services.vfs import VirtualFileSystem, FileStatus, get_vfs, clear_vfs
 from app.services.ast_patcher import (
@@ -55,7 +56,42 @@ class TestVirtualFileSystem:
         success = self.vfs.rollback(commit1)
         assert success
         assert self.vfs.read_file("file1.py") == "version 1"
-    
+
+    def test_commits_share_unchanged_blobs(self):
+        """Test unchanged files are stored once across commits."""
+        self.vfs.write_file("shared.py", "x = 1")
+        self.vfs.write_file("edited.py", "version 1")
+        commit1 = self.vfs.commit("First commit")
+
+        shared_node = self.vfs.files["shared.py"]
+        self.vfs.write_file("edited.py", "version 2")
+        self.vfs.commit("Second commit")
+
+        first, second = self.vfs.commits
+        assert first.files["shared.py"] is second.files["shared.py"]
+        assert self.vfs.files["shared.py"] is shared_node
+        assert len(self.vfs._blobs) == 3
+
+        assert self.vfs.rollback(commit1)
+        assert self.vfs.read_file("edited.py") == "version 1"
+        assert self.vfs.read_file("shared.py") == "x = 1"
+
+    def test_commit_listeners(self):
+        """Test listeners hear about commits and rollbacks."""
+        seen = []
+        self.vfs.add_commit_listener(seen.append)
+
+        self.vfs.write_file("file1.py", "version 1")
+        commit1 = self.vfs.commit("First commit")
+        self.vfs.write_file("file1.py", "version 2")
+        commit2 = self.vfs.commit("Second commit")
+        self.vfs.rollback(commit1)
+        assert seen == [commit1, commit2, commit1]
+
+        self.vfs.remove_commit_listener(seen.append)
+        self.vfs.commit("Third commit")
+        assert len(seen) == 3
+
     def test_diff_generation(self):
         """Test diff between commits."""
         self.vfs.write_file("file1.py", "original")
@@ -87,7 +123,7 @@ class TestVirtualFileSystem:
         assert success
         assert self.vfs.current_branch == "feature"
     
-    def test_export_to_disk(self):
+    async def test_export_to_disk(self):
         """Test exporting VFS to disk."""
         with tempfile.TemporaryDirectory() as tmpdir:
             tmppath = Path(tmpdir)
@@ -95,7 +131,7 @@ class TestVirtualFileSystem:
             self.vfs.write_file("test.py", "print('test')")
             self.vfs.write_file("subdir/file.py", "# subdir")
             
-            self.vfs.export_to_disk(tmppath)
+            await self.vfs.export_to_disk(tmppath)
             
             assert (tmppath / "test.py").exists()
             assert (tmppath / "subdir" / "file.py").exists()
@@ -135,7 +171,44 @@ class TestVirtualFileSystem:
             assert loaded_vfs.project_id == self.vfs.project_id
             assert loaded_vfs.read_file("test.py") == "print('test')"
             assert len(loaded_vfs.commits) == 1
-    
+
+    def test_save_delta_compresses_history(self):
+        """Test edited files are saved as deltas and restored on load."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            json_path = Path(tmpdir) / "vfs.json"
+            lines = [f"line_{i} = {i}\n" for i in range(100)]
+
+            self.vfs.write_file("big.py", "".join(lines))
+            commit1 = self.vfs.commit("Initial")
+            for version in range(3):
+                lines[50] = f"line_50 = 'v{version}'\n"
+                self.vfs.write_file("big.py", "".join(lines))
+                self.vfs.commit(f"Edit {version}")
+
+            self.vfs.save_to_json(json_path)
+            blobs = json.loads(json_path.read_text())["blobs"]
+            assert sum(isinstance(blob, dict) for blob in blobs.values()) == 3
+
+            loaded_vfs = VirtualFileSystem.load_from_json(json_path)
+            assert loaded_vfs._blobs == self.vfs._blobs
+            assert loaded_vfs.rollback(commit1)
+            assert loaded_vfs.read_file("big.py") == self.vfs._blobs[
+                self.vfs.commits[0].files["big.py"].blob_sha
+            ]
+
+    def test_load_keeps_saved_hash(self):
+        """Test a loaded VFS keeps hashing blobs like its saved ones."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            json_path = Path(tmpdir) / "vfs.json"
+            self.vfs.hash_algorithm = "sha1"
+            self.vfs.write_file("test.py", "print('test')")
+            self.vfs.commit("Initial")
+            self.vfs.save_to_json(json_path)
+
+            loaded_vfs = VirtualFileSystem.load_from_json(json_path)
+            assert loaded_vfs.hash_algorithm == "sha1"
+            assert loaded_vfs._put_blob("print('test')") in self.vfs._blobs
+
     def test_get_status(self):
         """Test VFS status reporting."""
         self.vfs.write_file("file1.py", "content")
@@ -1,15 +1,24 @@
 """Tests for Phase 3: Validation Pipeline."""
 import pytest
 import asyncio
+import sys
 from pathlib import Path
 
 from app.services.validation import (
     get_validation_service,
+    BaseValidator,
+    ValidationResult,
     ValidationService,
     PythonSyntaxValidator,
     ValidationSeverity
 )
-from app.services.test_runner import get_test_service, TestExecutionService
+from app.services.test_runner import (
+    get_test_service,
+    TestExecutionService,
+    PytestRunner,
+    _project_dir
+)
+import app.services.test_runner as test_runner
 
 
 # Mark all tests as asyncio
@@ -136,6 +145,58 @@ class TestValidationService:
         assert result.error_count >= 1
         assert result.execution_time > 0
 
+    @pytest.mark.asyncio
+    async def test_validation_cache_reuses_unchanged_files(self):
+        """Test unchanged files are served from the result cache."""
+        service = ValidationService()
+
+        files = {
+            "cached_good.py": "x = 1",
+            "cached_bad.py": "def foo(\n"
+        }
+
+        first = await service.validate_files(files, validators=["python-syntax"])
+        second = await service.validate_files(files, validators=["python-syntax"])
+
+        assert second["python-syntax"].execution_time == 0.0
+        assert not second["python-syntax"].passed
+        assert second["python-syntax"].error_count == first["python-syntax"].error_count
+
+        # Fixing the broken file revalidates only that file
+        files["cached_bad.py"] = "def foo():\n    pass\n"
+        third = await service.validate_files(files, validators=["python-syntax"])
+        assert third["python-syntax"].passed
+        assert third["python-syntax"].error_count == 0
+
+    @pytest.mark.asyncio
+    async def test_timed_out_tool_is_not_cached(self, tmp_path):
+        """Test a tool that timed out is run again instead of served from cache."""
+        class SlowValidator(BaseValidator):
+            name = "slow"
+            file_patterns = ["*.py"]
+            per_file = True
+            runs = 0
+
+            async def validate(self, files, workdir=None):
+                SlowValidator.runs += 1
+                await self._run_command(
+                    [sys.executable, "-c", "import time; time.sleep(10)"],
+                    tmp_path, timeout=0.2
+                )
+                return ValidationResult(validator=self.name, passed=True)
+
+        service = ValidationService()
+        service.register_validator(SlowValidator())
+        files = {"slow.py": "x = 1"}
+
+        first = await service.validate_files(files, validators=["slow"])
+        second = await service.validate_files(files, validators=["slow"])
+
+        assert SlowValidator.runs == 2
+        assert not first["slow"].passed
+        assert "timed out" in first["slow"].error
+        assert second["slow"].error is not None
+
 
 class TestTestRunner:
     """Test test execution service."""
@@ -198,6 +259,71 @@ def test_subtraction():
         assert result.total_tests == 0
 
 
+    @pytest.mark.asyncio
+    async def test_pytest_spare_worker_shutdown(self):
+        """Test the warm spare interpreter is stopped on shutdown."""
+        runner = PytestRunner()
+        worker = runner._take_worker()
+        worker.kill()
+        worker.wait()
+        
+        spare = runner._spare
+        assert spare is not None and spare.args[0] == sys.executable
+        
+        runner.shutdown()
+        assert runner._spare is None
+        assert spare.poll() is not None
+    
+    @pytest.mark.asyncio
+    async def test_cached_project_tree_is_reset(self):
+        """Test a reused project tree drops files the previous run created."""
+        files = {
+            "pkg/mod.py": "x = 1\n",
+            "test_reset.py": "def test_x(): pass\n"
+        }
+        
+        async with _project_dir(files) as first:
+            (first / "leftover.db").write_text("state")
+            (first / "pkg" / "__pycache__").mkdir()
+            (first / "output").mkdir()
+        
+        async with _project_dir(files) as second:
+            assert second == first
+            entries = sorted(str(p.relative_to(second)) for p in second.rglob("*"))
+            assert entries == ["pkg", "pkg/mod.py", "test_reset.py"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_project_trees_are_not_leaked(self):
+        """Test overlapping runs of the same files leave one cached tree."""
+        files = {"test_overlap.py": "def test_x(): pass\n"}
+        
+        async with _project_dir(files) as first:
+            async with _project_dir(files) as second:
+                assert second != first
+            assert second.exists()
+        
+        assert first.exists()
+        assert not second.exists()
+
+    @pytest.mark.asyncio
+    async def test_project_tree_space_limits(self, monkeypatch, tmp_path):
+        """Test full scratch space falls back to the temp dir and big trees are not kept."""
+        files = {"test_big.py": "x = 1\n" * 1000}
+        
+        class Full:
+            f_bavail = 0
+            f_frsize = 4096
+        
+        monkeypatch.setattr(test_runner, "_SCRATCH_ROOT", str(tmp_path))
+        monkeypatch.setattr(test_runner.os, "statvfs", lambda path: Full)
+        monkeypatch.setattr(test_runner, "_MATERIALIZE_CACHE_BYTES", 1024)
+        
+        async with _project_dir(files) as tree:
+            assert tmp_path not in tree.parents
+        
+        assert not tree.exists()
+
+
 class TestValidationIntegration:
     """Test validation integration with workflow."""
     
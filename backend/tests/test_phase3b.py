@@ -3,11 +3,15 @@ import asyncio
 import pytest
 import tempfile
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 
+from docker.errors import NotFound
+
+from app.core.config import settings
 from app.services.preview import (
     PreviewService,
     PreviewEnvironment,
+    get_docker_client,
     get_preview_service,
 )
 from app.services.vfs import get_vfs, clear_vfs
@@ -20,8 +24,10 @@ from app.services.vfs_watcher import (
 
 # Mock Docker to avoid requiring Docker in tests
 @pytest.fixture
-def mock_docker():
+def mock_docker(tmp_path, monkeypatch):
     """Mock Docker client."""
+    # Preview sources are written under WORK_DIR; keep them out of the tree
+    monkeypatch.setattr(settings, "WORK_DIR", str(tmp_path))
     with patch("app.services.preview.docker") as mock_docker:
         # Mock client
         mock_client = MagicMock()
@@ -43,8 +49,19 @@ def mock_docker():
         # Mock image build
         mock_image = MagicMock()
         mock_client.images.build.return_value = (mock_image, [{"stream": "Step 1/5"}])
-        
-        yield mock_client
+        mock_client.api.build.return_value = [{"stream": "Step 1/5\n"}]
+        
+        # The app in the container answers HTTP immediately
+        mock_reader = MagicMock()
+        mock_reader.read = AsyncMock(return_value=b"H")
+        mock_writer = MagicMock()
+        mock_writer.drain = AsyncMock()
+        mock_writer.wait_closed = AsyncMock()
+        with patch(
+            "app.services.preview.asyncio.open_connection",
+            AsyncMock(return_value=(mock_reader, mock_writer))
+        ):
+            yield mock_client
 
 
 class TestPreviewEnvironment:
@@ -180,6 +197,26 @@ def root():
         assert preview.status in ("creating", "running")
         assert len(preview.logs) > 0
     
+    async def test_base_images_built_on_first_use(self, mock_docker):
+        """Test base images are built lazily, not by the constructor."""
+        # The Docker client is cached across tests, so configure that one
+        client = get_docker_client()
+        client.images.get.side_effect = NotFound("missing")
+        client.images.build.reset_mock()
+        try:
+            service = PreviewService()
+            client.images.build.assert_not_called()
+            
+            files = {"index.html": "<html><body>Hello</body></html>"}
+            await service.create_preview(1, files)
+            await service.create_preview(2, files)
+            
+            # One build for the static stack, shared by both previews
+            assert client.images.build.call_count == 1
+            assert client.images.build.call_args.kwargs["tag"].endswith(":static")
+        finally:
+            client.images.get.side_effect = None
+    
     async def test_create_preview_from_vfs(self, mock_docker):
         """Test creating preview from VFS."""
         service = PreviewService()
@@ -228,6 +265,76 @@ def root():
         retrieved = service.get_preview(1)
         assert retrieved is None
     
+    async def test_preview_ports_released(self, mock_docker):
+        """Test replaced and failed previews give their ports back."""
+        service = PreviewService()
+        for project_id in (3, 4):
+            await service.stop_preview(project_id)
+        free = len(service._free_ports)
+        files = {"index.html": "<html><body>Test</body></html>"}
+        
+        # Replacing a project's preview stops the old one first
+        await service.create_preview(3, files)
+        await service.create_preview(3, files)
+        assert len(service._free_ports) == free - 1
+        
+        client = get_docker_client()
+        client.containers.run.side_effect = RuntimeError("boom")
+        try:
+            preview = await service.create_preview(4, files)
+        finally:
+            client.containers.run.side_effect = None
+        assert preview.status == "error"
+        assert len(service._free_ports) == free - 1
+        
+        # A container that could not be removed keeps its port until a
+        # retried stop succeeds
+        client.containers.get.side_effect = RuntimeError("daemon down")
+        try:
+            assert not await service.stop_preview(3)
+        finally:
+            client.containers.get.side_effect = None
+        assert len(service._free_ports) == free - 1
+        assert service.get_preview(3).port is not None
+        assert await service.stop_preview(3)
+        assert len(service._free_ports) == free
+        
+        # A container that is already gone frees its port too
+        await service.create_preview(3, files)
+        client.containers.get.side_effect = NotFound("gone")
+        try:
+            assert await service.stop_preview(3)
+        finally:
+            client.containers.get.side_effect = None
+        assert len(service._free_ports) == free
+    
+    async def test_stranded_container_sweep(self, mock_docker):
+        """Test the sweep spares registered and recently created containers."""
+        import time
+        
+        service = PreviewService()
+        preview = await service.create_preview(5, {"index.html": "<p>x</p>"})
+        
+        def container(preview_id, age):
+            c = MagicMock()
+            c.attrs = {"Labels": {"preview_id": preview_id}, "Created": time.time() - age}
+            return c
+        
+        registered = container(preview.preview_id, 3600)
+        fresh = container("in-flight", 5)
+        stranded = container("lost", 3600)
+        client = get_docker_client()
+        client.containers.list.return_value = [registered, fresh, stranded]
+        try:
+            await service.cleanup_expired_previews()
+        finally:
+            client.containers.list.return_value = MagicMock()
+            await service.stop_preview(5)
+        
+        stranded.remove.assert_called_once_with(force=True)
+        registered.remove.assert_not_called()
+        fresh.remove.assert_not_called()
+    
     async def test_update_preview(self, mock_docker):
         """Test updating preview (hot reload)."""
         service = PreviewService()
@@ -243,6 +350,39 @@ def root():
         assert preview_v2.project_id == 1
         assert "Updating preview" in " ".join(preview_v2.logs) or "Creating preview" in " ".join(preview_v2.logs)
     
+    def test_build_context_tar(self):
+        """Test packing files into an in-memory build context."""
+        import tarfile
+        from app.services.preview import _tar_context
+        
+        files = {"Dockerfile": "FROM nginx:alpine\n", "src/index.html": "<p>héllo</p>"}
+        with tarfile.open(fileobj=_tar_context(files)) as tf:
+            assert sorted(tf.getnames()) == ["Dockerfile", "src/index.html"]
+            assert tf.extractfile("src/index.html").read().decode("utf-8") == "<p>héllo</p>"
+    
+    async def test_update_preview_hot_reload(self, mock_docker):
+        """Test updating a hot-reload preview syncs files without recreating it."""
+        from app.services.preview import _preview_dir
+        
+        service = PreviewService()
+        files_v1 = {
+            "main.py": "print('v1')",
+            "requirements.txt": "fastapi==0.110.0"
+        }
+        preview_v1 = await service.create_preview(1, files_v1)
+        assert preview_v1.hot_reload
+        
+        files_v2 = {**files_v1, "main.py": "print('v2')"}
+        preview_v2 = await service.update_preview(1, files_v2)
+        
+        assert preview_v2.preview_id == preview_v1.preview_id
+        assert "Hot reloaded 1 changed files" in " ".join(preview_v2.logs)
+        site_dir = _preview_dir(preview_v2.preview_id)
+        assert (site_dir / "main.py").read_text() == "print('v2')"
+        
+        await service.stop_preview(1)
+        assert not site_dir.exists()
+    
     def test_get_preview_logs(self, mock_docker):
         """Test getting preview logs."""
         service = PreviewService()
@@ -2,6 +2,7 @@
 import pytest
 from pathlib import Path
 
+import app.services.memory as memory_module
 from app.services.memory import (
     ProjectMemory,
     get_project_memory,
@@ -11,6 +12,18 @@ from app.services.memory import (
 )
 
 
+@pytest.fixture(autouse=True, scope="module")
+def memory_dir(tmp_path_factory):
+    """Keep the persisted Chroma database and preference tables out of the tree."""
+    root = tmp_path_factory.mktemp("memory")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(memory_module, "_PERSIST_DIR", root / "chroma")
+        mp.setattr(memory_module, "_PREFS_DIR", root)
+        mp.setattr(memory_module, "_chroma_client", None)
+        mp.setattr(memory_module, "_project_memories", {})
+        yield root
+
+
 class TestEmbeddingModel:
     """Test embedding model initialization."""
     
@@ -181,6 +194,24 @@ def hello_world():
         assert len(python_results) > 0
         assert all(r["metadata"]["language"] == "python" for r in python_results)
     
+    def test_get_preference_exact_lookup(self):
+        """Test exact preference lookups and their persistence."""
+        memory = ProjectMemory(project_id=999)
+        
+        memory.store_preference("ui_framework", "React", category="frontend")
+        memory.store_preferences({"database": "PostgreSQL"}, category="backend")
+        
+        assert memory.get_preference("ui_framework", category="frontend") == "React"
+        assert memory.get_preference("database", category="backend") == "PostgreSQL"
+        assert memory.get_preference("ui_framework") is None
+        
+        # A fresh instance reloads the side table from disk
+        reloaded = ProjectMemory(project_id=999)
+        assert reloaded.get_preference("database", category="backend") == "PostgreSQL"
+        
+        memory.clear_memory("preferences")
+        assert memory.get_preference("ui_framework", category="frontend") is None
+    
     def test_search_preferences_by_category(self):
         """Test searching preferences by category."""
         memory = ProjectMemory(project_id=999)
@@ -213,6 +244,29 @@ def hello_world():
         assert len(must_results) > 0
         assert all(r["metadata"]["severity"] == "must" for r in must_results)
     
+    def test_search_skips_other_embedders(self, monkeypatch):
+        """Test constraint searches ignore vectors from a different embedder."""
+        import numpy as np
+        
+        class FakeModel:
+            def encode(self, texts, **kwargs):
+                vectors = np.ones((len(texts), 384), dtype=np.float32)
+                return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        
+        monkeypatch.setattr(memory_module, "get_embedding_model", FakeModel)
+        monkeypatch.setattr(memory_module.settings, "EMBEDDING_WORKERS", 0)
+        memory = ProjectMemory(project_id=999)
+        memory.store_constraint("Stored before the static model", severity="must")
+        
+        # Enabling the static model hides vectors the full model produced
+        monkeypatch.setattr(memory_module.settings, "STATIC_EMBEDDING_MODEL", "fake-static")
+        memory.static_model = FakeModel()
+        memory.store_constraint("Stored with the static model", severity="must")
+        
+        results = memory.search_constraints("constraints")
+        assert [r["metadata"]["constraint"] for r in results] == ["Stored with the static model"]
+        assert results[0]["metadata"]["embedder"] == "fake-static"
+    
     def test_get_context_for_generation(self):
         """Test getting comprehensive context."""
         memory = ProjectMemory(project_id=999)